@@ -1,14 +1,22 @@
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
 import os
 import zipfile
 import uuid
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, BackgroundTasks, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException
 from fastapi.responses import FileResponse
 
 from api.schemas import GenerateRequests, GenerateResponse
-from main import generate_from_prompt, initialize_pipeline, BASE_FILE, OUTPUT_DIR
+from api.job_store import create_job_store
+from api.scheduler import JobScheduler, QueueFullError
+from main import generate_from_prompt, initialize_pipeline, BASE_FILE, OUTPUT_DIR, RESULT_CACHE
+from tesseract.core.generator import generate_latents_batch
+from tesseract.core.result_cache import pipeline_cache_key
+from tesseract.config.config import (API_OUTPUT_DIR, RETRY_AFTER_SECONDS,
+                                     SEED, SAMPLER, PRESETS, get_preset, preset_latency,
+                                     DECODE_GRID_SIZE, DECODE_COARSE_GRID_SIZE,
+                                     GUIDANCE_INTERVAL, UNCOND_REUSE_STEPS)
 from tesseract.loggers.logger import get_logger
 
 logger = get_logger(__name__, log_file='api.log')
@@ -16,7 +24,10 @@ logger = get_logger(__name__, log_file='api.log')
 router = APIRouter(prefix ="/api/v1", tags=[])
 
 PIPELINE = None
-JOBS: Dict[str, Dict] = {}
+JOBS = create_job_store()
+# Shared by all jobs so `resume_latents` finds latents saved by earlier jobs; not removed on job eviction.
+API_LATENTS_DIR = os.path.join(API_OUTPUT_DIR, "latents")
+SCHEDULER = None
 
 
 @asynccontextmanager
@@ -24,24 +35,32 @@ async def lifespan(app):
     '''
     Initialize and manage the FastAPI application lifecycle.
 
-    Loads the global pipeline at startup and performs cleanup on shutdown.
+    Loads the global pipeline and starts the inference workers at startup,
+    and stops the workers on shutdown.
     '''
-    global PIPELINE
+    global PIPELINE, SCHEDULER
     try:
         logger.info("Startinng up FastAPI app and initializing pipeline...")
         PIPELINE = initialize_pipeline()
         logger.info("Pipeline initiated successfully.")
+        SCHEDULER = JobScheduler(process_generation_job,
+                                 batch_handler=process_generation_batch,
+                                 batch_key=generation_batch_key)
+        SCHEDULER.start()
         yield
     finally:
         logger.info("Shutting down FastAPI app. Cleanup if needed.")
+        if SCHEDULER is not None:
+            SCHEDULER.stop()
 
-def process_generation_job(job_id: str, request: GenerateRequests):
+def process_generation_job(job_id: str, request: GenerateRequests, latents: Any = None):
     '''
     Execute a generation job for a given prompt and store results.
 
-    Updates the global JOBS registry with status, results, or errors.
+    Updates the job store with status, results, or errors. `latents` are
+    passed by the batch handler when sampling already happened.
     '''
-    JOBS[job_id]["status"] = "running"
+    JOBS.update(job_id, status="running")
 
     try:
         logger.info(f"JOb {job_id} started: prompt = '{request.prompt}'")
@@ -51,16 +70,21 @@ def process_generation_job(job_id: str, request: GenerateRequests):
             base_file=request.base_file,
             guidance_scale=request.guidance_scale,
             karras_steps=request.karras_steps,
-            output_dir="tesseract/api_outputs",
+            output_dir=JOBS.job_output_dir(job_id),
+            latents_dir=API_LATENTS_DIR,
             formats = request.formats,
             preloaded_pipeline=PIPELINE,
             resume_latents = request.resume_latents,
-            batch_size=request.batch_size
-            
+            batch_size=request.batch_size,
+            latents=latents,
+            seed=request_seed(request),
+            seeds=request.seeds,
+            sampler=request_sampler(request),
+            **request_grid_sizes(request),
+            **request_guidance_schedule(request)
         )
 
-        JOBS[job_id]["status"] = "completed"
-        JOBS[job_id]["result"] = GenerateResponse(
+        JOBS.update(job_id, status="completed", result=GenerateResponse(
             status="success",
             prompt=result["prompt"],
             mesh_count=result["mesh_count"],
@@ -68,33 +92,171 @@ def process_generation_job(job_id: str, request: GenerateRequests):
             latents_path=result.get("latents_path"),
             output_dir=result.get("output_dir"),
             job_id=job_id,
-        ).model_dump()
+            cached=result.get("cached", False),
+        ).model_dump())
 
         logger.info(f"JOb {job_id} completed ({result['mesh_count']} meshes)")
 
     except Exception as e:
-        JOBS[job_id]["status"] = "failed"
-        JOBS[job_id]["error"] = str(e)
+        JOBS.update(job_id, status="failed", error=str(e))
         logger.error(f" Job {job_id} failed: {e}", exc_info=True)
 
 
+def request_seed(request: GenerateRequests) -> Optional[int]:
+    '''
+    Base seed of a request, falling back to the configured seed (None, i.e. random noise, by default).
+    '''
+    return request.seed if request.seed is not None else SEED
+
+
+def request_sampler(request: GenerateRequests) -> str:
+    '''
+    Sampler of a request, falling back to the configured sampler.
+    '''
+    return request.sampler or SAMPLER
+
+
+def request_grid_sizes(request: GenerateRequests) -> Dict[str, Optional[int]]:
+    '''
+    Decoding grid sizes of a request, falling back to the configured ones.
+    '''
+    return {
+        "grid_size": request.grid_size if request.grid_size is not None else DECODE_GRID_SIZE,
+        "coarse_grid_size": (request.coarse_grid_size if request.coarse_grid_size is not None
+                             else DECODE_COARSE_GRID_SIZE),
+    }
+
+
+def request_guidance_schedule(request: GenerateRequests) -> Dict[str, Any]:
+    '''
+    Guidance interval and unconditional reuse of a request, falling back to the configured ones.
+    '''
+    return {
+        "guidance_interval": (request.guidance_interval if request.guidance_interval is not None
+                              else GUIDANCE_INTERVAL),
+        "uncond_reuse_steps": (request.uncond_reuse_steps if request.uncond_reuse_steps is not None
+                               else UNCOND_REUSE_STEPS),
+    }
+
+
+def apply_preset(request: GenerateRequests) -> GenerateRequests:
+    '''
+    Fill the fields a request leaves unset from its quality preset.
+
+    Raises:
+        ValueError: If the preset does not exist.
+    '''
+    if not request.preset:
+        return request
+    preset = get_preset(request.preset)
+    return request.model_copy(update={key: value for key, value in preset.items()
+                                      if key not in request.model_fields_set})
+
+
+def generation_batch_key(request: GenerateRequests) -> Optional[Tuple[Any, ...]]:
+    '''
+    Key under which queued jobs may share one diffusion call.
+
+    Jobs are compatible when they use the same sampler, number of steps and
+    guidance schedule.
+    Jobs resuming cached latents or already in the result cache are not batched.
+    '''
+    if request.resume_latents or is_cached(request):
+        return None
+    schedule = request_guidance_schedule(request)
+    interval = schedule["guidance_interval"]
+    return (request_sampler(request), int(request.karras_steps),
+            tuple(interval) if interval is not None else None,
+            schedule["uncond_reuse_steps"])
+
+
+def is_cached(request: GenerateRequests) -> bool:
+    '''
+    Check whether the result cache already holds the result of a request.
+    '''
+    if RESULT_CACHE is None or (request_seed(request) is None and request.seeds is None):
+        return False
+    return RESULT_CACHE.contains(pipeline_cache_key(
+        PIPELINE,
+        prompt=request.prompt,
+        batch_size=request.batch_size,
+        guidance_scale=request.guidance_scale,
+        karras_steps=request.karras_steps,
+        formats=request.formats,
+        sampler=request_sampler(request),
+        seed=request_seed(request),
+        seeds=request.seeds,
+        **request_grid_sizes(request),
+        **request_guidance_schedule(request),
+    ))
+
+
+def process_generation_batch(jobs: List[Tuple[str, Tuple[GenerateRequests]]]):
+    '''
+    Sample latents for several compatible jobs at once, then decode and store each job.
+
+    Falls back to running the jobs one by one if batched sampling fails.
+    '''
+    requests = [args[0] for _, args in jobs]
+    for job_id, _ in jobs:
+        JOBS.update(job_id, status="running")
+
+    try:
+        batch_latents = generate_latents_batch(
+            prompts=[request.prompt for request in requests],
+            model=PIPELINE["text_encoder_model"],
+            diffusion=PIPELINE["diffusion_process"],
+            batch_sizes=[request.batch_size for request in requests],
+            guidance_scales=[request.guidance_scale for request in requests],
+            karras_steps=int(requests[0].karras_steps),
+            sampler=request_sampler(requests[0]),
+            seeds=[request.seeds if request.seeds is not None else request_seed(request)
+                   for request in requests],
+            **request_guidance_schedule(requests[0]),
+        )
+    except Exception as e:
+        logger.warning(f"Batched sampling failed, running {len(jobs)} jobs one by one: {e}")
+        for (job_id, _), request in zip(jobs, requests):
+            process_generation_job(job_id, request)
+        return
+
+    for (job_id, _), request, latents in zip(jobs, requests, batch_latents):
+        process_generation_job(job_id, request, latents=latents)
+
+
 @router.post("/generate")
-async def generate_endpoint(request: GenerateRequests,
-                            background_tasks : BackgroundTasks):
+async def generate_endpoint(request: GenerateRequests):
     '''
     Queue a generation job for asynchronous processing.
 
-    Returns a job ID for status polling via the /status endpoint.
+    Returns a job ID for status polling via the /status endpoint, or 429 with
+    a Retry-After header when the inference queue is full.
     '''
+    try:
+        request = apply_preset(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    evicted = JOBS.evict_expired()
+    if evicted:
+        logger.info(f"Evicted {evicted} expired jobs")
+
     job_id = str(uuid.uuid4())
-    JOBS[job_id] = {"status": "pending", "result":None, "error":None}
+    JOBS.create(job_id, status="pending")
 
-    background_tasks.add_task(process_generation_job, job_id, request)
-    logger.info(f"Job {job_id} queued for prompt '{request.prompt}'")
+    try:
+        position = SCHEDULER.submit(job_id, request)
+    except QueueFullError as e:
+        JOBS.delete(job_id)
+        logger.warning(f"Rejected job for prompt '{request.prompt}': {e}")
+        raise HTTPException(status_code=429, detail="Too many jobs queued, retry later",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    logger.info(f"Job {job_id} queued at position {position} for prompt '{request.prompt}'")
 
     return {
         "status": "accepted",
         "job_id": job_id,
+        "queue_position": position,
         "message": "Job queued successfully. Poll /api/v1/status/{job_id} for updates."
     }
 
@@ -103,12 +265,35 @@ async def check_status(job_id: str):
     '''
     Retrieve the current status of a generation job.
 
-    Returns job state and progress; raises 404 if job is unknown.
+    Returns job state and queue position (None once the job has left the
+    queue); raises 404 if job is unknown.
     '''
     job = JOBS.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
-    return {"job_id": job_id, "status": job["status"]}
+    queue_position = SCHEDULER.queue_position(job_id) if SCHEDULER is not None else None
+    return {"job_id": job_id, "status": job["status"], "queue_position": queue_position}
+
+
+@router.get("/presets")
+async def list_presets():
+    '''
+    List the quality presets with their options.
+
+    `latency_s` and `measured_on` are only included for presets that have
+    been benchmarked.
+    '''
+    return {name: {**get_preset(name), **preset_latency(name)} for name in PRESETS}
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    '''
+    Report result cache hit/miss counters and size.
+    '''
+    if RESULT_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **RESULT_CACHE.stats()}
 
 
 @router.get("/download/{job_id}")
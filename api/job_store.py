@@ -0,0 +1,231 @@
+from typing import Any, Dict, Iterable, Optional
+from abc import ABC, abstractmethod
+import os
+import json
+import time
+import shutil
+import sqlite3
+import threading
+
+from tesseract.config.config import JOB_STORE, JOB_DB_PATH, JOB_TTL_SECONDS, API_OUTPUT_DIR
+from tesseract.loggers.logger import get_logger
+
+logger = get_logger(__name__, log_file='api.log')
+
+# Only jobs in these states are evicted; pending and running jobs are still being written.
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class JobStore(ABC):
+    '''
+    Storage backend for API generation jobs.
+
+    A job is a dict with "status", "result", "error" and "created_at" keys.
+    Its files are written to `job_output_dir(job_id)`, which is deleted
+    together with the job when it expires.
+    '''
+
+    def __init__(self, ttl_seconds: int = JOB_TTL_SECONDS, output_dir: str = API_OUTPUT_DIR):
+        self.ttl_seconds = ttl_seconds
+        self.output_dir = output_dir
+
+    def job_output_dir(self, job_id: str) -> str:
+        '''Return the directory holding a job's meshes, latents and download zip.'''
+        return os.path.join(self.output_dir, job_id)
+
+    def _remove_outputs(self, job_ids: Iterable[str]) -> None:
+        '''Delete the output directories of evicted jobs.'''
+        for job_id in job_ids:
+            shutil.rmtree(self.job_output_dir(job_id), ignore_errors=True)
+
+    @abstractmethod
+    def create(self, job_id: str, status: str = "pending") -> None:
+        '''Register a new job with the given initial status.'''
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        '''Return the job record, or None if the job is unknown.'''
+
+    @abstractmethod
+    def update(self, job_id: str, **fields: Any) -> None:
+        '''Update one or more of "status", "result" and "error" for a job.'''
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        '''Remove a job from the store.'''
+
+    @abstractmethod
+    def evict_expired(self) -> int:
+        '''
+        Remove finished jobs last updated longer than the TTL ago, with their
+        output files, and return how many were removed.
+        '''
+
+
+class InMemoryJobStore(JobStore):
+    '''
+    Process-local job store. Jobs are lost on restart and not shared between workers.
+    '''
+
+    def __init__(self, ttl_seconds: int = JOB_TTL_SECONDS, output_dir: str = API_OUTPUT_DIR):
+        super().__init__(ttl_seconds, output_dir)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, status: str = "pending") -> None:
+        now = time.time()
+        with self._lock:
+            self._jobs[job_id] = {"status": status, "result": None, "error": None,
+                                  "created_at": now, "updated_at": now}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields, updated_at=time.time())
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def evict_expired(self) -> int:
+        if self.ttl_seconds <= 0:
+            return 0
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in FINISHED_STATUSES and job["updated_at"] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        self._remove_outputs(expired)
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    '''
+    SQLite-backed job store in WAL mode.
+
+    Jobs survive restarts and can be shared by several uvicorn workers
+    pointing at the same database file.
+    '''
+
+    def __init__(self, db_path: str = JOB_DB_PATH, ttl_seconds: int = JOB_TTL_SECONDS,
+                 output_dir: str = API_OUTPUT_DIR):
+        super().__init__(ttl_seconds, output_dir)
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs(updated_at)")
+        logger.info(f"SQLite job store ready at {db_path}")
+
+    def create(self, job_id: str, status: str = "pending") -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, result, error, created_at, updated_at) "
+                "VALUES (?, ?, NULL, NULL, ?, ?)",
+                (job_id, status, now, now),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result, error, created_at FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        status, result, error, created_at = row
+        return {"status": status,
+                "result": json.loads(result) if result is not None else None,
+                "error": error,
+                "created_at": created_at}
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        columns = []
+        values = []
+        for key, value in fields.items():
+            if key not in ("status", "result", "error"):
+                raise ValueError(f"Unknown job field : {key}")
+            if key == "result" and value is not None:
+                value = json.dumps(value)
+            columns.append(f"{key} = ?")
+            values.append(value)
+        if not columns:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {', '.join(columns)}, updated_at = ? WHERE job_id = ?",
+                (*values, time.time(), job_id),
+            )
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def evict_expired(self) -> int:
+        if self.ttl_seconds <= 0:
+            return 0
+        condition = f"status IN ({', '.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?"
+        params = (*FINISHED_STATUSES, time.time() - self.ttl_seconds)
+        with self._lock:
+            # SELECT and DELETE share one write transaction, so a job evicted
+            # concurrently by another worker is only cleaned up once.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = [row[0] for row in self._conn.execute(
+                    f"SELECT job_id FROM jobs WHERE {condition}", params).fetchall()]
+                self._conn.execute(f"DELETE FROM jobs WHERE {condition}", params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._remove_outputs(expired)
+        return len(expired)
+
+
+def create_job_store(kind: str = JOB_STORE, db_path: str = JOB_DB_PATH,
+                     ttl_seconds: int = JOB_TTL_SECONDS, output_dir: str = API_OUTPUT_DIR) -> JobStore:
+    '''
+    Build the configured job store.
+
+    Args:
+        kind (str): "sqlite" or "memory".
+        db_path (str): Database file for the SQLite store.
+        ttl_seconds (int): Age after which jobs are evicted, 0 to keep them forever.
+        output_dir (str): Directory holding one output directory per job.
+
+    Returns:
+        JobStore: The job store instance.
+
+    Raises:
+        ValueError: If `kind` is not a known job store.
+    '''
+    if kind == "sqlite":
+        return SQLiteJobStore(db_path=db_path, ttl_seconds=ttl_seconds, output_dir=output_dir)
+    if kind == "memory":
+        return InMemoryJobStore(ttl_seconds=ttl_seconds, output_dir=output_dir)
+    logger.error(f"Unknown job store : {kind}")
+    raise ValueError(f"Unknown job store '{kind}', expected 'sqlite' or 'memory'")
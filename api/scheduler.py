@@ -0,0 +1,155 @@
+from typing import Any, Callable, Deque, Hashable, List, Optional, Tuple
+from collections import deque
+import threading
+import time
+
+from tesseract.config.config import (INFERENCE_WORKERS, MAX_QUEUE_DEPTH,
+                                     BATCH_WINDOW_MS, MAX_BATCH_JOBS)
+from tesseract.loggers.logger import get_logger
+
+logger = get_logger(__name__, log_file='api.log')
+
+
+class QueueFullError(RuntimeError):
+    '''
+    Raised when a job is submitted while the scheduler queue is at capacity.
+    '''
+
+
+class JobScheduler:
+    '''
+    Bounded in-process job queue served by a fixed pool of inference workers.
+
+    Jobs are handled in FIFO order by `num_workers` threads, so no more than
+    that many generations compete for the model and CPU cores at once.
+
+    When a `batch_handler` is given, a worker that picks up a job waits up to
+    `batch_window_ms` for other queued jobs with the same `batch_key` and
+    hands up to `max_batch_jobs` of them to `batch_handler` together. Jobs
+    whose key is None are never batched. The key is computed once, when the
+    job is submitted, and queued with it.
+    '''
+
+    def __init__(self, handler: Callable[..., Any],
+                 num_workers: int = INFERENCE_WORKERS,
+                 max_queue_depth: int = MAX_QUEUE_DEPTH,
+                 batch_handler: Optional[Callable[[List[Tuple[str, Tuple[Any, ...]]]], Any]] = None,
+                 batch_key: Optional[Callable[..., Optional[Hashable]]] = None,
+                 batch_window_ms: float = BATCH_WINDOW_MS,
+                 max_batch_jobs: int = MAX_BATCH_JOBS):
+        if num_workers < 1:
+            raise ValueError("Scheduler needs at least one worker")
+        self.handler = handler
+        self.num_workers = num_workers
+        self.max_queue_depth = max_queue_depth
+        self.batch_handler = batch_handler
+        self.batch_key = batch_key
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch_jobs = max_batch_jobs
+
+        self._pending: Deque[Tuple[str, Tuple[Any, ...], Optional[Hashable]]] = deque()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._running = False
+
+    def start(self) -> None:
+        '''Start the worker threads.'''
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"inference-worker-{i}",
+                                      daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"Scheduler started with {self.num_workers} workers "
+                    f"(max queue depth {self.max_queue_depth})")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        '''Stop accepting work and wait for running jobs to finish.'''
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        logger.info("Scheduler stopped")
+
+    def submit(self, job_id: str, *args: Any) -> int:
+        '''
+        Queue a job for the workers.
+
+        Args:
+            job_id (str): Job identifier, passed as the first handler argument.
+            *args: Remaining handler arguments.
+
+        Returns:
+            int: 1-based position of the job in the queue.
+
+        Raises:
+            QueueFullError: If `max_queue_depth` jobs are already waiting.
+        '''
+        # Computed outside the lock: the key function may hash the request and query the result cache.
+        key = self.batch_key(*args) if self.batch_handler is not None and self.batch_key else None
+        with self._cond:
+            if len(self._pending) >= self.max_queue_depth:
+                raise QueueFullError(f"Queue is full ({self.max_queue_depth} jobs waiting)")
+            self._pending.append((job_id, args, key))
+            # Wake every worker, including one that is collecting a batch.
+            self._cond.notify_all()
+            return len(self._pending)
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        '''Return the 1-based queue position of a waiting job, or None if it is not waiting.'''
+        with self._cond:
+            for position, (pending_id, _, _) in enumerate(self._pending, start=1):
+                if pending_id == job_id:
+                    return position
+        return None
+
+    def queue_depth(self) -> int:
+        '''Return the number of jobs waiting for a worker.'''
+        with self._cond:
+            return len(self._pending)
+
+    def _collect_batch(self, first: Tuple[str, Tuple[Any, ...], Optional[Hashable]]
+                       ) -> List[Tuple[str, Tuple[Any, ...]]]:
+        '''Gather queued jobs compatible with `first` until the batch window closes. Holds the lock.'''
+        job_id, args, key = first
+        batch = [(job_id, args)]
+        if self.batch_handler is None or key is None or self.max_batch_jobs <= 1:
+            return batch
+
+        deadline = time.monotonic() + self.batch_window
+        while True:
+            for item in list(self._pending):
+                if len(batch) >= self.max_batch_jobs:
+                    break
+                if item[2] == key:
+                    self._pending.remove(item)
+                    batch.append(item[:2])
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch_jobs or remaining <= 0 or not self._running:
+                return batch
+            self._cond.wait(remaining)
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                batch = self._collect_batch(self._pending.popleft())
+
+            job_ids = [job_id for job_id, _ in batch]
+            try:
+                if len(batch) == 1:
+                    job_id, args = batch[0]
+                    self.handler(job_id, *args)
+                else:
+                    logger.info(f"Running {len(batch)} jobs as one batch : {job_ids}")
+                    self.batch_handler(batch)
+            except Exception as e:
+                logger.error(f"Unhandled error in jobs {job_ids}: {e}", exc_info=True)
@@ -12,12 +12,28 @@ class GenerateRequests(BaseModel):
 
     karras_steps : Optional[float] = Field(30, description= "Number of steps taken for generation")
 
+    sampler : Optional[str] = Field(None, description = "Karras sampler: heun, dpmpp_2m, dpm or ancestral (default: server sampler)")
+
+    guidance_interval : Optional[List[float]] = Field(None, description = "[sigma_low, sigma_high] noise level range with classifier-free guidance (default: server setting)")
+
+    uncond_reuse_steps : Optional[int] = Field(None, description = "Steps sharing one unconditional prediction (default: server setting)")
+
+    preset : Optional[str] = Field(None, description = "Quality preset (see /api/v1/presets); explicitly set fields override it")
+
+    grid_size : Optional[int] = Field(None, description = "SDF resolution for mesh extraction (default: server grid size)")
+
+    coarse_grid_size : Optional[int] = Field(None, description = "Coarse SDF grid for coarse-to-fine mesh extraction; features thinner than one coarse cell can be lost (default: server setting)")
+
     formats: Optional[List[str]] = Field(default_factory=lambda: ["ply"], description="Mesh formats to export")
 
-    resume_latents : bool = Field(False, description = "Resume from cached latents if available")
+    resume_latents : bool = Field(False, description = "Resume from the latents an earlier job saved under the same base_file, if available")
 
     render_latents : bool = Field(False, description = "Render latents for direct preview")
 
+    seed : Optional[int] = Field(None, description = "Base sampling seed, sample i uses seed + i. Makes the result reproducible and cacheable (default: server seed, random unless configured)")
+
+    seeds : Optional[List[int]] = Field(None, description = "Explicit per-sample seeds, one per batch item (overrides seed)")
+
 @field_validator("formats", mode="before")
 def ensure_list_and_default(cls, v):
        
@@ -40,6 +56,7 @@ class GenerateResponse(BaseModel):
     latents_path : Optional[str] = None
     output_dir: Optional[str] = None
     job_id: Optional[str] = None #for async stuff
+    cached: bool = Field(False, description="True if the result was served from the result cache")
 
 
 # class ErrorResponse(BaseModel):
@@ -0,0 +1,151 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+
+from tesseract.loggers.logger import get_logger
+from tesseract.config.config import PRESETS, get_preset, BASE_FILE, KARRAS_STEPS, COMPILE_ENABLED
+from tesseract.core.generator import generate_latents
+from main import initialize_pipeline, generate_from_prompt
+
+
+logger = get_logger(__name__, log_file='app.log')
+
+
+def parse_args():
+    '''
+    Parse and return CLI arguments for the preset benchmark.
+
+    Returns:
+        argparse.Namespace: Parsed command-line arguments.
+    '''
+    parser = argparse.ArgumentParser(
+        description="Measure end-to-end latency of each quality preset"
+    )
+    parser.add_argument("-p", "--prompt", type=str, default="a red office chair",
+                        help="Prompt generated for every preset")
+    parser.add_argument("--presets", type=str, nargs="+", default=list(PRESETS),
+                        choices=list(PRESETS), help="Presets to benchmark (default: all)")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Timed runs per preset; the median is reported (default: 3)")
+    parser.add_argument("--compile", action=argparse.BooleanOptionalAction, default=COMPILE_ENABLED,
+                        help=f"Benchmark the torch.compile'd pipeline (default: {COMPILE_ENABLED})")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Also write the measurements to this JSON file")
+    return parser.parse_args()
+
+
+def describe_hardware(device)->str:
+    '''
+    Describe the hardware a benchmark ran on, for the presets' `measured_on` entry.
+
+    Args:
+        device (torch.device): Device the pipeline runs on.
+
+    Returns:
+        str: GPU name for CUDA devices, otherwise the CPU / platform description.
+    '''
+    if device.type == "cuda":
+        import torch
+        return torch.cuda.get_device_name(device)
+    return platform.processor() or platform.machine()
+
+
+def benchmark_preset(pipeline, name : str, prompt : str, repeats : int, output_dir : str)->dict:
+    '''
+    Time `generate_from_prompt` for one preset with the result cache disabled.
+
+    The first run is reported separately as the cold latency, since it pays
+    one-off costs such as CUDA context setup, kernel selection and any
+    compilation not covered by the startup warm-up. The steady-state time per
+    diffusion step is measured on a separate, latents-only run.
+
+    Args:
+        pipeline (dict): Pipeline returned by `initialize_pipeline`.
+        name (str): Preset name.
+        prompt (str): Prompt to generate.
+        repeats (int): Number of timed runs.
+        output_dir (str): Scratch directory for the generated files.
+
+    Returns:
+        dict: Cold, median, minimum and maximum latency in seconds and milliseconds per step.
+    '''
+    options = get_preset(name)
+
+    def run():
+        generate_from_prompt(prompt=prompt, base_file=f"{BASE_FILE}_{name}", output_dir=output_dir,
+                             preloaded_pipeline=pipeline, batch_size=1, progress=False,
+                             use_cache=False, **options)
+
+    start = time.perf_counter()
+    run()
+    cold = time.perf_counter() - start
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    steps = options.get("karras_steps", KARRAS_STEPS)
+    sampling = {key: value for key, value in options.items()
+                if key in ("sampler", "karras_steps", "guidance_interval", "uncond_reuse_steps")}
+    start = time.perf_counter()
+    generate_latents(prompt=prompt, model=pipeline["text_encoder_model"],
+                     diffusion=pipeline["diffusion_process"], batch_size=1, progress=False,
+                     **sampling)
+    step_ms = (time.perf_counter() - start) * 1000 / steps
+
+    logger.info(f"Preset {name} : cold {cold:.2f}s, median {statistics.median(timings):.2f}s "
+                f"over {repeats} runs, {step_ms:.1f}ms per step")
+    return {"latency_s": round(statistics.median(timings), 2),
+            "cold_s": round(cold, 2),
+            "min_s": round(min(timings), 2),
+            "max_s": round(max(timings), 2),
+            "step_ms": round(step_ms, 1)}
+
+
+def main():
+    '''
+    Benchmark the selected presets and print a latency table.
+
+    The reported `latency_s` values and the hardware they were measured on
+    are meant to be copied into the `latency_s` / `measured_on` entries of the
+    `presets` section of `defaults.yaml`.
+    '''
+    args = parse_args()
+    start = time.perf_counter()
+    pipeline = initialize_pipeline(use_compile=args.compile)
+    startup = time.perf_counter() - start
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name in args.presets:
+            results[name] = benchmark_preset(pipeline, name, args.prompt, args.repeats, output_dir)
+
+    hardware = describe_hardware(pipeline["device"])
+    print(f"\nDevice : {pipeline['device']} ({hardware}), compiled : {pipeline['compiled']}, "
+          f"startup : {startup:.1f}s")
+    print(f"{'preset':<10} {'latency_s':>10} {'cold_s':>8} {'min_s':>8} {'max_s':>8} {'step_ms':>8}")
+    for name, stats in results.items():
+        print(f"{name:<10} {stats['latency_s']:>10.2f} {stats['cold_s']:>8.2f} {stats['min_s']:>8.2f} "
+              f"{stats['max_s']:>8.2f} {stats['step_ms']:>8.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"device": str(pipeline["device"]), "measured_on": hardware,
+                       "compiled": pipeline["compiled"],
+                       "startup_s": round(startup, 2), "prompt": args.prompt,
+                       "presets": results}, f, indent=2)
+        print(f"\nSaved measurements to {args.json}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"Benchmark failed: {e}", exc_info=True)
+        sys.exit(1)
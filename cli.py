@@ -7,7 +7,10 @@ from tesseract.config.config import ( USE_CUDA,FALLBACK_TO_CPU, OUTPUT_DIR,
                                     DEFAULT_FORMATS, BASE_FILE, LATENT_BATCH_SIZE,
                                     GUIDANCE_SCALE, USE_FP16, USE_KARRAS, 
                                     KARRAS_STEPS, CLIP_DENOISED,PROGRESS,
-                                    SIGMA_MIN, SIGMA_MAX, S_CHURN,RENDER_INSTANCE)
+                                    SIGMA_MIN, SIGMA_MAX, S_CHURN,RENDER_INSTANCE, SEED,
+                                    SAMPLER, SAMPLERS, PRESETS, get_preset,
+                                    DECODE_GRID_SIZE, DECODE_COARSE_GRID_SIZE,
+                                    GUIDANCE_INTERVAL, UNCOND_REUSE_STEPS)
 from main import generate_from_prompt, batch_generate
 
 
@@ -118,6 +121,47 @@ def parse_args():
         default=KARRAS_STEPS,
         help=f"Number of Karras steps (default: {KARRAS_STEPS})"
     )
+    parser.add_argument(
+        "--sampler",
+        type=str,
+        default=SAMPLER,
+        choices=SAMPLERS,
+        help=f"Karras sampler, dpmpp_2m needs one model call per step instead of two (default: {SAMPLER})"
+    )
+    parser.add_argument(
+        "--guidance-interval",
+        type=float,
+        nargs=2,
+        metavar=("SIGMA_LOW", "SIGMA_HIGH"),
+        default=GUIDANCE_INTERVAL,
+        help=f"Apply classifier-free guidance only within this noise level range (default: {GUIDANCE_INTERVAL})"
+    )
+    parser.add_argument(
+        "--uncond-reuse-steps",
+        type=int,
+        default=UNCOND_REUSE_STEPS,
+        help=f"Reuse the unconditional prediction for this many steps (default: {UNCOND_REUSE_STEPS})"
+    )
+    parser.add_argument(
+        "--grid-size",
+        type=int,
+        default=DECODE_GRID_SIZE,
+        help=f"SDF resolution for mesh extraction, lower is faster and coarser (default: {DECODE_GRID_SIZE})"
+    )
+    parser.add_argument(
+        "--coarse-grid-size",
+        type=int,
+        default=DECODE_COARSE_GRID_SIZE,
+        help="Coarse SDF grid for coarse-to-fine mesh extraction; features thinner than one coarse "
+             f"cell can be lost (default: {DECODE_COARSE_GRID_SIZE})"
+    )
+    parser.add_argument(
+        "--preset",
+        type=str,
+        default=None,
+        choices=list(PRESETS),
+        help="Quality preset setting sampler, steps and grid sizes; explicit flags override it"
+    )
     parser.add_argument(
         "--sigma-max",
         type=float,
@@ -136,6 +180,20 @@ def parse_args():
         default=S_CHURN,
         help=f"Sigma churn parameter (default: {S_CHURN})"
     )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=SEED,
+        help="Base sampling seed, sample i uses seed + i; makes results reproducible and cacheable "
+             f"(default: {SEED if SEED is not None else 'random'})"
+    )
+    parser.add_argument(
+        "--seeds",
+        type=int,
+        nargs="+",
+        default=None,
+        help="Explicit per-sample seeds for a single prompt, one per batch item (overrides --seed)"
+    )
     parser.add_argument(
         "--use-cuda",
         action="store_true",
@@ -156,6 +214,10 @@ def parse_args():
     # )
 
 
+    args, _ = parser.parse_known_args()
+    if args.preset:
+        # Preset values become the defaults, so flags given explicitly still win.
+        parser.set_defaults(**get_preset(args.preset))
     return parser.parse_args()
 
 
@@ -196,6 +258,13 @@ def main():
                                         sigma_min=args.sigma_min,
                                         s_churn=args.s_churn,
                                         fallback_to_cpu=args.fallback_to_cpu,
+                                        seed=args.seed,
+                                        seeds=args.seeds,
+                                        sampler=args.sampler,
+                                        grid_size=args.grid_size,
+                                        coarse_grid_size=args.coarse_grid_size,
+                                        guidance_interval=args.guidance_interval,
+                                        uncond_reuse_steps=args.uncond_reuse_steps,
                                         )
             print(f"\n Generated mesh for prompt : '{args.prompt}'")
             print(f"\n Saved files : {result['saved_files']}\n")
@@ -233,6 +302,12 @@ def main():
                                         s_churn=args.s_churn,
                                         
                                         fallback_to_cpu=args.fallback_to_cpu,
+                                        seed=args.seed,
+                                        sampler=args.sampler,
+                                        grid_size=args.grid_size,
+                                        coarse_grid_size=args.coarse_grid_size,
+                                        guidance_interval=args.guidance_interval,
+                                        uncond_reuse_steps=args.uncond_reuse_steps,
                 )
             
             
@@ -1,6 +1,6 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
-import os, sys
+import os, sys, time
 sys.path.append(os.path.join(os.path.dirname(__file__), "tesseract/core"))
 
 from tesseract.config.config import ( USE_CUDA,FALLBACK_TO_CPU,BASE_MODEL,
@@ -8,21 +8,33 @@ from tesseract.config.config import ( USE_CUDA,FALLBACK_TO_CPU,BASE_MODEL,
                                     DEFAULT_FORMATS, BASE_FILE, LATENT_BATCH_SIZE,
                                     GUIDANCE_SCALE, USE_FP16, USE_KARRAS, 
                                     KARRAS_STEPS, CLIP_DENOISED,PROGRESS,
-                                    SIGMA_MIN, SIGMA_MAX, S_CHURN,RENDER_MODE,RENDER_SIZE)
+                                    SIGMA_MIN, SIGMA_MAX, S_CHURN,RENDER_MODE,RENDER_SIZE,
+                                    CACHE_ENABLED, SEED, SAMPLER,
+                                    DECODE_GRID_SIZE, DECODE_COARSE_GRID_SIZE,
+                                    GUIDANCE_INTERVAL, UNCOND_REUSE_STEPS,
+                                    COMPILE_ENABLED, COMPILE_WARMUP_BATCH_SIZES, QUANTIZE_INT8,
+                                    DECODER_ONLY, PRESETS, get_preset)
 from tesseract.loggers.logger import get_logger
-from tesseract.core.model_loader import get_device, load_all_models
-from tesseract.core.generator import get_or_generate_latents, generate_latents
+from tesseract.core.model_loader import get_device, load_all_models, compile_models
+from tesseract.core.generator import get_or_generate_latents, generate_latents, save_latents
 from tesseract.core.mesh_util import decode_latents, save_mesh
+from tesseract.core.result_cache import ResultCache, pipeline_cache_key
 # from tesseract.core.render_core import render_image
 
 
 logger = get_logger(__name__, log_file='app.log')
 
+RESULT_CACHE = ResultCache() if CACHE_ENABLED else None
+
 def initialize_pipeline(
         use_cuda : bool=USE_CUDA,
         fallback_to_cpu : bool=  FALLBACK_TO_CPU,
          base_model :str = BASE_MODEL, transmitter: str = TRANSMITTER,
-diffusion_config : str = DIFFUSION_CONFIG
+diffusion_config : str = DIFFUSION_CONFIG,
+use_compile : bool = COMPILE_ENABLED,
+warmup_batch_sizes : List[int] = COMPILE_WARMUP_BATCH_SIZES,
+quantize_int8 : bool = QUANTIZE_INT8,
+decoder_only : bool = DECODER_ONLY
 ) -> Dict[str, Any]:
     '''
     Initialize and load all models required for the Tesseract generation pipeline.
@@ -33,6 +45,11 @@ diffusion_config : str = DIFFUSION_CONFIG
         base_model (str): Name of the base text encoder model.
         transmitter (str): Name of the transmitter model for decoding latents.
         diffusion_config (str): Path to diffusion process configuration.
+        use_compile (bool): Compile the models with torch.compile and warm them up
+            before returning, so the first request does not pay for compilation.
+        warmup_batch_sizes (List[int]): Batch sizes to warm up in compiled mode.
+        quantize_int8 (bool): Load the base model with int8 transformer weights (CPU only).
+        decoder_only (bool): Load only the transmitter's latent decoder instead of the full model.
 
     Returns:
         Dict[str, Any]: Dictionary containing loaded models and device info.
@@ -48,16 +65,25 @@ diffusion_config : str = DIFFUSION_CONFIG
         device = get_device(use_cuda, fallback_to_cpu)
         logger.info(f"Using device {device}")
 
-        transmitter_model, text_encoder_model, diffusion_process = load_all_models(device=device, base_model=base_model, transmitter=transmitter, diffusion_config=diffusion_config)
+        transmitter_model, text_encoder_model, diffusion_process = load_all_models(device=device, base_model=base_model, transmitter=transmitter, diffusion_config=diffusion_config, quantize_int8=quantize_int8, decoder_only=decoder_only)
         logger.info("All models loaded successfully.")
 
         pipeline_components={
             "transmitter" : transmitter_model,
             "text_encoder_model" : text_encoder_model,
             "diffusion_process" : diffusion_process,
-            "device" : device
+            "device" : device,
+            "base_model" : base_model,
+            "transmitter_name" : transmitter,
+            "compiled" : False,
+            "quantized" : getattr(text_encoder_model, "quantized_int8", False)
         }
 
+        if use_compile:
+            pipeline_components["compiled"] = compile_models(text_encoder_model, transmitter_model)
+            if pipeline_components["compiled"]:
+                warm_up_pipeline(pipeline_components, batch_sizes=warmup_batch_sizes)
+
         logger.info("Pipeline initiated successfully and ready for generation.")
         return pipeline_components
     except Exception as e:
@@ -65,6 +91,65 @@ diffusion_config : str = DIFFUSION_CONFIG
         raise RuntimeError(f"Failed to initialize Tesseract pipeline : {e}")
     
 
+def warmup_decode_grids()->List[tuple]:
+    '''
+    List the distinct SDF grids served by the configured defaults and every preset.
+
+    Returns:
+        List[tuple]: (grid_size, coarse_grid_size) pairs.
+    '''
+    grids = [(DECODE_GRID_SIZE, DECODE_COARSE_GRID_SIZE)]
+    for name in PRESETS:
+        preset = get_preset(name)
+        grid = (preset.get("grid_size", DECODE_GRID_SIZE),
+                preset.get("coarse_grid_size", DECODE_COARSE_GRID_SIZE))
+        if grid not in grids:
+            grids.append(grid)
+    return grids
+
+
+def warm_up_pipeline(pipeline : Dict[str, Any],
+                     batch_sizes : List[int] = COMPILE_WARMUP_BATCH_SIZES)->None:
+    '''
+    Run throwaway generations so compiled kernels are built before serving.
+
+    For each batch size, a short sampling run alternates guided steps (doubled
+    denoiser batch) and steps reusing the unconditional prediction (conditional
+    batch only), so both denoiser shapes used by presets and guidance schedules
+    are compiled. The latents are then decoded once on every SDF grid of the
+    defaults and presets, see `warmup_decode_grids`.
+
+    Nothing is written to disk, and the warm-up prompt bypasses the text
+    embedding cache. Failures are logged and ignored, since the models still
+    compile lazily on the first real request.
+
+    Args:
+        pipeline (Dict[str, Any]): Pipeline returned by `initialize_pipeline`.
+        batch_sizes (List[int]): Batch sizes to sample and decode.
+    '''
+    clip = getattr(pipeline["text_encoder_model"], "clip", None)
+    text_cache = getattr(clip, "text_cache", None)
+    if text_cache is not None:
+        clip.text_cache = None
+    try:
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            try:
+                latents = generate_latents(prompt="a chair", model=pipeline["text_encoder_model"],
+                                           diffusion=pipeline["diffusion_process"],
+                                           batch_size=batch_size, progress=False, seed=0,
+                                           karras_steps=2, uncond_reuse_steps=2)
+                for grid_size, coarse_grid_size in warmup_decode_grids():
+                    decode_latents(model=pipeline["transmitter"], latents=latents,
+                                   grid_size=grid_size, coarse_grid_size=coarse_grid_size)
+                logger.info(f"Warm-up for batch size {batch_size} took {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                logger.warning(f"Warm-up for batch size {batch_size} failed : {e}")
+    finally:
+        if text_cache is not None:
+            clip.text_cache = text_cache
+
+
 def generate_from_prompt(prompt:str, base_file :BASE_FILE,
                          output_dir : str = OUTPUT_DIR, formats = DEFAULT_FORMATS,
                          preloaded_pipeline: Dict[str, Any] = None, resume_latents : bool = False,
@@ -79,7 +164,17 @@ def generate_from_prompt(prompt:str, base_file :BASE_FILE,
                             sigma_max : float = SIGMA_MAX,
                             sigma_min : float = SIGMA_MIN,
                             s_churn : float = S_CHURN,
-                            fallback_to_cpu : bool = FALLBACK_TO_CPU,) ->Dict[str, Any]:
+                            fallback_to_cpu : bool = FALLBACK_TO_CPU,
+                            latents : Any = None,
+                            use_cache : bool = CACHE_ENABLED,
+                            seed : Optional[int] = SEED,
+                            seeds : Optional[List[int]] = None,
+                            sampler : str = SAMPLER,
+                            grid_size : Optional[int] = DECODE_GRID_SIZE,
+                            coarse_grid_size : Optional[int] = DECODE_COARSE_GRID_SIZE,
+                            guidance_interval : Optional[List[float]] = GUIDANCE_INTERVAL,
+                            uncond_reuse_steps : int = UNCOND_REUSE_STEPS,
+                            latents_dir : Optional[str] = None) ->Dict[str, Any]:
     
     '''
     Generate 3D mesh(es) from a text prompt using the Tesseract pipeline.
@@ -103,6 +198,20 @@ def generate_from_prompt(prompt:str, base_file :BASE_FILE,
         sigma_min (float): Minimum noise sigma.
         s_churn (float): Sigma churn parameter for sampling.
         fallback_to_cpu (bool): Fallback to CPU if CUDA unavailable.
+        latents (Any, optional): Precomputed latents (e.g. from a batched sampling call).
+            When given, latent generation is skipped and the latents are only saved and decoded.
+        use_cache (bool): Return a cached result for an identical request if one exists,
+            and cache fresh results. Ignored when `resume_latents` is set or sampling is unseeded.
+        seed (int, optional): Base sampling seed; sample i uses `seed + i`. None for random noise.
+        seeds (List[int], optional): Explicit per-sample seeds, overriding `seed`.
+        sampler (str): Karras sampler ("heun", "dpmpp_2m", "dpm" or "ancestral").
+        grid_size (int, optional): SDF resolution for mesh extraction, None for the transmitter default.
+        coarse_grid_size (int, optional): Coarse SDF grid for coarse-to-fine extraction, None for dense.
+        guidance_interval (List[float], optional): [sigma_low, sigma_high] range in which
+            classifier-free guidance is applied, None for every step.
+        uncond_reuse_steps (int): Steps sharing one unconditional prediction.
+        latents_dir (str, optional): Directory latents are saved to and resumed from,
+            `{output_dir}/latents` by default.
 
     Returns:
         Dict[str, Any]: Metadata including saved file paths, counts, and latents path.
@@ -112,6 +221,24 @@ def generate_from_prompt(prompt:str, base_file :BASE_FILE,
     '''
 
     logger.info(f"Starting generation..")
+    latents_dir = latents_dir or os.path.join(output_dir, "latents")
+    latents_path = os.path.join(latents_dir, f"{base_file}_latents.pt")
+
+    cache_key = None
+    seeded = seed is not None or seeds is not None
+    if use_cache and RESULT_CACHE is not None and not resume_latents and seeded:
+        cache_key = pipeline_cache_key(
+            preloaded_pipeline, use_fp16=use_fp16,
+            prompt=prompt, batch_size=batch_size, guidance_scale=guidance_scale,
+            karras_steps=karras_steps, formats=formats,
+            use_karras=use_karras, clip_denoised=clip_denoised,
+            sigma_min=sigma_min, sigma_max=sigma_max, s_churn=s_churn,
+            sampler=sampler, seed=seed, seeds=seeds,
+            grid_size=grid_size, coarse_grid_size=coarse_grid_size,
+            guidance_interval=guidance_interval, uncond_reuse_steps=uncond_reuse_steps)
+        cached = RESULT_CACHE.fetch(cache_key, output_dir, base_file, latents_dir=latents_dir)
+        if cached is not None:
+            return cached
 
     try:
         if not preloaded_pipeline :
@@ -126,42 +253,56 @@ def generate_from_prompt(prompt:str, base_file :BASE_FILE,
         diffusion_process = pipeline["diffusion_process"]
         # device = pipeline["device"] Ain't using this rn 
 
-        latents = get_or_generate_latents(
-            prompt=prompt,
-            model=text_encoder_model,
-            diffusion=diffusion_process,
-            base_file=base_file,
-            output_dir=output_dir,
-            resume=resume_latents,
-            batch_size=batch_size, guidance_scale=guidance_scale,
-            progress = progress, clip_denoised=clip_denoised,
-            use_fp16=use_fp16,
-            use_karras=use_karras,
-            karras_steps=karras_steps,
-            sigma_max=sigma_max,
-            sigma_min=sigma_min,
-            s_churn=s_churn
-        )
+        if latents is not None:
+            save_latents(latents, latents_path)
+        else:
+            latents = get_or_generate_latents(
+                prompt=prompt,
+                model=text_encoder_model,
+                diffusion=diffusion_process,
+                base_file=base_file,
+                output_dir=output_dir,
+                resume=resume_latents,
+                batch_size=batch_size, guidance_scale=guidance_scale,
+                progress = progress, clip_denoised=clip_denoised,
+                use_fp16=use_fp16,
+                use_karras=use_karras,
+                karras_steps=karras_steps,
+                sigma_max=sigma_max,
+                sigma_min=sigma_min,
+                s_churn=s_churn,
+                seed=seed,
+                seeds=seeds,
+                sampler=sampler,
+                guidance_interval=guidance_interval,
+                uncond_reuse_steps=uncond_reuse_steps,
+                latents_dir=latents_dir
+            )
 
         # if render :
         #     logger.info("Rendering turnt on...")
         #     render_image(device=device, latents=latents, size=RENDER_SIZE,
         #                  render_mode=RENDER_MODE, transmitter=transmitter_model)
 
-        meshes = decode_latents(model=transmitter_model, latents= latents)
+        meshes = decode_latents(model=transmitter_model, latents= latents,
+                                coarse_grid_size=coarse_grid_size, grid_size=grid_size)
 
         results = save_mesh(meshes=meshes, base_file=base_file,
                               output_dir=output_dir, formats=formats)
         
         logger.info(f"Generation complete for prompt : {prompt}, saved {results['count']} files.")
 
-        return{
+        result = {
             "prompt" : prompt,
             "saved_files":results["saved_files"],
             "output_dir" :output_dir,
             "mesh_count" : results["count"],
-            "latents_path" :  os.path.join(output_dir, "latents", f"{base_file}_latents.pt")
+            "latents_path" :  latents_path
         }
+        if cache_key is not None and results["count"] and not results["failed_formats"]:
+            RESULT_CACHE.store(cache_key, result, base_file)
+
+        return result
     
     except Exception as e:
         logger.error(f"Generation failed : {e}")
@@ -180,7 +321,13 @@ def batch_generate(prompts: List[str], output_dir:str, base_file : str, formats
                             sigma_max : float = SIGMA_MAX,
                             sigma_min : float = SIGMA_MIN,
                             s_churn : float = S_CHURN,
-                            fallback_to_cpu : bool = FALLBACK_TO_CPU)->List[Dict[str, Any]]:
+                            fallback_to_cpu : bool = FALLBACK_TO_CPU,
+                            seed : Optional[int] = SEED,
+                            sampler : str = SAMPLER,
+                            grid_size : Optional[int] = DECODE_GRID_SIZE,
+                            coarse_grid_size : Optional[int] = DECODE_COARSE_GRID_SIZE,
+                            guidance_interval : Optional[List[float]] = GUIDANCE_INTERVAL,
+                            uncond_reuse_steps : int = UNCOND_REUSE_STEPS)->List[Dict[str, Any]]:
         
         '''
         Generate meshes for a batch of text prompts using the Tesseract pipeline.
@@ -204,6 +351,13 @@ def batch_generate(prompts: List[str], output_dir:str, base_file : str, formats
         sigma_min (float): Minimum noise sigma.
         s_churn (float): Sigma churn parameter for sampling.
         fallback_to_cpu (bool): Fallback to CPU if CUDA unavailable.
+        seed (int, optional): Base sampling seed used for every prompt.
+        sampler (str): Karras sampler ("heun", "dpmpp_2m", "dpm" or "ancestral").
+        grid_size (int, optional): SDF resolution for mesh extraction, None for the transmitter default.
+        coarse_grid_size (int, optional): Coarse SDF grid for coarse-to-fine extraction, None for dense.
+        guidance_interval (List[float], optional): [sigma_low, sigma_high] range in which
+            classifier-free guidance is applied, None for every step.
+        uncond_reuse_steps (int): Steps sharing one unconditional prediction.
 
     Returns:
         List[Dict[str, Any]]: List of generation results for each prompt.
@@ -243,7 +397,13 @@ def batch_generate(prompts: List[str], output_dir:str, base_file : str, formats
             karras_steps=karras_steps,
             sigma_max=sigma_max,
             sigma_min=sigma_min,
-            s_churn=s_churn)
+            s_churn=s_churn,
+            seed=seed,
+            sampler=sampler,
+            grid_size=grid_size,
+            coarse_grid_size=coarse_grid_size,
+            guidance_interval=guidance_interval,
+            uncond_reuse_steps=uncond_reuse_steps)
                 all_results.append(result)
                 logger.info(f"[{idx+1}/{len(prompts)}] Generated for {prompt} saved successfully ")
             except Exception as e:
@@ -0,0 +1,135 @@
+import sys
+import json
+import argparse
+
+import numpy as np
+import torch
+from scipy.spatial import cKDTree
+
+from tesseract.loggers.logger import get_logger
+from tesseract.core.generator import generate_latents
+from tesseract.core.mesh_util import decode_latents
+from main import initialize_pipeline
+
+
+logger = get_logger(__name__, log_file='app.log')
+
+DEFAULT_PROMPTS = ["a red office chair", "a wooden table", "a toy airplane", "a coffee mug"]
+
+
+def parse_args():
+    '''
+    Parse and return CLI arguments for the int8 accuracy check.
+
+    Returns:
+        argparse.Namespace: Parsed command-line arguments.
+    '''
+    parser = argparse.ArgumentParser(
+        description="Compare latents and meshes of the int8-quantized base model against fp32 on CPU"
+    )
+    parser.add_argument("-p", "--prompts", type=str, nargs="+", default=DEFAULT_PROMPTS,
+                        help="Prompts to generate with both models")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2],
+                        help="Fixed seeds, each used for every prompt (default: 0 1 2)")
+    parser.add_argument("--max-latent-error", type=float, default=0.1,
+                        help="Fail if the mean relative L2 latent error exceeds this (default: 0.1)")
+    parser.add_argument("--max-chamfer", type=float, default=0.02,
+                        help="Fail if the mean chamfer distance, relative to the fp32 mesh's "
+                             "bounding box diagonal, exceeds this (default: 0.02)")
+    parser.add_argument("--json", type=str, default=None,
+                        help="Also write the per-sample measurements to this JSON file")
+    return parser.parse_args()
+
+
+def latent_errors(reference : torch.Tensor, candidate : torch.Tensor)->dict:
+    '''
+    Compare two latent vectors.
+
+    Args:
+        reference (torch.Tensor): fp32 latent.
+        candidate (torch.Tensor): int8 latent.
+
+    Returns:
+        dict: Relative L2 error and cosine similarity.
+    '''
+    reference = reference.flatten().float()
+    candidate = candidate.flatten().float()
+    return {
+        "latent_rel_l2": float((candidate - reference).norm() / reference.norm().clamp_min(1e-8)),
+        "latent_cosine": float(torch.nn.functional.cosine_similarity(reference, candidate, dim=0)),
+    }
+
+
+def chamfer_distance(reference : np.ndarray, candidate : np.ndarray)->float:
+    '''
+    Symmetric chamfer distance between two vertex sets, relative to the reference bounding box diagonal.
+
+    Args:
+        reference (np.ndarray): [N x 3] vertices of the fp32 mesh.
+        candidate (np.ndarray): [M x 3] vertices of the int8 mesh.
+
+    Returns:
+        float: Mean nearest-neighbour distance in both directions, divided by the diagonal.
+    '''
+    if len(reference) == 0 or len(candidate) == 0:
+        return float("inf")
+    forward, _ = cKDTree(candidate).query(reference)
+    backward, _ = cKDTree(reference).query(candidate)
+    diagonal = np.linalg.norm(reference.max(axis=0) - reference.min(axis=0))
+    return float((forward.mean() + backward.mean()) / 2 / max(diagonal, 1e-8))
+
+
+def main():
+    '''
+    Generate every prompt/seed pair with the fp32 and the int8 base model and report the differences.
+
+    Both models sample and decode in fp32, whatever the configured precision
+    policy, so the differences measure the int8 quantization error alone.
+
+    Exits with status 1 if the mean latent error or mean chamfer distance
+    exceeds its threshold, so the check can gate enabling `quantize_int8`.
+    '''
+    args = parse_args()
+    fp32 = initialize_pipeline(use_cuda=False, use_compile=False, quantize_int8=False)
+    int8 = initialize_pipeline(use_cuda=False, use_compile=False, quantize_int8=True)
+    if not int8["quantized"]:
+        print("The base model could not be quantized, nothing to compare")
+        sys.exit(1)
+
+    samples = []
+    for prompt in args.prompts:
+        for seed in args.seeds:
+            latents = [generate_latents(prompt=prompt, model=pipeline["text_encoder_model"],
+                                        diffusion=pipeline["diffusion_process"],
+                                        batch_size=1, progress=False, seed=seed,
+                                        use_fp16=False, precision="fp32", text_precision="fp32")
+                       for pipeline in (fp32, int8)]
+            meshes = [decode_latents(model=fp32["transmitter"], latents=latent, precision="fp32")[0]
+                      for latent in latents]
+
+            sample = {"prompt": prompt, "seed": seed, **latent_errors(latents[0], latents[1]),
+                      "chamfer": chamfer_distance(np.asarray(meshes[0].verts),
+                                                  np.asarray(meshes[1].verts))}
+            samples.append(sample)
+            logger.info(f"Quantization check : {sample}")
+            print(f"{prompt[:30]:<30} seed {seed:<4} rel L2 {sample['latent_rel_l2']:.4f}  "
+                  f"cosine {sample['latent_cosine']:.4f}  chamfer {sample['chamfer']:.4f}")
+
+    mean_error = float(np.mean([sample["latent_rel_l2"] for sample in samples]))
+    mean_chamfer = float(np.mean([sample["chamfer"] for sample in samples]))
+    passed = mean_error <= args.max_latent_error and mean_chamfer <= args.max_chamfer
+    print(f"\nMean latent rel L2 : {mean_error:.4f} (max {args.max_latent_error})")
+    print(f"Mean chamfer : {mean_chamfer:.4f} (max {args.max_chamfer})")
+    print("PASSED" if passed else "FAILED")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"samples": samples, "mean_latent_rel_l2": mean_error,
+                       "mean_chamfer": mean_chamfer, "passed": passed}, f, indent=2)
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ cfg = load_config()
 #General
 PROJECT_NAME = cfg["general"]["project_name"]
 MODEL_NAME = cfg["general"]["model"]
+SEED = cfg["general"]["seed"]
 
 #General : models
 BASE_MODEL = cfg["general"]["base_model"]
@@ -28,6 +29,7 @@ TRANSMITTER = cfg["general"]["transmitter"]
 #Device
 USE_CUDA = cfg["device"]["use_cuda"]
 FALLBACK_TO_CPU = cfg["device"]["fallback_to_cpu"]
+QUANTIZE_INT8 = cfg["device"]["quantize_int8"]
 
 #diffusion
 DIFFUSION_CONFIG = cfg["diffusion"]["config_type"]
@@ -38,12 +40,80 @@ GUIDANCE_SCALE = cfg["latents"]["guidance_scale"]
 USE_FP16 = cfg["latents"]["use_fp16"]
 USE_KARRAS = cfg["latents"]["use_karras"]
 KARRAS_STEPS = cfg["latents"]["karras_steps"]
+SAMPLER = cfg["latents"]["sampler"]
+SAMPLERS = ["heun", "dpmpp_2m", "dpm", "ancestral"]
+GUIDANCE_INTERVAL = cfg["latents"]["guidance_interval"]
+UNCOND_REUSE_STEPS = int(cfg["latents"]["uncond_reuse_steps"])
 CLIP_DENOISED = cfg["latents"]["clip_denoised"]
 PROGRESS = cfg["latents"]["progress"]
 SIGMA_MIN = float(cfg["latents"]["sigma_min"])
 SIGMA_MAX = float(cfg["latents"]["sigma_max"])
 S_CHURN = float(cfg["latents"]["s_churn"])
 
+#decode
+DECODE_GRID_SIZE = cfg["decode"]["grid_size"]
+DECODE_COARSE_GRID_SIZE = cfg["decode"]["coarse_grid_size"]
+DECODER_ONLY = cfg["decode"]["decoder_only"]
+
+#precision
+PRECISIONS = ["fp32", "bf16", "fp16"]
+PRECISION_TEXT_ENCODER = cfg["precision"]["text_encoder"]
+PRECISION_DENOISER = cfg["precision"]["denoiser"]
+PRECISION_DECODER = cfg["precision"]["decoder"]
+
+#compile
+COMPILE_ENABLED = cfg["compile"]["enabled"]
+COMPILE_MODE = cfg["compile"]["mode"]
+COMPILE_CACHE_DIR = cfg["compile"]["cache_dir"]
+COMPILE_WARMUP_BATCH_SIZES = [int(size) for size in cfg["compile"]["warmup_batch_sizes"]]
+
+#presets
+PRESETS = cfg["presets"]
+PRESET_KEYS = ["sampler", "karras_steps", "grid_size", "coarse_grid_size", "formats",
+               "guidance_interval", "uncond_reuse_steps"]
+
+def get_preset(name):
+    """
+    Return the generation options bundled by a quality preset.
+
+    Args:
+        name (str): Preset name from the "presets" config section.
+
+    Returns:
+        dict: Option name to value, without the informational latency_s / measured_on entries.
+
+    Raises:
+        ValueError: If the preset does not exist.
+    """
+    if name not in PRESETS:
+        raise ValueError(f"Unknown preset '{name}', expected one of {list(PRESETS)}")
+    return {key: value for key, value in PRESETS[name].items() if key in PRESET_KEYS}
+
+def preset_latency(name):
+    """
+    Return the measured latency of a quality preset, if it has been benchmarked.
+
+    Args:
+        name (str): Preset name from the "presets" config section.
+
+    Returns:
+        dict: latency_s and measured_on, or an empty dict when either is unset.
+    """
+    latency = PRESETS[name].get("latency_s")
+    hardware = PRESETS[name].get("measured_on")
+    if latency is None or not hardware:
+        return {}
+    return {"latency_s": latency, "measured_on": hardware}
+
+#cache
+CACHE_ENABLED = cfg["cache"]["enabled"]
+CACHE_DIR = cfg["cache"]["dir"]
+CACHE_MAX_SIZE_MB = float(cfg["cache"]["max_size_mb"])
+CACHE_MAX_ENTRIES = int(cfg["cache"]["max_entries"])
+TEXT_EMBEDDING_CACHE_ENTRIES = int(cfg["cache"]["text_embedding_entries"])
+TEXT_EMBEDDING_CACHE_PATH = cfg["cache"]["text_embedding_path"]
+TEXT_EMBEDDING_SAVE_INTERVAL_S = float(cfg["cache"]["text_embedding_save_interval_s"])
+
 #files
 OUTPUT_DIR = cfg["files"]["output_dir"]
 DEFAULT_FORMATS = cfg["files"]["default_format"]
@@ -51,6 +121,17 @@ BASE_FILE = cfg["files"]['base_file']
 
 BATCH_SIZE = LATENT_BATCH_SIZE
 
+#api
+API_OUTPUT_DIR = cfg["api"]["output_dir"]
+JOB_STORE = cfg["api"]["job_store"]
+JOB_DB_PATH = cfg["api"]["job_db_path"]
+JOB_TTL_SECONDS = int(cfg["api"]["job_ttl_seconds"])
+INFERENCE_WORKERS = int(cfg["api"]["inference_workers"])
+MAX_QUEUE_DEPTH = int(cfg["api"]["max_queue_depth"])
+RETRY_AFTER_SECONDS = int(cfg["api"]["retry_after_seconds"])
+BATCH_WINDOW_MS = float(cfg["api"]["batch_window_ms"])
+MAX_BATCH_JOBS = int(cfg["api"]["max_batch_jobs"])
+
 #render
 RENDER_INSTANCE = cfg["render"]["render"]
 RENDER_MODE = cfg["render"]["render_mode"]
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import os
 
 import torch
@@ -15,7 +15,15 @@ from ..config.config import (
     SIGMA_MIN,
     SIGMA_MAX,
     S_CHURN,
+    SEED,
+    SAMPLER,
+    SAMPLERS,
+    GUIDANCE_INTERVAL,
+    UNCOND_REUSE_STEPS,
+    PRECISION_DENOISER,
+    PRECISION_TEXT_ENCODER,
 )
+from .model_loader import get_autocast_dtype
 from .shap_e.diffusion.sample import sample_latents
 
 logger = get_logger(__name__, log_file='app.log')
@@ -50,6 +58,100 @@ def validate_inputs(prompt : str, model : Any ,
         raise ValueError("Diffusion must be provided and not none")
 
 
+def validate_sampler(sampler : str)->None:
+    '''
+    Check that `sampler` names a supported Karras sampler.
+
+    Raises:
+        ValueError: If the sampler is unknown.
+    '''
+    if sampler not in SAMPLERS:
+        logger.error(f"Unknown sampler : {sampler}")
+        raise ValueError(f"Unknown sampler '{sampler}', expected one of {SAMPLERS}")
+
+
+def validate_guidance_schedule(guidance_interval : Optional[Sequence[float]],
+                               uncond_reuse_steps : int)->Optional[Tuple[float, float]]:
+    '''
+    Check the classifier-free guidance schedule options.
+
+    Args:
+        guidance_interval (Sequence[float], optional): [sigma_low, sigma_high] range with guidance.
+        uncond_reuse_steps (int): Steps sharing one unconditional prediction.
+
+    Returns:
+        Optional[Tuple[float, float]]: The interval as a float pair, or None.
+
+    Raises:
+        ValueError: If the interval is malformed or `uncond_reuse_steps` is below 1.
+    '''
+    if uncond_reuse_steps < 1:
+        logger.error(f"Invalid uncond_reuse_steps : {uncond_reuse_steps}")
+        raise ValueError("uncond_reuse_steps must be at least 1")
+    if guidance_interval is None:
+        return None
+    if len(guidance_interval) != 2 or guidance_interval[0] > guidance_interval[1]:
+        logger.error(f"Invalid guidance interval : {guidance_interval}")
+        raise ValueError("guidance_interval must be [sigma_low, sigma_high] with sigma_low <= sigma_high")
+    return (float(guidance_interval[0]), float(guidance_interval[1]))
+
+
+def resolve_precision(model : Any, use_fp16 : bool, precision : Optional[str],
+                      text_precision : Optional[str])->Dict[str, Any]:
+    '''
+    Turn the precision policy into `sample_latents` autocast arguments.
+
+    Args:
+        model (Any): Text-to-latent model instance.
+        use_fp16 (bool): Legacy switch, used when `precision` is None.
+        precision (str, optional): Denoiser precision, "fp32", "bf16" or "fp16".
+        text_precision (str, optional): Text encoder precision.
+
+    Returns:
+        Dict[str, Any]: `use_fp16`, `autocast_dtype` and `text_autocast_dtype` arguments.
+
+    Raises:
+        ValueError: If a precision name is unknown.
+    '''
+    autocast_dtype = get_autocast_dtype(precision)
+    if precision is not None:
+        use_fp16 = autocast_dtype is not None
+    # Dynamically quantized int8 linears expect float32 activations.
+    if getattr(model, "quantized_int8", False):
+        use_fp16 = False
+    return {"use_fp16": use_fp16, "autocast_dtype": autocast_dtype,
+            "text_autocast_dtype": get_autocast_dtype(text_precision)}
+
+
+def make_generators(batch_size : int, seed : Optional[int] = None,
+                    seeds : Optional[Sequence[int]] = None)->Optional[List[torch.Generator]]:
+    '''
+    Build one seeded CPU generator per sample.
+
+    Sample `i` is seeded with `seeds[i]` or, failing that, `seed + i`, so any
+    single sample of a batch can be regenerated on its own.
+
+    Args:
+        batch_size (int): Number of samples.
+        seed (int, optional): Base seed for the batch.
+        seeds (Sequence[int], optional): Explicit per-sample seeds, overriding `seed`.
+
+    Returns:
+        Optional[List[torch.Generator]]: Generators, or None for unseeded sampling.
+
+    Raises:
+        ValueError: If `seeds` does not have one seed per sample.
+    '''
+    if seeds is None:
+        if seed is None:
+            return None
+        seeds = [seed + i for i in range(batch_size)]
+    if len(seeds) != batch_size:
+        logger.error(f"Got {len(seeds)} seeds for a batch of {batch_size}")
+        raise ValueError("seeds must contain exactly one seed per sample")
+    return [torch.Generator().manual_seed(int(s)) for s in seeds]
+
+
 def generate_latents( prompt : str, model : Any, 
 diffusion : Any,
 batch_size : int = LATENT_BATCH_SIZE,
@@ -61,13 +163,21 @@ use_karras : bool = USE_KARRAS,
 karras_steps : int = KARRAS_STEPS,
 sigma_max : float = SIGMA_MAX,
 sigma_min : float = SIGMA_MIN,
-s_churn : float = S_CHURN)-> Any:
+s_churn : float = S_CHURN,
+seed : Optional[int] = SEED,
+seeds : Optional[Sequence[int]] = None,
+sampler : str = SAMPLER,
+guidance_interval : Optional[Sequence[float]] = GUIDANCE_INTERVAL,
+uncond_reuse_steps : int = UNCOND_REUSE_STEPS,
+precision : Optional[str] = PRECISION_DENOISER,
+text_precision : Optional[str] = PRECISION_TEXT_ENCODER)-> Any:
     
     '''
     Generate latents from a text prompt using the given model and diffusion process.
 
     Runs the configured sampling procedure to produce latent representations 
-    for downstream decoding.
+    for downstream decoding. Sampling runs under `torch.inference_mode()`, so
+    the checkpointed transformer layers are called directly without autograd.
 
     Args:
         prompt (str): Text description for generation.
@@ -77,12 +187,23 @@ s_churn : float = S_CHURN)-> Any:
         guidance_scale (float): Classifier-free guidance strength.
         progress (bool): Display progress bar during sampling.
         clip_denoised (bool): Clip denoised samples to valid range.
-        use_fp16 (bool): Enable half-precision computation.
+        use_fp16 (bool): Enable half-precision computation when `precision` is None.
+            Ignored for int8-quantized models, whose quantized linear layers expect
+            float32 activations.
         use_karras (bool): Use Karras noise schedule.
         karras_steps (int): Steps for Karras sampling.
         sigma_max (float): Maximum noise level.
         sigma_min (float): Minimum noise level.
         s_churn (float): Churn parameter for noise schedule.
+        seed (int, optional): Base sampling seed, None for unseeded sampling.
+        seeds (Sequence[int], optional): Per-sample seeds, overriding `seed`.
+        sampler (str): Karras sampler ("heun", "dpmpp_2m", "dpm" or "ancestral").
+        guidance_interval (Sequence[float], optional): [sigma_low, sigma_high] range in which
+            classifier-free guidance is applied, None for every step.
+        uncond_reuse_steps (int): Steps sharing one unconditional prediction.
+        precision (str, optional): Denoiser precision ("fp32", "bf16" or "fp16"),
+            None to follow `use_fp16`.
+        text_precision (str, optional): Text encoder precision.
 
     Returns:
         Any: Generated latent representations.
@@ -92,24 +213,32 @@ s_churn : float = S_CHURN)-> Any:
     '''
     
     validate_inputs(prompt, model, diffusion)
+    validate_sampler(sampler)
+    guidance_interval = validate_guidance_schedule(guidance_interval, uncond_reuse_steps)
+    generators = make_generators(batch_size, seed, seeds)
     logger.info(f"Inputs Verified, Starting latent generation from prompt : '{prompt}'")
     
     try:
-        latents_outputs = sample_latents(
-        batch_size=batch_size,
-        model=model,
-        diffusion=diffusion,
-        guidance_scale=guidance_scale,
-        model_kwargs=dict(texts=[prompt] * batch_size),
-        progress=progress,
-        clip_denoised=clip_denoised,
-        use_fp16=use_fp16,
-        use_karras=use_karras,
-        karras_steps=karras_steps,
-        sigma_min=sigma_min,
-        sigma_max=sigma_max,
-        s_churn=s_churn,
-        )
+        with torch.inference_mode():
+            latents_outputs = sample_latents(
+            batch_size=batch_size,
+            model=model,
+            diffusion=diffusion,
+            guidance_scale=guidance_scale,
+            model_kwargs=dict(texts=[prompt] * batch_size),
+            progress=progress,
+            clip_denoised=clip_denoised,
+            **resolve_precision(model, use_fp16, precision, text_precision),
+            use_karras=use_karras,
+            karras_steps=karras_steps,
+            sigma_min=sigma_min,
+            sigma_max=sigma_max,
+            s_churn=s_churn,
+            generators=generators,
+            sampler=sampler,
+            guidance_interval=guidance_interval,
+            uncond_reuse_steps=uncond_reuse_steps,
+            )
         logger.info(f"LATENTS LOADED SUCCESFULLY FOR PROMPT : '{prompt}'")
         
         return latents_outputs
@@ -132,7 +261,13 @@ def get_or_generate_latents(prompt: str,
                             sigma_max : float = SIGMA_MAX,
                             sigma_min : float = SIGMA_MIN,
                             s_churn : float = S_CHURN,
-                            resume:bool = False)->Any:
+                            resume:bool = False,
+                            seed : Optional[int] = SEED,
+                            seeds : Optional[Sequence[int]] = None,
+                            sampler : str = SAMPLER,
+                            guidance_interval : Optional[Sequence[float]] = GUIDANCE_INTERVAL,
+                            uncond_reuse_steps : int = UNCOND_REUSE_STEPS,
+                            latents_dir : Optional[str] = None)->Any:
     
     '''
     Load cached latents if available, otherwise generate and save new ones.
@@ -157,12 +292,18 @@ def get_or_generate_latents(prompt: str,
         sigma_min (float): Minimum noise level.
         s_churn (float): Churn parameter for noise schedule.
         resume (bool): Whether to resume from existing cached latents.
+        seed (int, optional): Base sampling seed, None for unseeded sampling.
+        seeds (Sequence[int], optional): Per-sample seeds, overriding `seed`.
+        sampler (str): Karras sampler ("heun", "dpmpp_2m", "dpm" or "ancestral").
+        guidance_interval (Sequence[float], optional): [sigma_low, sigma_high] range with guidance.
+        uncond_reuse_steps (int): Steps sharing one unconditional prediction.
+        latents_dir (str, optional): Directory for cached latents, `{output_dir}/latents` by default.
 
     Returns:
         Any: Generated or loaded latent representations.
     '''
     
-    latents_dir = os.path.join(output_dir, "latents")
+    latents_dir = latents_dir or os.path.join(output_dir, "latents")
     os.makedirs(latents_dir, exist_ok=True)
     latents_path = os.path.join(latents_dir, f"{base_file}_latents.pt")
                             
@@ -182,13 +323,143 @@ def get_or_generate_latents(prompt: str,
                                karras_steps=karras_steps,
                                sigma_max=sigma_max,
                                sigma_min=sigma_min,
-                               s_churn=s_churn)
+                               s_churn=s_churn,
+                               seed=seed,
+                               seeds=seeds,
+                               sampler=sampler,
+                               guidance_interval=guidance_interval,
+                               uncond_reuse_steps=uncond_reuse_steps)
+
+    save_latents(latents, latents_path)
+
+    return latents
 
+
+def save_latents(latents : Any, latents_path : str)->None:
+    '''
+    Save latents to disk so later runs can resume from them.
+
+    Failures are logged and ignored, since the latents are only a cache.
+
+    Args:
+        latents (Any): Latent representations to save.
+        latents_path (str): Destination `.pt` file.
+    '''
     try:
+        os.makedirs(os.path.dirname(latents_path), exist_ok=True)
         torch.save(latents, latents_path)
         logger.info(f"Latents saved successfully at {latents_path}")
     except Exception as e:
         logger.warning(f"Failed to save latents to disk {e}")
 
-    return latents
+
+def generate_latents_batch(prompts : Sequence[str], model : Any,
+diffusion : Any,
+batch_sizes : Sequence[int],
+guidance_scales : Sequence[float],
+progress : bool = PROGRESS,
+clip_denoised : bool = CLIP_DENOISED,
+use_fp16 : bool = USE_FP16,
+use_karras : bool = USE_KARRAS,
+karras_steps : int = KARRAS_STEPS,
+sigma_max : float = SIGMA_MAX,
+sigma_min : float = SIGMA_MIN,
+s_churn : float = S_CHURN,
+seeds : Optional[Sequence[Union[None, int, Sequence[int]]]] = None,
+sampler : str = SAMPLER,
+guidance_interval : Optional[Sequence[float]] = GUIDANCE_INTERVAL,
+uncond_reuse_steps : int = UNCOND_REUSE_STEPS,
+precision : Optional[str] = PRECISION_DENOISER,
+text_precision : Optional[str] = PRECISION_TEXT_ENCODER)-> List[Any]:
+    
+    '''
+    Generate latents for several prompts in a single sampling call.
+
+    All prompts share one diffusion loop, each with its own batch size and
+    guidance scale, and the resulting latents are split back per prompt.
+
+    Args:
+        prompts (Sequence[str]): Text descriptions, one per request.
+        model (Any): Text-to-latent model instance.
+        diffusion (Any): Diffusion process instance.
+        batch_sizes (Sequence[int]): Number of latents to generate per prompt.
+        guidance_scales (Sequence[float]): Classifier-free guidance strength per prompt.
+        progress (bool): Display progress bar during sampling.
+        clip_denoised (bool): Clip denoised samples to valid range.
+        use_fp16 (bool): Enable half-precision computation.
+        use_karras (bool): Use Karras noise schedule.
+        karras_steps (int): Steps for Karras sampling.
+        sigma_max (float): Maximum noise level.
+        sigma_min (float): Minimum noise level.
+        s_churn (float): Churn parameter for noise schedule.
+        seeds (Sequence, optional): Per prompt, a base seed, a list of per-sample seeds
+            or None. Seeded prompts get the same noise as an unbatched run with that seed.
+        sampler (str): Karras sampler ("heun", "dpmpp_2m", "dpm" or "ancestral").
+        guidance_interval (Sequence[float], optional): [sigma_low, sigma_high] range with guidance.
+        uncond_reuse_steps (int): Steps sharing one unconditional prediction.
+        precision (str, optional): Denoiser precision, None to follow `use_fp16`.
+        text_precision (str, optional): Text encoder precision.
+
+    Returns:
+        List[Any]: Generated latents for each prompt, in input order.
+
+    Raises:
+        ValueError: If the per-prompt argument lengths do not match.
+    '''
+    if not (len(prompts) == len(batch_sizes) == len(guidance_scales)):
+        logger.error("Mismatched prompts, batch sizes and guidance scales")
+        raise ValueError("prompts, batch_sizes and guidance_scales must have the same length")
+    for prompt in prompts:
+        validate_inputs(prompt, model, diffusion)
+    validate_sampler(sampler)
+    guidance_interval = validate_guidance_schedule(guidance_interval, uncond_reuse_steps)
+
+    generators = None
+    if seeds is not None and any(seed is not None for seed in seeds):
+        if len(seeds) != len(prompts):
+            logger.error("Mismatched prompts and seeds")
+            raise ValueError("seeds must have one entry per prompt")
+        generators = []
+        for seed, size in zip(seeds, batch_sizes):
+            if isinstance(seed, (list, tuple)):
+                prompt_generators = make_generators(size, seeds=seed)
+            else:
+                prompt_generators = make_generators(size, seed)
+            if prompt_generators is None:
+                # Unseeded prompts get randomly seeded generators so every row has one.
+                prompt_generators = [torch.Generator() for _ in range(size)]
+                for generator in prompt_generators:
+                    generator.seed()
+            generators.extend(prompt_generators)
+
+    texts = [prompt for prompt, size in zip(prompts, batch_sizes) for _ in range(size)]
+    row_scales = [scale for scale, size in zip(guidance_scales, batch_sizes) for _ in range(size)]
+    logger.info(f"Starting batched latent generation for {len(prompts)} prompts ({len(texts)} samples)")
+
+    try:
+        with torch.inference_mode():
+            latents_outputs = sample_latents(
+            batch_size=len(texts),
+            model=model,
+            diffusion=diffusion,
+            guidance_scale=row_scales,
+            model_kwargs=dict(texts=texts),
+            progress=progress,
+            clip_denoised=clip_denoised,
+            **resolve_precision(model, use_fp16, precision, text_precision),
+            use_karras=use_karras,
+            karras_steps=karras_steps,
+            sigma_min=sigma_min,
+            sigma_max=sigma_max,
+            s_churn=s_churn,
+            generators=generators,
+            sampler=sampler,
+            guidance_interval=guidance_interval,
+            uncond_reuse_steps=uncond_reuse_steps,
+            )
+    except Exception as e:
+        logger.exception(f"ERROR IN GENERATING BATCHED LATENTS : {e}")
+        raise
+
+    return list(torch.split(latents_outputs, list(batch_sizes), dim=0))
 
@@ -1,12 +1,12 @@
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 import os
-import numpy as np
-import trimesh
 
 import torch
-from ..config.config import OUTPUT_DIR, DEFAULT_FORMATS
+from ..config.config import (OUTPUT_DIR, DEFAULT_FORMATS, DECODE_COARSE_GRID_SIZE, DECODE_GRID_SIZE,
+                             PRECISION_DECODER)
 from ..loggers.logger import get_logger
-from .shap_e.util.notebooks import decode_latent_mesh
+from .model_loader import get_autocast_dtype
+from .shap_e.util.notebooks import decode_latent_mesh, decode_latent_meshes
 
 logger = get_logger(__name__ , log_file="app.log")
 
@@ -76,6 +76,9 @@ def convert_to_glb(mesh : Any, output_path :str) ->str:
    '''
    Convert a mesh object to GLB format and save it.
 
+   Writes the mesh buffers (positions, vertex colors when present, and
+   indices) straight into a binary glTF file without any mesh processing.
+
     Args:
         mesh: Mesh object with 'verts' and 'faces' attributes.
         output_path: Destination file path for the GLB.
@@ -92,26 +95,15 @@ def convert_to_glb(mesh : Any, output_path :str) ->str:
       logger.error("No mesh provided for GLB export.")
       raise ValueError("Mesh is None, can't export to GLB")
    
-   try :
-      vertices = np.array(mesh.verts, dtype=np.float32)
-      faces = np.array(mesh.faces, dtype=np.int32)
-      
-      if vertices.size == 0 or faces.size == 0 :
-         logger.error ("Mesh has no vertices or faces cannot export")
-         raise ValueError("Empty mesh, cannot export to glb")
-      
-   except Exception as e:
-      logger.error(f"Failed to extract vertices/ faces : {e}")
-      raise
-   
-   try:
-      tri_mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=True)
-   except Exception as e:
-      logger.error(f"Failed to create Trimesh object : {e}")
-      raise RuntimeError("Trimesh conversion failed") from e
+   verts = getattr(mesh, 'verts', None)
+   faces = getattr(mesh, 'faces', None)
+   if verts is None or faces is None or len(verts) == 0 or len(faces) == 0:
+      logger.error ("Mesh has no vertices or faces cannot export")
+      raise ValueError("Empty mesh, cannot export to glb")
    
    try: 
-      tri_mesh.export(output_path, file_type="glb")
+      with open(output_path, 'wb') as f:
+         mesh.write_glb(f)
       logger.info(f"Mesh successfully exported to GLB : {output_path}")
       return output_path
    except Exception as e:
@@ -119,13 +111,27 @@ def convert_to_glb(mesh : Any, output_path :str) ->str:
       raise RuntimeError(f"GLB export failed : {e}")
    
 
-def decode_latents(model : Any, latents: Any)->List[Any]:
+@torch.inference_mode()
+def decode_latents(model : Any, latents: Any, batched : bool = True,
+                   coarse_grid_size : Optional[int] = DECODE_COARSE_GRID_SIZE,
+                   grid_size : Optional[int] = DECODE_GRID_SIZE,
+                   precision : str = PRECISION_DECODER)->List[Any]:
     '''
     Decode latent representations into mesh objects.
 
+    When `batched` is True, all latents are projected and queried together in a
+    single pass. If the batched pass fails, each latent is decoded on its own so
+    one bad sample does not take down the rest of the job. Decoding runs under
+    `torch.inference_mode()`, so the checkpointed SDF/texture MLPs skip autograd.
+
     Args:
         model: Model instance used for decoding.
         latents: Sequence of latent tensors to decode.
+        batched (bool): Decode all latents in one meta-batch.
+        coarse_grid_size (Optional[int]): Coarse SDF grid for coarse-to-fine extraction, None for dense.
+        grid_size (Optional[int]): SDF sampling resolution, None for the renderer default (128).
+        precision (str): Autocast precision of the SDF/texture MLPs, "fp32", "bf16" or "fp16".
+            Marching cubes always runs on an fp32 field.
 
     Returns:
         List[Any]: List of decoded mesh objects.
@@ -133,8 +139,6 @@ def decode_latents(model : Any, latents: Any)->List[Any]:
     Raises:
         RuntimeError: If all latents fail to decode.
     '''
-
-    output_meshes = []
    
     try:
         validate_latents_inputs(model, latents)
@@ -143,18 +147,39 @@ def decode_latents(model : Any, latents: Any)->List[Any]:
        logger.error(f"Inputs for decoding could not be verified : {e}")
        raise
 
-    
+    autocast_dtype = get_autocast_dtype(precision)
+    device_type = next(model.parameters()).device.type
+    with torch.autocast(device_type, dtype=autocast_dtype, enabled=autocast_dtype is not None):
+       return _decode_latents(model, latents, batched, coarse_grid_size, grid_size)
+
+
+def _decode_latents(model : Any, latents : Any, batched : bool,
+                    coarse_grid_size : Optional[int], grid_size : Optional[int])->List[Any]:
+    output_meshes = []
+
+    if batched and len(latents) > 1:
+      try:
+           output_meshes = [mesh.tri_mesh() for mesh in decode_latent_meshes(model, latents,
+                                                                          coarse_grid_size=coarse_grid_size,
+                                                                          grid_size=grid_size)]
+           logger.info(f"Decoded {len(output_meshes)} latents in a single batch")
+           return output_meshes
+      except Exception as e:
+        logger.warning(f"Batched decoding failed ({e}), decoding latents one at a time..")
+        output_meshes = []
+
     for i, latent in enumerate(latents):
       try: 
-           mesh = decode_latent_mesh(model, latent).tri_mesh()
+           mesh = decode_latent_mesh(model, latent, coarse_grid_size=coarse_grid_size,
+                                     grid_size=grid_size).tri_mesh()
            output_meshes.append(mesh)
       except Exception as e:
         logger.error(f"Failed to decode latent {i}: {e}", exc_info=True)
 
-      if not output_meshes:
-        raise RuntimeError("All latents failed to decode into meshes")
+    if not output_meshes:
+      raise RuntimeError("All latents failed to decode into meshes")
       
-      logger.info("Latents decoded successfully into meshes..")
+    logger.info("Latents decoded successfully into meshes..")
 
     return output_meshes
 
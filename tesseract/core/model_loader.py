@@ -1,10 +1,17 @@
-from typing import List, Any 
+from typing import List, Any, Optional
+import os
+import atexit
 import torch
 
-from ..config.config import USE_CUDA, FALLBACK_TO_CPU, BASE_MODEL, TRANSMITTER, DIFFUSION_CONFIG
+from ..config.config import (USE_CUDA, FALLBACK_TO_CPU, BASE_MODEL, TRANSMITTER, DIFFUSION_CONFIG,
+                             TEXT_EMBEDDING_CACHE_ENTRIES, TEXT_EMBEDDING_CACHE_PATH,
+                             TEXT_EMBEDDING_SAVE_INTERVAL_S,
+                             COMPILE_MODE, COMPILE_CACHE_DIR, QUANTIZE_INT8, PRECISIONS,
+                             DECODER_ONLY)
 from ..loggers.logger import get_logger
-from .shap_e.models.download import load_model, load_config
+from .shap_e.models.download import load_model, load_decoder, load_config
 from .shap_e.diffusion.gaussian_diffusion import diffusion_from_config
+from .shap_e.models.generation.pretrained_clip import TextEmbeddingCache
 
 logger = get_logger(__name__ , log_file= "app.log")
 
@@ -40,8 +47,102 @@ fallback_to_cpu : bool=  FALLBACK_TO_CPU)->torch.device :
           raise RuntimeError("CUDA is not available and CPU is disabled in configs")
      
 
+def get_autocast_dtype(precision : Optional[str])->Optional[torch.dtype]:
+     '''
+     Map a precision name to the dtype autocast should run reduced-precision ops in.
+
+    Args:
+        precision (str, optional): "fp32", "bf16" or "fp16".
+
+    Returns:
+        Optional[torch.dtype]: torch.bfloat16 or torch.float16, None for fp32 or an unset precision.
+
+    Raises:
+        ValueError: If the precision name is unknown.
+     '''
+     if precision is None or precision == "fp32":
+          return None
+     if precision == "bf16":
+          return torch.bfloat16
+     if precision == "fp16":
+          return torch.float16
+     logger.error(f"Unknown precision : {precision}")
+     raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+
+def attach_text_embedding_cache(model : Any,
+                                max_entries : int = TEXT_EMBEDDING_CACHE_ENTRIES,
+                                path : str = TEXT_EMBEDDING_CACHE_PATH,
+                                save_interval : float = TEXT_EMBEDDING_SAVE_INTERVAL_S)->None:
+     '''
+     Put an LRU cache of CLIP text embeddings in front of a text-conditioned model's CLIP encoder.
+
+    Models without a CLIP text encoder are left untouched. New embeddings are
+    persisted in the background every `save_interval` seconds and at exit,
+    never on the request path.
+
+    Args:
+        model (Any): Text-to-latent model instance.
+        max_entries (int): Embeddings kept in memory, 0 to disable the cache.
+        path (str): File to persist embeddings to, or None for memory only.
+        save_interval (float): Seconds between background saves, 0 to save at exit only.
+     '''
+     clip = getattr(model, "clip", None)
+     if max_entries <= 0 or clip is None or not hasattr(clip, "text_cache"):
+          return
+     clip.text_cache = TextEmbeddingCache(max_entries=max_entries, path=path)
+     clip.text_cache.start_autosave(save_interval)
+     atexit.register(clip.text_cache.close)
+     logger.info(f"Text embedding cache enabled ({len(clip.text_cache)} entries loaded)")
+
+
+def compile_models(text_encoder_model : Any, transmitter_model : Any,
+                   mode : str = COMPILE_MODE, cache_dir : str = COMPILE_CACHE_DIR)->bool:
+     '''
+     Compile the per-step hot paths of both models with torch.compile (inductor).
+
+    The diffusion transformer's conditioned forward and every MLP query path in
+    the transmitter are replaced by compiled versions on the instances, so state
+    dicts and checkpoints are unaffected. Compiled artifacts are persisted in
+    `cache_dir` and reused across restarts. Compilation happens lazily on the
+    first call for each input shape, see `warm_up_pipeline`.
+
+    Args:
+        text_encoder_model (Any): Text-to-latent model instance.
+        transmitter_model (Any): Latent decoder model instance.
+        mode (str): torch.compile mode.
+        cache_dir (str): Directory for the inductor cache.
+
+    Returns:
+        bool: True if the models were compiled, False if torch.compile is unavailable.
+     '''
+     if not hasattr(torch, "compile"):
+          logger.warning("torch.compile is unavailable in this torch version, running eagerly")
+          return False
+
+     os.makedirs(cache_dir, exist_ok=True)
+     os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.abspath(cache_dir))
+     os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+
+     if hasattr(text_encoder_model, "_forward_with_cond"):
+          text_encoder_model._forward_with_cond = torch.compile(
+               text_encoder_model._forward_with_cond, mode=mode)
+
+     n_mlps = 0
+     for module in transmitter_model.modules():
+          # MLPModel and its SDF / texture / NeRSTF subclasses
+          if hasattr(module, "_run_mlp"):
+               module._run_mlp = torch.compile(module._run_mlp, mode=mode)
+               n_mlps += 1
+
+     logger.info(f"Compiled the diffusion transformer and {n_mlps} transmitter MLPs "
+                 f"(mode '{mode}', cache at {cache_dir})")
+     return True
+
+
 def load_all_models(device : torch.device, base_model :str = BASE_MODEL, transmitter: str = TRANSMITTER,
-diffusion_config : str = DIFFUSION_CONFIG)-> List[Any]:
+diffusion_config : str = DIFFUSION_CONFIG, quantize_int8 : bool = QUANTIZE_INT8,
+decoder_only : bool = DECODER_ONLY)-> List[Any]:
      
      '''
      Loads all required models and initializes the diffusion process.
@@ -51,6 +152,8 @@ diffusion_config : str = DIFFUSION_CONFIG)-> List[Any]:
         base_model (str): Name of the base text encoder model.
         transmitter (str): Name of the transmitter model.
         diffusion_config (str): Path to diffusion process configuration.
+        quantize_int8 (bool): Quantize the base model's transformer linear layers to int8 (CPU only).
+        decoder_only (bool): Load only the transmitter's latent decoder, skipping its encoder.
 
     Returns:
         List[Any]: [transmitter_model, text_encoder_model, diffusion_process].
@@ -63,11 +166,22 @@ diffusion_config : str = DIFFUSION_CONFIG)-> List[Any]:
           logger.error(f"Invalid device type : {type(device)}")
           raise TypeError("Device must be a torch.device object")
      
-     transmitter_model = load_model(model_name = transmitter, device=device)
-     logger.info(f"Transmitter model '{transmitter}' loaded on {device.type}")
+     if decoder_only:
+          transmitter_model = load_decoder(model_name = transmitter, device=device)
+     else:
+          transmitter_model = load_model(model_name = transmitter, device=device)
+     n_params = sum(p.numel() for p in transmitter_model.parameters())
+     logger.info(f"Transmitter model '{transmitter}' loaded on {device.type}"
+                 f"{' (decoder only)' if decoder_only else ''}, {n_params / 1e6:.1f}M parameters")
 
-     text_encoder_model = load_model(model_name = base_model, device=device )
-     logger.info(f"Base model loaded : {base_model} loaded on {device.type}")
+     # Text-conditioned models only ever embed prompts, so skip CLIP's vision tower.
+     overrides = {"clip_text_only": True} if base_model.startswith("text") else None
+     text_encoder_model = load_model(model_name = base_model, device=device, config_overrides=overrides,
+                                     quantize_int8=quantize_int8)
+     quantized = getattr(text_encoder_model, "quantized_int8", False)
+     logger.info(f"Base model loaded : {base_model} loaded on {device.type}"
+                 f"{' with int8 weights' if quantized else ''}")
+     attach_text_embedding_cache(text_encoder_model)
      
      diffusion_process = diffusion_from_config(load_config(diffusion_config))
      logger.info(f"Diffusion process intitiated...")
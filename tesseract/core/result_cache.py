@@ -0,0 +1,328 @@
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from tesseract.config.config import (BASE_MODEL, TRANSMITTER, USE_KARRAS, CLIP_DENOISED,
+                                     SIGMA_MIN, SIGMA_MAX, S_CHURN, SAMPLER, DEFAULT_FORMATS,
+                                     CACHE_DIR, CACHE_MAX_SIZE_MB, CACHE_MAX_ENTRIES, USE_FP16,
+                                     PRECISION_TEXT_ENCODER, PRECISION_DENOISER, PRECISION_DECODER)
+from tesseract.loggers.logger import get_logger
+
+logger = get_logger(__name__, log_file='app.log')
+
+META_FILE = "meta.json"
+LATENTS_FILE = "latents.pt"
+
+
+def precision_policy(use_fp16 : bool = USE_FP16)->Dict[str, str]:
+    '''
+    Describe the configured per-stage precision for the cache key.
+
+    Args:
+        use_fp16 (bool): Legacy half-precision switch, deciding the denoiser precision when none is configured.
+
+    Returns:
+        Dict[str, str]: Precision of the text encoder, denoiser and decoder.
+    '''
+    denoiser = PRECISION_DENOISER
+    if denoiser is None:
+        denoiser = "autocast" if use_fp16 else "fp32"
+    return {"text_encoder": PRECISION_TEXT_ENCODER, "denoiser": denoiser,
+            "decoder": PRECISION_DECODER}
+
+
+def generation_cache_key(prompt : str, batch_size : int, guidance_scale : float,
+                         karras_steps : int,
+                         formats : List[str] = DEFAULT_FORMATS,
+                         base_model : str = BASE_MODEL,
+                         transmitter : str = TRANSMITTER,
+                         use_karras : bool = USE_KARRAS,
+                         clip_denoised : bool = CLIP_DENOISED,
+                         sigma_min : float = SIGMA_MIN,
+                         sigma_max : float = SIGMA_MAX,
+                         s_churn : float = S_CHURN,
+                         sampler : str = SAMPLER,
+                         seed : Optional[int] = None,
+                         seeds : Optional[List[int]] = None,
+                         grid_size : Optional[int] = None,
+                         coarse_grid_size : Optional[int] = None,
+                         guidance_interval : Optional[List[float]] = None,
+                         uncond_reuse_steps : int = 1,
+                         quantized : bool = False,
+                         precision : Optional[Dict[str, str]] = None)->str:
+    '''
+    Build the content address of a generation request.
+
+    Every parameter that changes the generated meshes is serialized in a
+    canonical form and hashed, so equal requests map to the same entry no
+    matter which file name they are saved under.
+
+    Args:
+        prompt (str): Text description for generation.
+        batch_size (int): Number of latents generated.
+        guidance_scale (float): Classifier-free guidance strength.
+        karras_steps (int): Number of Karras sampling steps.
+        formats (List[str]): Exported mesh formats.
+        base_model (str): Text-to-latent model name.
+        transmitter (str): Latent decoder model name.
+        use_karras (bool): Whether the Karras sampler is used.
+        clip_denoised (bool): Whether denoised samples are clipped.
+        sigma_min (float): Minimum noise level.
+        sigma_max (float): Maximum noise level.
+        s_churn (float): Churn parameter for noise schedule.
+        sampler (str): Karras sampler name.
+        seed (int, optional): Base sampling seed.
+        seeds (List[int], optional): Per-sample seeds, overriding `seed`.
+        grid_size (int, optional): SDF resolution used for mesh extraction.
+        coarse_grid_size (int, optional): Coarse SDF grid used for mesh extraction.
+        guidance_interval (List[float], optional): Noise level range with guidance.
+        uncond_reuse_steps (int): Steps sharing one unconditional prediction.
+        quantized (bool): Whether the base model runs with int8 weights.
+        precision (Dict[str, str], optional): Per-stage precision, see `precision_policy`.
+
+    Returns:
+        str: Hex SHA-256 digest identifying the request.
+    '''
+    payload = {
+        "prompt": prompt.strip(),
+        "batch_size": int(batch_size),
+        "guidance_scale": float(guidance_scale),
+        "karras_steps": int(karras_steps),
+        "formats": sorted(set(formats)),
+        "base_model": base_model,
+        "transmitter": transmitter,
+        "use_karras": bool(use_karras),
+        "clip_denoised": bool(clip_denoised),
+        "sigma_min": float(sigma_min),
+        "sigma_max": float(sigma_max),
+        "s_churn": float(s_churn),
+        "sampler": sampler,
+        "seed": [int(s) for s in seeds] if seeds is not None else
+                (None if seed is None else int(seed)),
+        "grid_size": None if grid_size is None else int(grid_size),
+        "coarse_grid_size": None if coarse_grid_size is None else int(coarse_grid_size),
+        "guidance_interval": (None if guidance_interval is None
+                              else [float(sigma) for sigma in guidance_interval]),
+        "uncond_reuse_steps": int(uncond_reuse_steps),
+        "quantized": bool(quantized),
+        "precision": precision or precision_policy(),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def pipeline_cache_key(pipeline : Optional[Dict[str, Any]], use_fp16 : bool = USE_FP16,
+                       **params : Any)->str:
+    '''
+    Build the cache key of a request served by a resolved pipeline.
+
+    The model names, int8 quantization and precision policy are taken from
+    the pipeline, so every caller keys a request the same way.
+
+    Args:
+        pipeline (Dict[str, Any], optional): Pipeline returned by `initialize_pipeline`,
+            None for the default models.
+        use_fp16 (bool): Legacy half-precision switch, see `precision_policy`.
+        **params: Request parameters, see `generation_cache_key`.
+
+    Returns:
+        str: Hex SHA-256 digest identifying the request.
+    '''
+    models = pipeline or {}
+    return generation_cache_key(base_model=models.get("base_model", BASE_MODEL),
+                                transmitter=models.get("transmitter_name", TRANSMITTER),
+                                quantized=models.get("quantized", False),
+                                precision=precision_policy(use_fp16),
+                                **params)
+
+
+class ResultCache:
+    '''
+    On-disk cache of generation results addressed by `generation_cache_key`.
+
+    Each entry is a directory holding the latents, the exported meshes and
+    a metadata file. Entries are evicted least recently used first once the
+    cache exceeds `max_size_mb` or `max_entries`.
+    '''
+
+    def __init__(self, cache_dir : str = CACHE_DIR,
+                 max_size_mb : float = CACHE_MAX_SIZE_MB,
+                 max_entries : int = CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self)->None:
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            meta_path = os.path.join(self.cache_dir, key, META_FILE)
+            if not os.path.isfile(meta_path):
+                continue
+            try:
+                with open(meta_path, "r") as f:
+                    meta = json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cache entry {key} : {e}")
+                continue
+            entries.append((os.path.getmtime(meta_path), key, int(meta["size_bytes"])))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        logger.info(f"Result cache at {self.cache_dir} holds {len(self._index)} entries "
+                    f"({self._total_bytes / (1024 * 1024):.1f} MB)")
+
+    def contains(self, key : str)->bool:
+        '''Return True if a result for `key` is cached, without counting a hit or miss.'''
+        with self._lock:
+            return key in self._index
+
+    def fetch(self, key : str, output_dir : str, base_file : str,
+              latents_dir : Optional[str] = None)->Optional[Dict[str, Any]]:
+        '''
+        Restore a cached result into `output_dir` under `base_file`.
+
+        Only the index lookup and the metadata read hold the lock; the files
+        are copied after releasing it, so lookups and stores are not blocked.
+
+        Args:
+            key (str): Cache key of the request.
+            output_dir (str): Directory to place the meshes in.
+            base_file (str): Base filename prefix for the restored files.
+            latents_dir (str, optional): Directory to place the latents in, `{output_dir}/latents` by default.
+
+        Returns:
+            Optional[Dict[str, Any]]: Result in the `generate_from_prompt` shape, or None on a miss.
+        '''
+        entry_dir = os.path.join(self.cache_dir, key)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+
+            try:
+                with open(os.path.join(entry_dir, META_FILE), "r") as f:
+                    meta = json.load(f)
+                os.utime(os.path.join(entry_dir, META_FILE))
+            except Exception as e:
+                logger.warning(f"Dropping broken cache entry {key} : {e}")
+                self._remove(key)
+                self.misses += 1
+                return None
+
+        try:
+            latents_dir = latents_dir or os.path.join(output_dir, "latents")
+            os.makedirs(latents_dir, exist_ok=True)
+            latents_path = os.path.join(latents_dir, f"{base_file}_latents.pt")
+            shutil.copyfile(os.path.join(entry_dir, LATENTS_FILE), latents_path)
+
+            saved_files = []
+            for suffix in meta["files"]:
+                output_path = os.path.join(output_dir, f"{base_file}{suffix}")
+                shutil.copyfile(os.path.join(entry_dir, f"mesh{suffix}"), output_path)
+                saved_files.append(output_path)
+        except Exception as e:
+            logger.warning(f"Dropping broken cache entry {key} : {e}")
+            with self._lock:
+                if key in self._index:
+                    self._remove(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        logger.info(f"Result cache hit for prompt : '{meta['prompt']}'")
+        return {
+            "prompt": meta["prompt"],
+            "saved_files": saved_files,
+            "output_dir": output_dir,
+            "mesh_count": meta["mesh_count"],
+            "latents_path": latents_path,
+            "cached": True,
+        }
+
+    def store(self, key : str, result : Dict[str, Any], base_file : str)->None:
+        '''
+        Copy a fresh generation result into the cache.
+
+        Failures are logged and ignored, since a missing entry only costs a regeneration.
+
+        Args:
+            key (str): Cache key of the request.
+            result (Dict[str, Any]): Result returned by `generate_from_prompt`.
+            base_file (str): Base filename prefix the result was saved under.
+        '''
+        entry_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            size = 0
+
+            shutil.copyfile(result["latents_path"], os.path.join(tmp_dir, LATENTS_FILE))
+            size += os.path.getsize(result["latents_path"])
+
+            suffixes = []
+            for path in result["saved_files"]:
+                name = os.path.basename(path)
+                if not name.startswith(base_file):
+                    continue
+                suffix = name[len(base_file):]
+                shutil.copyfile(path, os.path.join(tmp_dir, f"mesh{suffix}"))
+                size += os.path.getsize(path)
+                suffixes.append(suffix)
+
+            meta = {"prompt": result["prompt"], "mesh_count": result["mesh_count"],
+                    "files": suffixes, "size_bytes": size, "created_at": time.time()}
+            with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                json.dump(meta, f)
+
+            with self._lock:
+                if key in self._index:
+                    self._remove(key)
+                os.replace(tmp_dir, entry_dir)
+                self._index[key] = size
+                self._total_bytes += size
+                self._evict()
+            logger.info(f"Cached result for prompt : '{result['prompt']}' ({size} bytes)")
+        except Exception as e:
+            logger.warning(f"Failed to cache result : {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def stats(self)->Dict[str, Any]:
+        '''Return hit/miss counters and the current cache size.'''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._index),
+                "size_bytes": self._total_bytes,
+            }
+
+    def _evict(self)->None:
+        while self._index and (self._total_bytes > self.max_bytes
+                               or (self.max_entries and len(self._index) > self.max_entries)):
+            key = next(iter(self._index))
+            logger.info(f"Evicting cached result {key}")
+            self._remove(key)
+
+    def _remove(self, key : str)->None:
+        self._total_bytes -= self._index.pop(key, 0)
+        shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
@@ -214,6 +214,7 @@ class GaussianDiffusion:
         assert (betas > 0).all() and (betas <= 1).all()
 
         self.num_timesteps = int(betas.shape[0])
+        self.log_betas = np.log(betas)
 
         alphas = 1.0 - betas
         self.alphas_cumprod = np.cumprod(alphas, axis=0)
@@ -223,6 +224,7 @@ class GaussianDiffusion:
 
         # calculations for diffusion q(x_t | x_{t-1}) and others
         self.sqrt_alphas_cumprod = np.sqrt(self.alphas_cumprod)
+        self.one_minus_alphas_cumprod = 1.0 - self.alphas_cumprod
         self.sqrt_one_minus_alphas_cumprod = np.sqrt(1.0 - self.alphas_cumprod)
         self.log_one_minus_alphas_cumprod = np.log(1.0 - self.alphas_cumprod)
         self.sqrt_recip_alphas_cumprod = np.sqrt(1.0 / self.alphas_cumprod)
@@ -242,9 +244,28 @@ class GaussianDiffusion:
         self.posterior_mean_coef2 = (
             (1.0 - self.alphas_cumprod_prev) * np.sqrt(alphas) / (1.0 - self.alphas_cumprod)
         )
+        # for fixedlarge, we set the initial (log-)variance like so
+        # to get a better decoder log likelihood.
+        self.fixed_large_variance = np.append(self.posterior_variance[1], betas[1:])
+        self.fixed_large_log_variance = np.log(self.fixed_large_variance)
+
+        # Schedule arrays converted to tensors, keyed by (name, device).
+        self._schedule_tensors = {}
+
+    def _extract(self, name, t, broadcast_shape):
+        """
+        Like _extract_into_tensor() for the schedule array attribute `name`,
+        which is copied to t's device only once.
+        """
+        key = (name, t.device)
+        arr = self._schedule_tensors.get(key)
+        if arr is None:
+            arr = th.from_numpy(getattr(self, name)).to(device=t.device)
+            self._schedule_tensors[key] = arr
+        return _extract_into_tensor(arr, t, broadcast_shape)
 
     def get_sigmas(self, t):
-        return _extract_into_tensor(self.sqrt_recipm1_alphas_cumprod, t, t.shape)
+        return self._extract("sqrt_recipm1_alphas_cumprod", t, t.shape)
 
     def q_mean_variance(self, x_start, t):
         """
@@ -254,9 +275,9 @@ class GaussianDiffusion:
         :param t: the number of diffusion steps (minus 1). Here, 0 means one step.
         :return: A tuple (mean, variance, log_variance), all of x_start's shape.
         """
-        mean = _extract_into_tensor(self.sqrt_alphas_cumprod, t, x_start.shape) * x_start
-        variance = _extract_into_tensor(1.0 - self.alphas_cumprod, t, x_start.shape)
-        log_variance = _extract_into_tensor(self.log_one_minus_alphas_cumprod, t, x_start.shape)
+        mean = self._extract("sqrt_alphas_cumprod", t, x_start.shape) * x_start
+        variance = self._extract("one_minus_alphas_cumprod", t, x_start.shape)
+        log_variance = self._extract("log_one_minus_alphas_cumprod", t, x_start.shape)
         return mean, variance, log_variance
 
     def q_sample(self, x_start, t, noise=None):
@@ -274,8 +295,8 @@ class GaussianDiffusion:
             noise = th.randn_like(x_start)
         assert noise.shape == x_start.shape
         return (
-            _extract_into_tensor(self.sqrt_alphas_cumprod, t, x_start.shape) * x_start
-            + _extract_into_tensor(self.sqrt_one_minus_alphas_cumprod, t, x_start.shape) * noise
+            self._extract("sqrt_alphas_cumprod", t, x_start.shape) * x_start
+            + self._extract("sqrt_one_minus_alphas_cumprod", t, x_start.shape) * noise
         )
 
     def q_posterior_mean_variance(self, x_start, x_t, t):
@@ -287,12 +308,12 @@ class GaussianDiffusion:
         """
         assert x_start.shape == x_t.shape
         posterior_mean = (
-            _extract_into_tensor(self.posterior_mean_coef1, t, x_t.shape) * x_start
-            + _extract_into_tensor(self.posterior_mean_coef2, t, x_t.shape) * x_t
+            self._extract("posterior_mean_coef1", t, x_t.shape) * x_start
+            + self._extract("posterior_mean_coef2", t, x_t.shape) * x_t
         )
-        posterior_variance = _extract_into_tensor(self.posterior_variance, t, x_t.shape)
-        posterior_log_variance_clipped = _extract_into_tensor(
-            self.posterior_log_variance_clipped, t, x_t.shape
+        posterior_variance = self._extract("posterior_variance", t, x_t.shape)
+        posterior_log_variance_clipped = self._extract(
+            "posterior_log_variance_clipped", t, x_t.shape
         )
         assert (
             posterior_mean.shape[0]
@@ -343,27 +364,19 @@ class GaussianDiffusion:
                 model_log_variance = model_var_values
                 model_variance = th.exp(model_log_variance)
             else:
-                min_log = _extract_into_tensor(self.posterior_log_variance_clipped, t, x.shape)
-                max_log = _extract_into_tensor(np.log(self.betas), t, x.shape)
+                min_log = self._extract("posterior_log_variance_clipped", t, x.shape)
+                max_log = self._extract("log_betas", t, x.shape)
                 # The model_var_values is [-1, 1] for [min_var, max_var].
                 frac = (model_var_values + 1) / 2
                 model_log_variance = frac * max_log + (1 - frac) * min_log
                 model_variance = th.exp(model_log_variance)
         else:
-            model_variance, model_log_variance = {
-                # for fixedlarge, we set the initial (log-)variance like so
-                # to get a better decoder log likelihood.
-                "fixed_large": (
-                    np.append(self.posterior_variance[1], self.betas[1:]),
-                    np.log(np.append(self.posterior_variance[1], self.betas[1:])),
-                ),
-                "fixed_small": (
-                    self.posterior_variance,
-                    self.posterior_log_variance_clipped,
-                ),
+            variance_name, log_variance_name = {
+                "fixed_large": ("fixed_large_variance", "fixed_large_log_variance"),
+                "fixed_small": ("posterior_variance", "posterior_log_variance_clipped"),
             }[self.model_var_type]
-            model_variance = _extract_into_tensor(model_variance, t, x.shape)
-            model_log_variance = _extract_into_tensor(model_log_variance, t, x.shape)
+            model_variance = self._extract(variance_name, t, x.shape)
+            model_log_variance = self._extract(log_variance_name, t, x.shape)
 
         def process_xstart(x):
             if denoised_fn is not None:
@@ -400,8 +413,8 @@ class GaussianDiffusion:
     def _predict_xstart_from_eps(self, x_t, t, eps):
         assert x_t.shape == eps.shape
         return (
-            _extract_into_tensor(self.sqrt_recip_alphas_cumprod, t, x_t.shape) * x_t
-            - _extract_into_tensor(self.sqrt_recipm1_alphas_cumprod, t, x_t.shape) * eps
+            self._extract("sqrt_recip_alphas_cumprod", t, x_t.shape) * x_t
+            - self._extract("sqrt_recipm1_alphas_cumprod", t, x_t.shape) * eps
         )
 
     def _predict_xstart_from_xprev(self, x_t, t, xprev):
@@ -416,8 +429,8 @@ class GaussianDiffusion:
 
     def _predict_eps_from_xstart(self, x_t, t, pred_xstart):
         return (
-            _extract_into_tensor(self.sqrt_recip_alphas_cumprod, t, x_t.shape) * x_t - pred_xstart
-        ) / _extract_into_tensor(self.sqrt_recipm1_alphas_cumprod, t, x_t.shape)
+            self._extract("sqrt_recip_alphas_cumprod", t, x_t.shape) * x_t - pred_xstart
+        ) / self._extract("sqrt_recipm1_alphas_cumprod", t, x_t.shape)
 
     def condition_mean(self, cond_fn, p_mean_var, x, t, model_kwargs=None):
         """
@@ -442,7 +455,7 @@ class GaussianDiffusion:
         Unlike condition_mean(), this instead uses the conditioning strategy
         from Song et al (2020).
         """
-        alpha_bar = _extract_into_tensor(self.alphas_cumprod, t, x.shape)
+        alpha_bar = self._extract("alphas_cumprod", t, x.shape)
 
         eps = self._predict_eps_from_xstart(x, t, p_mean_var["pred_xstart"])
         eps = eps - (1 - alpha_bar).sqrt() * cond_fn(x, t, **(model_kwargs or {}))
@@ -461,6 +474,7 @@ class GaussianDiffusion:
         denoised_fn=None,
         cond_fn=None,
         model_kwargs=None,
+        generators=None,
     ):
         """
         Sample x_{t-1} from the model at the given timestep.
@@ -475,6 +489,8 @@ class GaussianDiffusion:
                         similarly to the model.
         :param model_kwargs: if not None, a dict of extra keyword arguments to
             pass to the model. This can be used for conditioning.
+        :param generators: if specified, one torch.Generator per sample used to
+                           draw the noise (see randn_rows()).
         :return: a dict containing the following keys:
                  - 'sample': a random sample from the model.
                  - 'pred_xstart': a prediction of x_0.
@@ -487,7 +503,7 @@ class GaussianDiffusion:
             denoised_fn=denoised_fn,
             model_kwargs=model_kwargs,
         )
-        noise = th.randn_like(x)
+        noise = randn_like_rows(x, generators)
         nonzero_mask = (
             (t != 0).float().view(-1, *([1] * (len(x.shape) - 1)))
         )  # no noise when t == 0
@@ -508,6 +524,7 @@ class GaussianDiffusion:
         device=None,
         progress=False,
         temp=1.0,
+        generators=None,
     ):
         """
         Generate samples from the model.
@@ -526,6 +543,8 @@ class GaussianDiffusion:
         :param device: if specified, the device to create the samples on.
                        If not specified, use a model parameter's device.
         :param progress: if True, show a tqdm progress bar.
+        :param generators: if specified, one torch.Generator per sample, making
+                           the sampled noise reproducible (see randn_rows()).
         :return: a non-differentiable batch of samples.
         """
         final = None
@@ -540,6 +559,7 @@ class GaussianDiffusion:
             device=device,
             progress=progress,
             temp=temp,
+            generators=generators,
         ):
             final = sample
         return final["sample"]
@@ -556,6 +576,7 @@ class GaussianDiffusion:
         device=None,
         progress=False,
         temp=1.0,
+        generators=None,
     ):
         """
         Generate samples from the model and yield intermediate samples from
@@ -571,7 +592,7 @@ class GaussianDiffusion:
         if noise is not None:
             img = noise
         else:
-            img = th.randn(*shape, device=device) * temp
+            img = randn_rows(shape, generators, device=device) * temp
         indices = list(range(self.num_timesteps))[::-1]
 
         if progress:
@@ -591,6 +612,7 @@ class GaussianDiffusion:
                     denoised_fn=denoised_fn,
                     cond_fn=cond_fn,
                     model_kwargs=model_kwargs,
+                    generators=generators,
                 )
                 yield self.unscale_out_dict(out)
                 img = out["sample"]
@@ -626,8 +648,8 @@ class GaussianDiffusion:
         # in case we used x_start or x_prev prediction.
         eps = self._predict_eps_from_xstart(x, t, out["pred_xstart"])
 
-        alpha_bar = _extract_into_tensor(self.alphas_cumprod, t, x.shape)
-        alpha_bar_prev = _extract_into_tensor(self.alphas_cumprod_prev, t, x.shape)
+        alpha_bar = self._extract("alphas_cumprod", t, x.shape)
+        alpha_bar_prev = self._extract("alphas_cumprod_prev", t, x.shape)
         sigma = (
             eta
             * th.sqrt((1 - alpha_bar_prev) / (1 - alpha_bar))
@@ -673,10 +695,10 @@ class GaussianDiffusion:
         # Usually our model outputs epsilon, but we re-derive it
         # in case we used x_start or x_prev prediction.
         eps = (
-            _extract_into_tensor(self.sqrt_recip_alphas_cumprod, t, x.shape) * x
+            self._extract("sqrt_recip_alphas_cumprod", t, x.shape) * x
             - out["pred_xstart"]
-        ) / _extract_into_tensor(self.sqrt_recipm1_alphas_cumprod, t, x.shape)
-        alpha_bar_next = _extract_into_tensor(self.alphas_cumprod_next, t, x.shape)
+        ) / self._extract("sqrt_recipm1_alphas_cumprod", t, x.shape)
+        alpha_bar_next = self._extract("alphas_cumprod_next", t, x.shape)
 
         # Equation 12. reversed
         mean_pred = out["pred_xstart"] * th.sqrt(alpha_bar_next) + th.sqrt(1 - alpha_bar_next) * eps
@@ -1012,6 +1034,7 @@ class SpacedDiffusion(GaussianDiffusion):
     def __init__(self, use_timesteps: Iterable[int], **kwargs):
         self.use_timesteps = set(use_timesteps)
         self.timestep_map = []
+        self._timestep_map_tensors = {}
         self.original_num_steps = len(kwargs["betas"])
 
         base_diffusion = GaussianDiffusion(**kwargs)  # pylint: disable=missing-kwoa
@@ -1040,35 +1063,77 @@ class SpacedDiffusion(GaussianDiffusion):
     def _wrap_model(self, model):
         if isinstance(model, _WrappedModel):
             return model
-        return _WrappedModel(model, self.timestep_map, self.original_num_steps)
+        return _WrappedModel(
+            model, self.timestep_map, self.original_num_steps, self._timestep_map_tensors
+        )
 
 
 class _WrappedModel:
-    def __init__(self, model, timestep_map, original_num_steps):
+    def __init__(self, model, timestep_map, original_num_steps, map_tensors=None):
         self.model = model
         self.timestep_map = timestep_map
         self.original_num_steps = original_num_steps
+        # Cache of timestep_map tensors keyed by (device, dtype), shared
+        # between wrappers of the same diffusion.
+        self.map_tensors = {} if map_tensors is None else map_tensors
 
     def __call__(self, x, ts, **kwargs):
-        map_tensor = th.tensor(self.timestep_map, device=ts.device, dtype=ts.dtype)
+        key = (ts.device, ts.dtype)
+        map_tensor = self.map_tensors.get(key)
+        if map_tensor is None:
+            map_tensor = th.tensor(self.timestep_map, device=ts.device, dtype=ts.dtype)
+            self.map_tensors[key] = map_tensor
         new_ts = map_tensor[ts]
         return self.model(x, new_ts, **kwargs)
 
 
 def _extract_into_tensor(arr, timesteps, broadcast_shape):
     """
-    Extract values from a 1-D numpy array for a batch of indices.
+    Extract values from a 1-D numpy array or tensor for a batch of indices.
 
-    :param arr: the 1-D numpy array.
+    :param arr: the 1-D numpy array or tensor.
     :param timesteps: a tensor of indices into the array to extract.
     :param broadcast_shape: a larger shape of K dimensions with the batch
                             dimension equal to the length of timesteps.
-    :return: a tensor of shape [batch_size, 1, ...] where the shape has K dims.
+    :return: a tensor of broadcast_shape. It is an expanded view of the
+             [batch_size, 1, ...] values, so no full-size tensor is allocated.
     """
-    res = th.from_numpy(arr).to(device=timesteps.device)[timesteps].float()
+    if isinstance(arr, np.ndarray):
+        arr = th.from_numpy(arr)
+    res = arr.to(device=timesteps.device)[timesteps].float()
     while len(res.shape) < len(broadcast_shape):
         res = res[..., None]
-    return res + th.zeros(broadcast_shape, device=timesteps.device)
+    return res.expand(broadcast_shape)
+
+
+def randn_rows(shape, generators=None, device=None, dtype=None):
+    """
+    Draw standard normal noise, optionally one batch row per generator.
+
+    Each row is drawn from its own generator, so a sample's noise depends only
+    on its generator and not on the rest of the batch. If the batch is a
+    multiple of len(generators), the drawn rows are repeated along the batch
+    (e.g. for the unconditional half of a guided batch).
+
+    :param shape: the shape of the noise, batch dimension first.
+    :param generators: if specified, a sequence of torch.Generator objects.
+    :param device: the device of the returned noise.
+    :param dtype: the dtype of the returned noise.
+    :return: a tensor of the given shape.
+    """
+    if generators is None:
+        return th.randn(*shape, device=device, dtype=dtype)
+    assert shape[0] % len(generators) == 0, "batch must be a multiple of the generators"
+    rows = th.stack([th.randn(*shape[1:], generator=g, device=g.device) for g in generators])
+    rows = rows.to(device=device, dtype=dtype)
+    return rows.repeat(shape[0] // len(generators), *([1] * (len(shape) - 1)))
+
+
+def randn_like_rows(x, generators=None):
+    """
+    Like th.randn_like(x), drawing one row per generator when given.
+    """
+    return randn_rows(x.shape, generators, device=x.device, dtype=x.dtype)
 
 
 def normal_kl(mean1, logvar1, mean2, logvar2):
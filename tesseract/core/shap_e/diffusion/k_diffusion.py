@@ -25,7 +25,7 @@ THE SOFTWARE.
 import numpy as np
 import torch as th
 
-from .gaussian_diffusion import GaussianDiffusion, mean_flat
+from .gaussian_diffusion import GaussianDiffusion, mean_flat, randn_like_rows, randn_rows
 
 
 class KarrasDenoiser:
@@ -78,29 +78,41 @@ class KarrasDenoiser:
 
 class GaussianToKarrasDenoiser:
     def __init__(self, model, diffusion):
-        from scipy import interpolate
-
         self.model = model
         self.diffusion = diffusion
-        self.alpha_cumprod_to_t = interpolate.interp1d(
-            diffusion.alphas_cumprod, np.arange(0, diffusion.num_timesteps)
-        )
+        # alphas_cumprod as a float64 tensor, keyed by device.
+        self._alphas_cumprod = {}
 
     def sigma_to_t(self, sigma):
-        alpha_cumprod = 1.0 / (sigma**2 + 1)
-        if alpha_cumprod > self.diffusion.alphas_cumprod[0]:
-            return 0
-        elif alpha_cumprod <= self.diffusion.alphas_cumprod[-1]:
-            return self.diffusion.num_timesteps - 1
-        else:
-            return float(self.alpha_cumprod_to_t(alpha_cumprod))
+        """
+        Map noise levels to diffusion timesteps by linear interpolation over
+        alphas_cumprod, entirely on sigma's device (no host sync).
+
+        :param sigma: an [N] tensor of noise levels.
+        :return: an [N] float64 tensor of (fractional) timesteps.
+        """
+        alphas_cumprod = self._alphas_cumprod.get(sigma.device)
+        if alphas_cumprod is None:
+            alphas_cumprod = th.from_numpy(self.diffusion.alphas_cumprod).to(sigma.device)
+            self._alphas_cumprod[sigma.device] = alphas_cumprod
+        num_timesteps = len(alphas_cumprod)
+
+        alpha_cumprod = (1.0 / (sigma**2 + 1)).double()
+        # alphas_cumprod is decreasing; search the reversed (increasing) copy for
+        # the last timestep t with alphas_cumprod[t] >= alpha_cumprod.
+        j = th.searchsorted(alphas_cumprod.flip(0), alpha_cumprod)
+        t_hi = (num_timesteps - 1 - j).clamp(0, num_timesteps - 2)
+        a_hi = alphas_cumprod[t_hi]
+        a_lo = alphas_cumprod[t_hi + 1]
+        t = t_hi + (a_hi - alpha_cumprod) / (a_hi - a_lo)
+
+        t = th.where(alpha_cumprod > alphas_cumprod[0], th.zeros_like(t), t)
+        return th.where(
+            alpha_cumprod <= alphas_cumprod[-1], th.full_like(t, num_timesteps - 1), t
+        )
 
     def denoise(self, x_t, sigmas, clip_denoised=True, model_kwargs=None):
-        t = th.tensor(
-            [self.sigma_to_t(sigma) for sigma in sigmas.cpu().numpy()],
-            dtype=th.long,
-            device=sigmas.device,
-        )
+        t = self.sigma_to_t(sigmas).long()
         c_in = append_dims(1.0 / (sigmas**2 + 1) ** 0.5, x_t.ndim)
         out = self.diffusion.p_mean_variance(
             self.model, x_t * c_in, t, clip_denoised=clip_denoised, model_kwargs=model_kwargs
@@ -133,22 +145,44 @@ def karras_sample_progressive(
     s_tmax=float("inf"),
     s_noise=1.0,
     guidance_scale=0.0,
+    generators=None,
+    guidance_interval=None,
+    uncond_reuse_steps=1,
 ):
-    sigmas = get_sigmas_karras(steps, sigma_min, sigma_max, rho, device=device)
-    x_T = th.randn(*shape, device=device) * sigma_max
-    sample_fn = {"heun": sample_heun, "dpm": sample_dpm, "ancestral": sample_euler_ancestral}[
-        sampler
+    # `generators`, if given, holds one torch.Generator per sample so that all
+    # noise drawn for a sample is reproducible from its seed alone.
+    #
+    # `guidance_interval`, a (sigma_low, sigma_high) pair, limits classifier-free
+    # guidance to noise levels inside that range; other steps run a single
+    # conditional forward pass. With `uncond_reuse_steps` = k > 1, the
+    # unconditional prediction is recomputed only every k sampler steps and reused
+    # in between, so those steps also need only the conditional half of the batch.
+    # Samplers pass their step index to the denoiser as `step` for this bookkeeping.
+    sigmas = get_sigmas_karras(steps, sigma_min, sigma_max, rho, device="cpu")
+    # Which steps are guided is decided once on the host, from each step's noise level.
+    guided_steps = [
+        guidance_interval is None or guidance_interval[0] <= sigma <= guidance_interval[1]
+        for sigma in sigmas[:-1].tolist()
     ]
-
-    if sampler != "ancestral":
+    sigmas = sigmas.to(device)
+    x_T = randn_rows(shape, generators, device=device) * sigma_max
+    sample_fn = {
+        "heun": sample_heun,
+        "dpm": sample_dpm,
+        "ancestral": sample_euler_ancestral,
+        "dpmpp_2m": sample_dpmpp_2m,
+    }[sampler]
+
+    if sampler not in ("ancestral", "dpmpp_2m"):
         sampler_args = dict(s_churn=s_churn, s_tmin=s_tmin, s_tmax=s_tmax, s_noise=s_noise)
     else:
         sampler_args = {}
+    sampler_args["generators"] = generators
 
     if isinstance(diffusion, KarrasDenoiser):
 
-        def denoiser(x_t, sigma):
-            _, denoised = diffusion.denoise(model, x_t, sigma, **model_kwargs)
+        def denoiser(x_t, sigma, step=None, kwargs=model_kwargs):
+            _, denoised = diffusion.denoise(model, x_t, sigma, **kwargs)
             if clip_denoised:
                 denoised = denoised.clamp(-1, 1)
             return denoised
@@ -156,24 +190,35 @@ def karras_sample_progressive(
     elif isinstance(diffusion, GaussianDiffusion):
         model = GaussianToKarrasDenoiser(model, diffusion)
 
-        def denoiser(x_t, sigma):
+        def denoiser(x_t, sigma, step=None, kwargs=model_kwargs):
             _, denoised = model.denoise(
-                x_t, sigma, clip_denoised=clip_denoised, model_kwargs=model_kwargs
+                x_t, sigma, clip_denoised=clip_denoised, model_kwargs=kwargs
             )
             return denoised
 
     else:
         raise NotImplementedError
 
-    if guidance_scale != 0 and guidance_scale != 1:
+    if isinstance(guidance_scale, th.Tensor) or (guidance_scale != 0 and guidance_scale != 1):
+        # A [batch_size] tensor of guidance scales guides each row separately.
+        row_scale = guidance_scale
+        if isinstance(guidance_scale, th.Tensor):
+            row_scale = append_dims(guidance_scale.to(device), len(shape))
 
-        def guided_denoiser(x_t, sigma):
-            x_t = th.cat([x_t, x_t], dim=0)
-            sigma = th.cat([sigma, sigma], dim=0)
-            x_0 = denoiser(x_t, sigma)
-            cond_x_0, uncond_x_0 = th.split(x_0, len(x_0) // 2, dim=0)
-            x_0 = uncond_x_0 + guidance_scale * (cond_x_0 - uncond_x_0)
-            return x_0
+        if guidance_interval is None and uncond_reuse_steps <= 1:
+
+            def guided_denoiser(x_t, sigma, step=None):
+                x_t = th.cat([x_t, x_t], dim=0)
+                sigma = th.cat([sigma, sigma], dim=0)
+                x_0 = denoiser(x_t, sigma)
+                cond_x_0, uncond_x_0 = th.split(x_0, len(x_0) // 2, dim=0)
+                x_0 = uncond_x_0 + row_scale * (cond_x_0 - uncond_x_0)
+                return x_0
+
+        else:
+            guided_denoiser = _scheduled_guidance_denoiser(
+                denoiser, model_kwargs, row_scale, guided_steps, uncond_reuse_steps
+            )
 
     else:
         guided_denoiser = denoiser
@@ -191,6 +236,49 @@ def karras_sample_progressive(
             yield obj
 
 
+def _scheduled_guidance_denoiser(
+    denoiser, model_kwargs, row_scale, guided_steps, uncond_reuse_steps
+):
+    """
+    Wrap `denoiser` so classifier-free guidance follows a per-step schedule.
+
+    The wrapper must be called with the sampler's step index, since
+    second-order samplers evaluate each step at more than one noise level.
+
+    :param model_kwargs: conditioning for the doubled batch, conditional rows
+                         first, as passed to `denoiser` by default.
+    :param guided_steps: one bool per sampler step; unguided steps use the
+                         conditional prediction as is.
+    :param uncond_reuse_steps: number of consecutive steps that share one
+                               unconditional prediction. Every evaluation of
+                               the step that computes it recomputes it, so 1
+                               gives exact guidance.
+    """
+    cond_kwargs = {k: v[: len(v) // 2] for k, v in model_kwargs.items()}
+    state = dict(uncond=None, uncond_step=None)
+
+    def guided_denoiser(x_t, sigma, step):
+        if not guided_steps[step]:
+            state["uncond"] = None
+            return denoiser(x_t, sigma, kwargs=cond_kwargs)
+
+        if (
+            uncond_reuse_steps > 1
+            and state["uncond"] is not None
+            and 0 < step - state["uncond_step"] < uncond_reuse_steps
+        ):
+            cond_x_0 = denoiser(x_t, sigma, kwargs=cond_kwargs)
+            uncond_x_0 = state["uncond"]
+        else:
+            x_0 = denoiser(th.cat([x_t, x_t], dim=0), th.cat([sigma, sigma], dim=0))
+            cond_x_0, uncond_x_0 = th.split(x_0, len(x_0) // 2, dim=0)
+            state["uncond"] = uncond_x_0
+            state["uncond_step"] = step
+        return uncond_x_0 + row_scale * (cond_x_0 - uncond_x_0)
+
+    return guided_denoiser
+
+
 def get_sigmas_karras(n, sigma_min, sigma_max, rho=7.0, device="cpu"):
     """Constructs the noise schedule of Karras et al. (2022)."""
     ramp = th.linspace(0, 1, n)
@@ -214,7 +302,7 @@ def get_ancestral_step(sigma_from, sigma_to):
 
 
 @th.no_grad()
-def sample_euler_ancestral(model, x, sigmas, progress=False):
+def sample_euler_ancestral(model, x, sigmas, progress=False, generators=None):
     """Ancestral sampling with Euler method steps."""
     s_in = x.new_ones([x.shape[0]])
     indices = range(len(sigmas) - 1)
@@ -224,14 +312,14 @@ def sample_euler_ancestral(model, x, sigmas, progress=False):
         indices = tqdm(indices)
 
     for i in indices:
-        denoised = model(x, sigmas[i] * s_in)
+        denoised = model(x, sigmas[i] * s_in, step=i)
         sigma_down, sigma_up = get_ancestral_step(sigmas[i], sigmas[i + 1])
         yield {"x": x, "i": i, "sigma": sigmas[i], "sigma_hat": sigmas[i], "pred_xstart": denoised}
         d = to_d(x, sigmas[i], denoised)
         # Euler method
         dt = sigma_down - sigmas[i]
         x = x + d * dt
-        x = x + th.randn_like(x) * sigma_up
+        x = x + randn_like_rows(x, generators) * sigma_up
     yield {"x": x, "pred_xstart": x}
 
 
@@ -245,6 +333,7 @@ def sample_heun(
     s_tmin=0.0,
     s_tmax=float("inf"),
     s_noise=1.0,
+    generators=None,
 ):
     """Implements Algorithm 2 (Heun steps) from Karras et al. (2022)."""
     s_in = x.new_ones([x.shape[0]])
@@ -258,11 +347,11 @@ def sample_heun(
         gamma = (
             min(s_churn / (len(sigmas) - 1), 2**0.5 - 1) if s_tmin <= sigmas[i] <= s_tmax else 0.0
         )
-        eps = th.randn_like(x) * s_noise
+        eps = randn_like_rows(x, generators) * s_noise
         sigma_hat = sigmas[i] * (gamma + 1)
         if gamma > 0:
             x = x + eps * (sigma_hat**2 - sigmas[i] ** 2) ** 0.5
-        denoised = denoiser(x, sigma_hat * s_in)
+        denoised = denoiser(x, sigma_hat * s_in, step=i)
         d = to_d(x, sigma_hat, denoised)
         yield {"x": x, "i": i, "sigma": sigmas[i], "sigma_hat": sigma_hat, "pred_xstart": denoised}
         dt = sigmas[i + 1] - sigma_hat
@@ -272,7 +361,7 @@ def sample_heun(
         else:
             # Heun's method
             x_2 = x + d * dt
-            denoised_2 = denoiser(x_2, sigmas[i + 1] * s_in)
+            denoised_2 = denoiser(x_2, sigmas[i + 1] * s_in, step=i)
             d_2 = to_d(x_2, sigmas[i + 1], denoised_2)
             d_prime = (d + d_2) / 2
             x = x + d_prime * dt
@@ -289,6 +378,7 @@ def sample_dpm(
     s_tmin=0.0,
     s_tmax=float("inf"),
     s_noise=1.0,
+    generators=None,
 ):
     """A sampler inspired by DPM-Solver-2 and Algorithm 2 from Karras et al. (2022)."""
     s_in = x.new_ones([x.shape[0]])
@@ -302,11 +392,11 @@ def sample_dpm(
         gamma = (
             min(s_churn / (len(sigmas) - 1), 2**0.5 - 1) if s_tmin <= sigmas[i] <= s_tmax else 0.0
         )
-        eps = th.randn_like(x) * s_noise
+        eps = randn_like_rows(x, generators) * s_noise
         sigma_hat = sigmas[i] * (gamma + 1)
         if gamma > 0:
             x = x + eps * (sigma_hat**2 - sigmas[i] ** 2) ** 0.5
-        denoised = denoiser(x, sigma_hat * s_in)
+        denoised = denoiser(x, sigma_hat * s_in, step=i)
         d = to_d(x, sigma_hat, denoised)
         yield {"x": x, "i": i, "sigma": sigmas[i], "sigma_hat": sigma_hat, "denoised": denoised}
         # Midpoint method, where the midpoint is chosen according to a rho=3 Karras schedule
@@ -314,12 +404,53 @@ def sample_dpm(
         dt_1 = sigma_mid - sigma_hat
         dt_2 = sigmas[i + 1] - sigma_hat
         x_2 = x + d * dt_1
-        denoised_2 = denoiser(x_2, sigma_mid * s_in)
+        denoised_2 = denoiser(x_2, sigma_mid * s_in, step=i)
         d_2 = to_d(x_2, sigma_mid, denoised_2)
         x = x + d_2 * dt_2
     yield {"x": x, "pred_xstart": denoised}
 
 
+@th.no_grad()
+def sample_dpmpp_2m(denoiser, x, sigmas, progress=False, generators=None):
+    """
+    DPM-Solver++(2M) from Lu et al. (2022).
+
+    A second-order multistep solver that reuses the previous step's denoised
+    output, so it costs one denoiser evaluation per step. It is deterministic,
+    so `generators` is unused.
+    """
+    _ = generators
+    s_in = x.new_ones([x.shape[0]])
+    indices = range(len(sigmas) - 1)
+    if progress:
+        from tqdm.auto import tqdm
+
+        indices = tqdm(indices)
+
+    def sigma_fn(t):
+        return t.neg().exp()
+
+    def t_fn(sigma):
+        return sigma.log().neg()
+
+    old_denoised = None
+    for i in indices:
+        denoised = denoiser(x, sigmas[i] * s_in, step=i)
+        yield {"x": x, "i": i, "sigma": sigmas[i], "sigma_hat": sigmas[i], "pred_xstart": denoised}
+        t, t_next = t_fn(sigmas[i]), t_fn(sigmas[i + 1])
+        h = t_next - t
+        if old_denoised is None or sigmas[i + 1] == 0:
+            # First-order (DPM-Solver++(1)) step; reaches `denoised` when sigma_next is 0.
+            x = (sigma_fn(t_next) / sigma_fn(t)) * x - (-h).expm1() * denoised
+        else:
+            h_last = t - t_fn(sigmas[i - 1])
+            r = h_last / h
+            denoised_d = (1 + 1 / (2 * r)) * denoised - (1 / (2 * r)) * old_denoised
+            x = (sigma_fn(t_next) / sigma_fn(t)) * x - (-h).expm1() * denoised_d
+        old_denoised = denoised
+    yield {"x": x, "pred_xstart": denoised}
+
+
 def append_dims(x, target_dims):
     """Appends dimensions to the end of a tensor until it has target_dims dimensions."""
     dims_to_append = target_dims - x.ndim
@@ -1,4 +1,4 @@
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
 
 import torch
 import torch.nn as nn
@@ -13,7 +13,7 @@ DEFAULT_KARRAS_S_CHURN = 0.0
 
 
 def uncond_guide_model(
-    model: Callable[..., torch.Tensor], scale: float
+    model: Callable[..., torch.Tensor], scale: Union[float, torch.Tensor]
 ) -> Callable[..., torch.Tensor]:
     def model_fn(x_t, ts, **kwargs):
         half = x_t[: len(x_t) // 2]
@@ -21,20 +21,46 @@ def uncond_guide_model(
         model_out = model(combined, ts, **kwargs)
         eps, rest = model_out[:, :3], model_out[:, 3:]
         cond_eps, uncond_eps = torch.chunk(eps, 2, dim=0)
-        half_eps = uncond_eps + scale * (cond_eps - uncond_eps)
+        row_scale = scale
+        if isinstance(scale, torch.Tensor):
+            row_scale = scale.view(-1, *([1] * (eps.ndim - 1))).to(eps)
+        half_eps = uncond_eps + row_scale * (cond_eps - uncond_eps)
         eps = torch.cat([half_eps, half_eps], dim=0)
         return torch.cat([eps, rest], dim=1)
 
     return model_fn
 
 
+def per_row_guidance(
+    guidance_scale: Union[float, Sequence[float], torch.Tensor],
+    batch_size: int,
+    device: torch.device,
+) -> Union[float, torch.Tensor]:
+    """
+    Normalize a guidance scale into either a float or a [batch_size] tensor.
+
+    Rows with a scale of 0 (no guidance) are mapped to 1, which reduces the
+    guided prediction to the conditional one, so they can share a guided
+    batch with other rows. If no row needs guidance, 0.0 is returned.
+    """
+    if not isinstance(guidance_scale, (torch.Tensor, list, tuple)):
+        return guidance_scale
+    scales = torch.as_tensor(guidance_scale, dtype=torch.float32, device=device).flatten()
+    assert len(scales) == batch_size, "expected one guidance scale per sample"
+    if bool(((scales == 0) | (scales == 1)).all()):
+        return 0.0
+    if bool((scales == scales[0]).all()):
+        return float(scales[0])
+    return torch.where(scales == 0, torch.ones_like(scales), scales)
+
+
 def sample_latents(
     *,
     batch_size: int,
     model: nn.Module,
     diffusion: GaussianDiffusion,
     model_kwargs: Dict[str, Any],
-    guidance_scale: float,
+    guidance_scale: Union[float, Sequence[float], torch.Tensor],
     clip_denoised: bool,
     use_fp16: bool,
     use_karras: bool,
@@ -44,20 +70,52 @@ def sample_latents(
     s_churn: float,
     device: Optional[torch.device] = None,
     progress: bool = False,
+    generators: Optional[Sequence[torch.Generator]] = None,
+    sampler: str = "heun",
+    guidance_interval: Optional[Tuple[float, float]] = None,
+    uncond_reuse_steps: int = 1,
+    autocast_dtype: Optional[torch.dtype] = None,
+    text_autocast_dtype: Optional[torch.dtype] = None,
 ) -> torch.Tensor:
+    """
+    :param autocast_dtype: reduced precision used by the denoiser when
+                           `use_fp16` is set; None for the device's autocast
+                           default (fp16 on CUDA, bf16 on CPU).
+    :param text_autocast_dtype: reduced precision for computing the
+                                conditioning (e.g. CLIP text embeddings);
+                                None to compute it in fp32.
+    """
     sample_shape = (batch_size, model.d_latent)
+    if generators is not None:
+        assert len(generators) == batch_size, "expected one generator per sample"
 
     if device is None:
         device = next(model.parameters()).device
 
+    # A sequence of guidance scales gives each sample its own scale, so that
+    # requests with different scales can share one sampling loop.
+    guidance_scale = per_row_guidance(guidance_scale, batch_size, device)
+    guided = isinstance(guidance_scale, torch.Tensor) or guidance_scale not in (0.0, 1.0)
+    # guidance_interval and uncond_reuse_steps only apply to Karras sampling.
+
     if hasattr(model, "cached_model_kwargs"):
-        model_kwargs = model.cached_model_kwargs(batch_size, model_kwargs)
-    if guidance_scale != 1.0 and guidance_scale != 0.0:
+        with torch.autocast(
+            device_type=device.type,
+            dtype=text_autocast_dtype,
+            enabled=text_autocast_dtype is not None,
+        ):
+            model_kwargs = model.cached_model_kwargs(batch_size, model_kwargs)
+        # Hand the denoiser fp32 conditioning whatever precision produced it.
+        model_kwargs = {
+            k: v.float() if isinstance(v, torch.Tensor) and v.is_floating_point() else v
+            for k, v in model_kwargs.items()
+        }
+    if guided:
         for k, v in model_kwargs.copy().items():
             model_kwargs[k] = torch.cat([v, torch.zeros_like(v)], dim=0)
 
     sample_shape = (batch_size, model.d_latent)
-    with torch.autocast(device_type=device.type, enabled=use_fp16):
+    with torch.autocast(device_type=device.type, dtype=autocast_dtype, enabled=use_fp16):
         if use_karras:
             samples = karras_sample(
                 diffusion=diffusion,
@@ -69,13 +127,17 @@ def sample_latents(
                 device=device,
                 sigma_min=sigma_min,
                 sigma_max=sigma_max,
+                sampler=sampler,
                 s_churn=s_churn,
                 guidance_scale=guidance_scale,
                 progress=progress,
+                generators=generators,
+                guidance_interval=guidance_interval,
+                uncond_reuse_steps=uncond_reuse_steps,
             )
         else:
             internal_batch_size = batch_size
-            if guidance_scale != 1.0:
+            if guided:
                 model = uncond_guide_model(model, guidance_scale)
                 internal_batch_size *= 2
             samples = diffusion.p_sample_loop(
@@ -85,6 +147,7 @@ def sample_latents(
                 device=device,
                 clip_denoised=clip_denoised,
                 progress=progress,
+                generators=generators,
             )
 
     return samples
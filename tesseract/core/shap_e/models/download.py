@@ -4,11 +4,13 @@ Adapted from: https://github.com/openai/glide-text2im/blob/69b530740eb6cef69442d
 
 import hashlib
 import os
+import warnings
 from functools import lru_cache
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 import requests
 import torch
+import torch.nn as nn
 import yaml
 from filelock import FileLock
 from tqdm.auto import tqdm
@@ -136,14 +138,134 @@ def load_checkpoint(
     return torch.load(path, map_location=device)
 
 
+def quantize_backbone_int8(model: nn.Module) -> nn.Module:
+    """
+    Replace the nn.Linear layers of a transformer backbone (c_qkv, c_proj and
+    c_fc in every block) with dynamically quantized int8 layers, in place.
+
+    Weights are stored as int8 and activations are quantized on the fly, so
+    this only runs on CPU.
+    """
+    torch.ao.quantization.quantize_dynamic(
+        model.backbone, {nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+    model.quantized_int8 = True
+    return model
+
+
 def load_model(
     model_name: str,
     device: torch.device,
+    config_overrides: Optional[Dict[str, Any]] = None,
+    quantize_int8: bool = False,
     **kwargs,
 ) -> Dict[str, torch.Tensor]:
+    """
+    :param config_overrides: if specified, keys to override in the model
+                             config before the model is constructed.
+    :param quantize_int8: if True, quantize the linear layers of the model's
+                          transformer backbone to int8 (CPU only). The
+                          quantized state dict is cached next to the
+                          checkpoint, so later loads skip the fp32 weights.
+    """
     from .configs import model_from_config
 
-    model = model_from_config(load_config(model_name, **kwargs), device=device)
-    model.load_state_dict(load_checkpoint(model_name, device=device, **kwargs))
+    config = load_config(model_name, **kwargs)
+    if config_overrides:
+        config = {**config, **config_overrides}
+    model = model_from_config(config, device=device)
+
+    if quantize_int8 and not hasattr(model, "backbone"):
+        warnings.warn(f"{model_name} has no transformer backbone to quantize, loading fp32 weights")
+        quantize_int8 = False
+    if quantize_int8 and torch.device(device).type != "cpu":
+        warnings.warn("int8 dynamic quantization only runs on CPU, loading fp32 weights")
+        quantize_int8 = False
+
+    if not quantize_int8:
+        model.load_state_dict(load_checkpoint(model_name, device=device, **kwargs))
+        model.eval()
+        return model
+
+    # Packed int8 weights are not guaranteed to be portable across torch versions.
+    cache_dir = kwargs.get("cache_dir") or default_cache_dir()
+    quantized_path = os.path.join(cache_dir, f"{model_name}-int8-torch{torch.__version__}.pt")
+    if os.path.exists(quantized_path):
+        quantize_backbone_int8(model)
+        model.load_state_dict(torch.load(quantized_path, map_location=device))
+    else:
+        model.load_state_dict(load_checkpoint(model_name, device=device, **kwargs))
+        quantize_backbone_int8(model)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = quantized_path + ".tmp"
+        torch.save(model.state_dict(), tmp_path)
+        os.rename(tmp_path, quantized_path)
+    model.eval()
+    return model
+
+
+def decoder_config_from_transmitter(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a ChannelsDecoder config sharing the latent projection and renderer
+    of a Transmitter config, without the point cloud / multiview encoder.
+    """
+    encoder = config["encoder"]
+    decoder = dict(
+        name="ChannelsDecoder",
+        renderer=config["renderer"],
+        params_proj=encoder["params_proj"],
+        d_latent=encoder["d_latent"],
+    )
+    if encoder.get("latent_warp") is not None:
+        decoder["latent_warp"] = encoder["latent_warp"]
+    return decoder
+
+
+def load_decoder(
+    model_name: str,
+    device: torch.device,
+    **kwargs,
+) -> nn.Module:
+    """
+    Load only the latent decoder of a transmitter: the params projection,
+    latent warp and renderer, which is all that decoding latents uses.
+
+    The decoder weights are taken from the transmitter checkpoint, so meshes
+    match the full model exactly. They are cached next to the checkpoint under
+    a name holding the checkpoint's hash, so later loads never read the encoder
+    weights and a new checkpoint release is never served stale decoder weights.
+
+    Models that are not a Transmitter are loaded as is.
+    """
+    from .configs import model_from_config
+
+    config = load_config(model_name, **kwargs)
+    if config["name"] != "Transmitter":
+        return load_model(model_name, device=device, **kwargs)
+    model = model_from_config(decoder_config_from_transmitter(config), device=device)
+
+    cache_dir = kwargs.get("cache_dir") or default_cache_dir()
+    checkpoint_hash = URL_HASHES[MODEL_PATHS[model_name]]
+    decoder_path = os.path.join(cache_dir, f"{model_name}-decoder-{checkpoint_hash[:16]}.pt")
+    if os.path.exists(decoder_path):
+        model.load_state_dict(torch.load(decoder_path, map_location=device))
+    else:
+        expected = model.state_dict().keys()
+        state_dict = {}
+        for key, value in load_checkpoint(model_name, device=device, **kwargs).items():
+            if key.startswith("encoder."):
+                key = key[len("encoder.") :]
+            if key in expected:
+                state_dict[key] = value
+        missing = [key for key in expected if key not in state_dict]
+        if missing:
+            raise RuntimeError(
+                f"The {model_name} checkpoint has no weights for decoder keys {missing}."
+            )
+        model.load_state_dict(state_dict)
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = decoder_path + ".tmp"
+        torch.save(state_dict, tmp_path)
+        os.rename(tmp_path, decoder_path)
     model.eval()
     return model
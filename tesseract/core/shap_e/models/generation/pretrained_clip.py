@@ -1,4 +1,8 @@
-from typing import Iterable, List, Optional, Union
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Union
 
 import numpy as np
 import torch
@@ -10,6 +14,236 @@ from shap_e.models.download import default_cache_dir
 ImageType = Union[np.ndarray, torch.Tensor, Image.Image]
 
 
+class TextEmbeddingCache:
+    """
+    A bounded LRU cache of CLIP text embeddings keyed by text encoder
+    configuration and normalized prompt.
+
+    Embeddings are kept on the CPU and can optionally be persisted to a file
+    with torch.save(), so popular prompts survive restarts. Saving never
+    happens on the lookup path: call save(), or start_autosave() to save in a
+    background thread. Processes sharing the file merge their entries into it.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop_autosave: Optional[threading.Event] = None
+        if path is not None and os.path.exists(path):
+            self._entries.update(self._load_file())
+            self._evict()
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        """
+        Normalize a prompt the way the CLIP tokenizer would (whitespace and
+        case), so that prompts that tokenize identically share an entry.
+        """
+        return " ".join(prompt.split()).lower()
+
+    @staticmethod
+    def make_key(namespace: str, prompt: str) -> str:
+        """
+        Build the cache key of a prompt embedded by the text encoder described
+        by `namespace` (CLIP model and precision), so embeddings from another
+        configuration are never reused.
+        """
+        return f"{namespace}\n{TextEmbeddingCache.normalize(prompt)}"
+
+    def get(self, key: str) -> Optional[torch.Tensor]:
+        with self._lock:
+            emb = self._entries.get(key)
+            if emb is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return emb
+
+    def put(self, key: str, emb: torch.Tensor):
+        with self._lock:
+            self._entries[key] = emb.detach().to("cpu", torch.float32)
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self._evict()
+
+    def save(self):
+        """
+        Merge the cache into the file at `path`, if one was given and there
+        are new entries.
+
+        The file is locked while it is read, merged and atomically replaced,
+        so processes sharing it do not drop each other's entries.
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = OrderedDict(self._entries)
+            self._dirty = False
+
+        from filelock import FileLock
+
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        try:
+            with FileLock(f"{self.path}.lock"):
+                merged = self._load_file() if os.path.exists(self.path) else OrderedDict()
+                for key, emb in entries.items():
+                    merged.pop(key, None)
+                    merged[key] = emb
+                while len(merged) > self.max_entries:
+                    merged.popitem(last=False)
+                tmp_path = f"{self.path}.tmp-{os.getpid()}"
+                torch.save(merged, tmp_path)
+                os.replace(tmp_path, self.path)
+        except Exception as exc:  # pylint: disable=broad-except
+            warnings.warn(f"failed to save text embedding cache {self.path}: {exc}")
+            with self._lock:
+                self._dirty = True
+
+    def start_autosave(self, interval: float):
+        """
+        Save the cache every `interval` seconds from a daemon thread.
+        """
+        if self.path is None or interval <= 0 or self._stop_autosave is not None:
+            return
+        self._stop_autosave = threading.Event()
+
+        def run(stop: threading.Event):
+            while not stop.wait(interval):
+                self.save()
+
+        threading.Thread(
+            target=run, args=(self._stop_autosave,), name="text-embedding-autosave", daemon=True
+        ).start()
+
+    def close(self):
+        """
+        Stop the autosave thread, if any, and save pending entries.
+        """
+        if self._stop_autosave is not None:
+            self._stop_autosave.set()
+            self._stop_autosave = None
+        self.save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load_file(self) -> "OrderedDict[str, torch.Tensor]":
+        try:
+            return OrderedDict(torch.load(self.path, map_location="cpu"))
+        except Exception as exc:  # pylint: disable=broad-except
+            warnings.warn(f"ignoring unreadable text embedding cache {self.path}: {exc}")
+            return OrderedDict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_CLIP_TEXT_KEYS = (
+    "token_embedding.",
+    "positional_embedding",
+    "transformer.",
+    "ln_final.",
+    "text_projection",
+    "logit_scale",
+)
+
+
+class CLIPTextEncoder(nn.Module):
+    """
+    The text half of a CLIP model: token embedding, text transformer, final
+    layer norm and projection, with the same encode_text() as clip.model.CLIP.
+    """
+
+    def __init__(self, state_dict: Dict[str, torch.Tensor]):
+        super().__init__()
+
+        # Lazy import for consistency with ImageCLIP.
+        from clip.model import LayerNorm, Transformer
+
+        embed_dim = state_dict["text_projection"].shape[1]
+        width = state_dict["ln_final.weight"].shape[0]
+        vocab_size = state_dict["token_embedding.weight"].shape[0]
+        layers = len(
+            {k.split(".")[2] for k in state_dict if k.startswith("transformer.resblocks.")}
+        )
+        self.context_length = state_dict["positional_embedding"].shape[0]
+
+        self.transformer = Transformer(
+            width=width, layers=layers, heads=width // 64, attn_mask=self.build_attention_mask()
+        )
+        self.token_embedding = nn.Embedding(vocab_size, width)
+        self.positional_embedding = nn.Parameter(torch.empty(self.context_length, width))
+        self.ln_final = LayerNorm(width)
+        self.text_projection = nn.Parameter(torch.empty(width, embed_dim))
+        self.logit_scale = nn.Parameter(torch.ones([]))
+        self.load_state_dict(state_dict)
+
+    def build_attention_mask(self) -> torch.Tensor:
+        mask = torch.empty(self.context_length, self.context_length)
+        mask.fill_(float("-inf"))
+        mask.triu_(1)
+        return mask
+
+    @property
+    def dtype(self) -> torch.dtype:
+        return self.text_projection.dtype
+
+    def encode_text(self, text: torch.Tensor) -> torch.Tensor:
+        x = self.token_embedding(text).type(self.dtype)
+        x = x + self.positional_embedding.type(self.dtype)
+        x = x.permute(1, 0, 2)  # NLD -> LND
+        x = self.transformer(x)
+        x = x.permute(1, 0, 2)  # LND -> NLD
+        x = self.ln_final(x).type(self.dtype)
+        # Take features from the end-of-text token (the highest token id).
+        return x[torch.arange(x.shape[0]), text.argmax(dim=-1)] @ self.text_projection
+
+
+def load_clip_text_encoder(
+    clip_name: str, device: torch.device, download_root: str
+) -> CLIPTextEncoder:
+    """
+    Load only the text encoder of a pre-trained CLIP model.
+
+    The full model is loaded with clip.load() once, and its text weights are
+    saved next to the checkpoint, so later loads never read the vision tower.
+    Weights follow clip.load(): half precision, except on the CPU.
+    """
+    import clip
+    from clip.model import convert_weights
+
+    text_path = os.path.join(download_root, f"{clip_name.replace('/', '-')}-text.pt")
+    if os.path.exists(text_path):
+        state_dict = torch.load(text_path, map_location="cpu")
+    else:
+        full_model, _ = clip.load(clip_name, device="cpu", jit=False, download_root=download_root)
+        state_dict = {
+            k: v for k, v in full_model.state_dict().items() if k.startswith(_CLIP_TEXT_KEYS)
+        }
+        del full_model
+        tmp_path = f"{text_path}.tmp-{os.getpid()}"
+        torch.save(state_dict, tmp_path)
+        os.replace(tmp_path, text_path)
+
+    model = CLIPTextEncoder(state_dict)
+    convert_weights(model)
+    model = model.to(device)
+    if str(device) == "cpu":
+        model.float()
+    return model.eval()
+
+
 class ImageCLIP(nn.Module):
     """
     A wrapper around a pre-trained CLIP model that automatically handles
@@ -23,20 +257,34 @@ class ImageCLIP(nn.Module):
         ensure_used_params: bool = True,
         clip_name: str = "ViT-L/14",
         cache_dir: Optional[str] = None,
+        text_only: bool = False,
     ):
+        """
+        :param text_only: if True, load only the text half of CLIP (see
+                          load_clip_text_encoder()). Image inputs are then
+                          unsupported.
+        """
         super().__init__()
 
         assert clip_name in ["ViT-L/14", "ViT-B/32"]
 
         self.device = device
         self.ensure_used_params = ensure_used_params
+        self.text_only = text_only
+        self.text_cache: Optional[TextEmbeddingCache] = None
 
         # Lazy import because of torchvision.
         import clip
 
-        self.clip_model, self.preprocess = clip.load(
-            clip_name, device=device, download_root=cache_dir or default_cache_dir()
-        )
+        if text_only:
+            self.clip_model = load_clip_text_encoder(
+                clip_name, device=device, download_root=cache_dir or default_cache_dir()
+            )
+            self.preprocess = None
+        else:
+            self.clip_model, self.preprocess = clip.load(
+                clip_name, device=device, download_root=cache_dir or default_cache_dir()
+            )
         self.clip_name = clip_name
 
         if dtype is not None:
@@ -168,11 +416,55 @@ class ImageCLIP(nn.Module):
     def embed_text(self, prompts: Iterable[str]) -> torch.Tensor:
         """
         Embed text prompts as an [N x D] tensor.
+
+        Identical prompts are only encoded once, and prompts found in
+        `text_cache` (if set) skip the text encoder entirely.
+        """
+        prompts = list(prompts)
+        namespace = self.text_cache_namespace()
+        keys = [TextEmbeddingCache.make_key(namespace, prompt) for prompt in prompts]
+
+        embs: Dict[str, torch.Tensor] = {}
+        if self.text_cache is not None:
+            for key in set(keys):
+                emb = self.text_cache.get(key)
+                if emb is not None:
+                    embs[key] = emb.to(self.device)
+
+        missing: Dict[str, str] = {}
+        for key, prompt in zip(keys, prompts):
+            if key not in embs:
+                missing.setdefault(key, prompt)
+        if missing:
+            enc = self.clip_model.encode_text(
+                self._tokenize(list(missing.values()), truncate=True).to(self.device)
+            ).float()
+            enc = enc / torch.linalg.norm(enc, dim=-1, keepdim=True)
+            for key, emb in zip(missing.keys(), enc):
+                embs[key] = emb
+                if self.text_cache is not None:
+                    self.text_cache.put(key, emb)
+
+        return torch.stack([embs[key] for key in keys], dim=0)
+
+    def text_cache_namespace(self) -> str:
         """
-        enc = self.clip_model.encode_text(
-            self._tokenize(list(prompts), truncate=True).to(self.device)
-        ).float()
-        return enc / torch.linalg.norm(enc, dim=-1, keepdim=True)
+        Describe the text encoder as it would run now: CLIP model, weight
+        dtype and the active autocast dtype, if any.
+        """
+        device_type = torch.device(self.device).type
+        if hasattr(torch, "get_autocast_dtype"):
+            enabled = torch.is_autocast_enabled(device_type)
+            autocast_dtype = torch.get_autocast_dtype(device_type)
+        elif device_type == "cpu":
+            enabled = torch.is_autocast_cpu_enabled()
+            autocast_dtype = torch.get_autocast_cpu_dtype()
+        else:
+            enabled = torch.is_autocast_enabled()
+            autocast_dtype = torch.get_autocast_gpu_dtype()
+        autocast = str(autocast_dtype).replace("torch.", "") if enabled else "none"
+        weights = str(self.clip_model.dtype).replace("torch.", "")
+        return f"{self.clip_name}/{weights}/autocast-{autocast}"
 
     def embed_images_grid(self, xs: Iterable[Optional[ImageType]]) -> torch.Tensor:
         """
@@ -213,6 +505,7 @@ class ImageCLIP(nn.Module):
         return x[..., 1:].contiguous().float() + extra_value
 
     def images_to_tensor(self, xs: Iterable[Optional[ImageType]]) -> torch.Tensor:
+        assert not self.text_only, "image inputs are unsupported by a text-only CLIP"
         return torch.stack([self.preprocess(_image_to_pil(x)) for x in xs], dim=0).to(self.device)
 
 
@@ -234,6 +527,14 @@ class FrozenImageCLIP:
     def grid_feature_dim(self) -> int:
         return self.model.grid_feature_dim
 
+    @property
+    def text_cache(self) -> Optional[TextEmbeddingCache]:
+        return self.model.text_cache
+
+    @text_cache.setter
+    def text_cache(self, cache: Optional[TextEmbeddingCache]):
+        self.model.text_cache = cache
+
     def __call__(
         self,
         batch_size: int,
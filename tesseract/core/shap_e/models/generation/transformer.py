@@ -3,6 +3,7 @@ from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 from shap_e.models.nn.checkpoint import checkpoint
 
@@ -16,6 +17,48 @@ def init_linear(l, stddev):
         nn.init.constant_(l.bias, 0.0)
 
 
+def multihead_attention(q: torch.Tensor, k: torch.Tensor, v: torch.Tensor) -> torch.Tensor:
+    """
+    Softmax attention scaled by 1/sqrt(C), computed independently per head.
+
+    Uses the fused `scaled_dot_product_attention` kernels when torch provides
+    them, which avoid materializing the [N x H x T x S] weight tensor, and the
+    reference einsum implementation otherwise.
+
+    :param q: an [N x T x H x C] tensor of queries.
+    :param k: an [N x S x H x C] tensor of keys.
+    :param v: an [N x S x H x C] tensor of values.
+    :return: an [N x T x (H * C)] tensor.
+    """
+    if not hasattr(F, "scaled_dot_product_attention"):
+        return _einsum_attention(q, k, v)
+
+    bs, n_ctx = q.shape[:2]
+    # q, k and v are strided views into the fused qkv projection. The CPU
+    # flash kernel needs dense [N x H x T x C] inputs and otherwise falls back
+    # to the unfused math kernel, so pay for one copy here.
+    out = F.scaled_dot_product_attention(
+        q.permute(0, 2, 1, 3).contiguous(),
+        k.permute(0, 2, 1, 3).contiguous(),
+        v.permute(0, 2, 1, 3).contiguous(),
+    )
+    return out.permute(0, 2, 1, 3).reshape(bs, n_ctx, -1)
+
+
+def _einsum_attention(q: torch.Tensor, k: torch.Tensor, v: torch.Tensor) -> torch.Tensor:
+    """
+    The reference implementation of multihead_attention().
+    """
+    bs, n_ctx = q.shape[:2]
+    scale = 1 / math.sqrt(math.sqrt(q.shape[-1]))
+    weight = torch.einsum(
+        "bthc,bshc->bhts", q * scale, k * scale
+    )  # More stable with f16 than dividing afterwards
+    wdtype = weight.dtype
+    weight = torch.softmax(weight.float(), dim=-1).type(wdtype)
+    return torch.einsum("bhts,bshc->bthc", weight, v).reshape(bs, n_ctx, -1)
+
+
 class MultiheadAttention(nn.Module):
     def __init__(
         self,
@@ -69,15 +112,9 @@ class QKVMultiheadAttention(nn.Module):
     def forward(self, qkv):
         bs, n_ctx, width = qkv.shape
         attn_ch = width // self.heads // 3
-        scale = 1 / math.sqrt(math.sqrt(attn_ch))
         qkv = qkv.view(bs, n_ctx, self.heads, -1)
         q, k, v = torch.split(qkv, attn_ch, dim=-1)
-        weight = torch.einsum(
-            "bthc,bshc->bhts", q * scale, k * scale
-        )  # More stable with f16 than dividing afterwards
-        wdtype = weight.dtype
-        weight = torch.softmax(weight.float(), dim=-1).type(wdtype)
-        return torch.einsum("bhts,bshc->bthc", weight, v).reshape(bs, n_ctx, -1)
+        return multihead_attention(q, k, v)
 
 
 class ResidualAttentionBlock(nn.Module):
@@ -246,14 +283,22 @@ class CLIPImagePointDiffusionTransformer(PointDiffusionTransformer):
         token_cond: bool = False,
         cond_drop_prob: float = 0.0,
         frozen_clip: bool = True,
+        clip_text_only: bool = False,
         **kwargs,
     ):
+        """
+        :param clip_text_only: if True, only load the CLIP text encoder. The
+                               model can then only be conditioned on texts
+                               or precomputed embeddings.
+        """
         super().__init__(
             device=device, dtype=dtype, n_ctx=n_ctx + int(token_cond), pos_emb_n_ctx=n_ctx, **kwargs
         )
         self.n_ctx = n_ctx
         self.token_cond = token_cond
-        self.clip = (FrozenImageCLIP if frozen_clip else ImageCLIP)(device)
+        self.clip = (FrozenImageCLIP if frozen_clip else ImageCLIP)(
+            device, text_only=clip_text_only
+        )
         self.clip_embed = nn.Linear(
             self.clip.feature_dim, self.backbone.width, device=device, dtype=dtype
         )
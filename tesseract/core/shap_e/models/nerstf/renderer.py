@@ -1,5 +1,5 @@
 from functools import partial
-from typing import Any, Dict, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import torch
 
@@ -10,9 +10,14 @@ from shap_e.models.nn.utils import to_torch
 from shap_e.models.query import Query
 from shap_e.models.renderer import RayRenderer, render_views_from_rays
 from shap_e.models.stf.base import Model
-from shap_e.models.stf.renderer import STFRendererBase, render_views_from_stf
+from shap_e.models.stf.renderer import (
+    STFRendererBase,
+    decode_meshes_from_stf,
+    render_views_from_stf,
+)
 from shap_e.models.volume import BoundingBoxVolume, Volume
 from shap_e.rendering.blender.constants import BASIC_AMBIENT_COLOR, BASIC_DIFFUSE_COLOR
+from shap_e.rendering.torch_mesh import TorchMesh
 from shap_e.util.collections import AttrDict
 
 
@@ -266,6 +271,61 @@ class NeRSTFRenderer(RayRenderer, STFRendererBase):
 
         return output
 
+    def decode_to_mesh(
+        self,
+        params: Optional[Dict] = None,
+        options: Optional[AttrDict] = None,
+        query_batch_size: int = 4096,
+    ) -> List[TorchMesh]:
+        """
+        Extract one textured mesh per meta-batch element using only the STF
+        fields, skipping camera setup and rasterization entirely.
+
+        :param params: Meta parameters, e.g. from `bottleneck_to_params`
+        :param options: controls checkpointing and caching. If
+                        `options.sdf_grid_size` is set, it replaces the
+                        renderer's grid_size as the SDF sampling resolution.
+        :return: a list of TorchMesh with vertex_channels set
+        """
+        # Meta parameters produced by the encoder carry the meta-batch dimension.
+        batch_size = len(next(iter(params.values()))) if params else 1
+        params = self.update(params)
+        options = AttrDict() if options is None else AttrDict(options)
+        options.rendering_mode = "stf"
+
+        sdf_fn = tf_fn = nerstf_fn = None
+        if self.nerstf is not None:
+            nerstf_fn = partial(
+                self.nerstf.forward_batched,
+                params=subdict(params, "nerstf"),
+                options=options,
+            )
+        else:
+            sdf_fn = partial(
+                self.sdf.forward_batched,
+                params=subdict(params, "sdf"),
+                options=options,
+            )
+            tf_fn = partial(
+                self.tf.forward_batched,
+                params=subdict(params, "tf"),
+                options=options,
+            )
+        decoded = decode_meshes_from_stf(
+            options,
+            sdf_fn=sdf_fn,
+            tf_fn=tf_fn,
+            nerstf_fn=nerstf_fn,
+            volume=self.volume,
+            grid_size=options.get("sdf_grid_size") or self.grid_size,
+            batch_size=batch_size,
+            query_batch_size=query_batch_size,
+            texture_channels=self.texture_channels,
+            output_srgb=self.output_srgb,
+            device=self.device,
+        )
+        return decoded.raw_meshes
+
     def get_signed_distance(
         self,
         query: Query,
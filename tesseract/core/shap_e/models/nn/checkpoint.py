@@ -18,8 +18,12 @@ def checkpoint(
     :param params: a sequence of parameters `func` depends on but does not
                    explicitly take as arguments.
     :param flag: if False, disable gradient checkpointing.
+
+    When gradients are disabled (e.g. under `torch.inference_mode()`), there is
+    no backward pass to recompute for, so `func` is called directly and the
+    autograd.Function machinery is skipped.
     """
-    if flag:
+    if flag and torch.is_grad_enabled():
         args = tuple(inputs) + tuple(params)
         return CheckpointFunction.apply(func, len(inputs), *args)
     else:
@@ -14,7 +14,7 @@ from shap_e.models.query import Query
 from shap_e.models.renderer import Renderer, get_camera_from_batch
 from shap_e.models.volume import BoundingBoxVolume, Volume
 from shap_e.rendering.blender.constants import BASIC_AMBIENT_COLOR, BASIC_DIFFUSE_COLOR
-from shap_e.rendering.mc import marching_cubes
+from shap_e.rendering.mc import sparse_marching_cubes
 from shap_e.rendering.torch_mesh import TorchMesh
 from shap_e.rendering.view_data import ProjectiveCamera
 from shap_e.util.collections import AttrDict
@@ -103,6 +103,37 @@ class STFRenderer(Renderer, STFRendererBase):
             device=self.device,
         )
 
+    def decode_to_mesh(
+        self,
+        params: Optional[Dict] = None,
+        options: Optional[Dict] = None,
+        query_batch_size: int = 4096,
+    ) -> List[TorchMesh]:
+        """
+        Extract one textured mesh per meta-batch element without rendering
+        any views. `options.sdf_grid_size`, if set, replaces the renderer's
+        grid_size as the SDF sampling resolution.
+        """
+        # Meta parameters produced by the encoder carry the meta-batch dimension.
+        batch_size = len(next(iter(params.values()))) if params else 1
+        params = self.update(params)
+        options = AttrDict() if not options else AttrDict(options)
+
+        decoded = decode_meshes_from_stf(
+            options,
+            sdf_fn=partial(self.sdf.forward_batched, params=subdict(params, "sdf")),
+            tf_fn=partial(self.tf.forward_batched, params=subdict(params, "tf")),
+            nerstf_fn=None,
+            volume=self.volume,
+            grid_size=options.get("sdf_grid_size") or self.grid_size,
+            batch_size=batch_size,
+            query_batch_size=query_batch_size,
+            texture_channels=self.texture_channels,
+            output_srgb=self.output_srgb,
+            device=self.device,
+        )
+        return decoded.raw_meshes
+
     def get_signed_distance(
         self,
         query: Query,
@@ -179,72 +210,25 @@ def render_views_from_stf(
         mesh_mask = options.cache.mesh_mask
     else:
         query_batch_size = batch.get("query_batch_size", batch.get("ray_batch_size", 4096))
-        query_points = volume_query_points(volume, grid_size)
-        fn = nerstf_fn if sdf_fn is None else sdf_fn
-        sdf_out = fn(
-            query=Query(position=query_points[None].repeat(batch_size, 1, 1)),
-            query_batch_size=query_batch_size,
-            options=options,
-        )
-        raw_signed_distance = sdf_out.signed_distance
-        raw_density = None
-        if "density" in sdf_out:
-            raw_density = sdf_out.density
-        with torch.autocast(device_type, enabled=False):
-            fields = sdf_out.signed_distance.float()
-            raw_signed_distance = sdf_out.signed_distance
-            assert (
-                len(fields.shape) == 3 and fields.shape[-1] == 1
-            ), f"expected [meta_batch x inner_batch] SDF results, but got {fields.shape}"
-            fields = fields.reshape(batch_size, *([grid_size] * 3))
-
-            # Force a negative border around the SDFs to close off all the models.
-            full_grid = torch.zeros(
-                batch_size,
-                grid_size + 2,
-                grid_size + 2,
-                grid_size + 2,
-                device=fields.device,
-                dtype=fields.dtype,
-            )
-            full_grid.fill_(-1.0)
-            full_grid[:, 1:-1, 1:-1, 1:-1] = fields
-            fields = full_grid
-
-            raw_meshes = []
-            mesh_mask = []
-            for field in fields:
-                raw_mesh = marching_cubes(field, volume.bbox_min, volume.bbox_max - volume.bbox_min)
-                if len(raw_mesh.faces) == 0:
-                    # DDP deadlocks when there are unused parameters on some ranks
-                    # and not others, so we make sure the field is a dependency in
-                    # the graph regardless of empty meshes.
-                    vertex_dependency = field.mean()
-                    raw_mesh = TorchMesh(
-                        verts=torch.zeros(3, 3, device=device) + vertex_dependency,
-                        faces=torch.tensor([[0, 1, 2]], dtype=torch.long, device=device),
-                    )
-                    # Make sure we only feed back zero gradients to the field
-                    # by masking out the final renderings of this mesh.
-                    mesh_mask.append(False)
-                else:
-                    mesh_mask.append(True)
-                raw_meshes.append(raw_mesh)
-            mesh_mask = torch.tensor(mesh_mask, device=device)
-
-        max_vertices = max(len(m.verts) for m in raw_meshes)
-
-        fn = nerstf_fn if tf_fn is None else tf_fn
-        tf_out = fn(
-            query=Query(
-                position=torch.stack(
-                    [m.verts[torch.arange(0, max_vertices) % len(m.verts)] for m in raw_meshes],
-                    dim=0,
-                )
-            ),
+        decoded = decode_meshes_from_stf(
+            options,
+            sdf_fn=sdf_fn,
+            tf_fn=tf_fn,
+            nerstf_fn=nerstf_fn,
+            volume=volume,
+            grid_size=grid_size,
+            batch_size=batch_size,
             query_batch_size=query_batch_size,
-            options=options,
+            texture_channels=texture_channels,
+            output_srgb=output_srgb,
+            device=device,
         )
+        fields = decoded.fields
+        raw_meshes = decoded.raw_meshes
+        raw_signed_distance = decoded.raw_signed_distance
+        raw_density = decoded.raw_density
+        mesh_mask = decoded.mesh_mask
+        tf_out = decoded.tf_out
 
         if "cache" in options:
             options.cache.fields = fields
@@ -253,19 +237,6 @@ def render_views_from_stf(
             options.cache.raw_density = raw_density
             options.cache.mesh_mask = mesh_mask
 
-    if output_srgb:
-        tf_out.channels = _convert_srgb_to_linear(tf_out.channels)
-
-    # Make sure the raw meshes have colors.
-    with torch.autocast(device_type, enabled=False):
-        textures = tf_out.channels.float()
-        assert len(textures.shape) == 3 and textures.shape[-1] == len(
-            texture_channels
-        ), f"expected [meta_batch x inner_batch x texture_channels] field results, but got {textures.shape}"
-        for m, texture in zip(raw_meshes, textures):
-            texture = texture[: len(m.verts)]
-            m.vertex_channels = {name: ch for name, ch in zip(texture_channels, texture.unbind(-1))}
-
     args = dict(
         options=options,
         texture_channels=texture_channels,
@@ -312,6 +283,149 @@ def render_views_from_stf(
     return out
 
 
+def decode_meshes_from_stf(
+    options: AttrDict[str, Any],
+    *,
+    sdf_fn: Optional[Callable],
+    tf_fn: Optional[Callable],
+    nerstf_fn: Optional[Callable],
+    volume: BoundingBoxVolume,
+    grid_size: int,
+    batch_size: int,
+    query_batch_size: int = 4096,
+    texture_channels: Sequence[str] = ("R", "G", "B"),
+    output_srgb: bool = False,
+    device: torch.device = torch.device("cuda"),
+) -> AttrDict:
+    """
+    Extract textured meshes from the SDF and texture fields without setting up
+    cameras or rendering any views.
+
+    :param options: controls checkpointing and caching
+    :param sdf_fn: returns [batch_size, query_batch_size, n_output] where
+        n_output >= 1.
+    :param tf_fn: returns [batch_size, query_batch_size, n_channels]
+    :param volume: AABB volume
+    :param grid_size: SDF sampling resolution
+    :param batch_size: number of meta-batch elements described by the params
+    :param texture_channels: what texture to predict
+
+    If `options.sdf_coarse_grid_size` is set, the SDF is evaluated
+    coarse-to-fine with `adaptive_volume_query` instead of on the dense grid.
+
+    :return: an AttrDict containing
+        raw_meshes: a list of batch_size TorchMesh with vertex_channels set
+        fields: [batch_size, grid_size + 2, grid_size + 2, grid_size + 2]
+        mesh_mask: [batch_size] bool tensor, False for empty meshes
+        raw_signed_distance, raw_density: unprocessed field outputs
+        tf_out: the texture query results at the mesh vertices
+    """
+    device_type = device.type
+
+    fn = nerstf_fn if sdf_fn is None else sdf_fn
+    coarse_grid_size = options.get("sdf_coarse_grid_size")
+    if coarse_grid_size and coarse_grid_size < grid_size:
+        sdf_out = adaptive_volume_query(
+            fn,
+            volume,
+            grid_size,
+            coarse_grid_size,
+            batch_size=batch_size,
+            query_batch_size=query_batch_size,
+            options=options,
+            band=options.get("sdf_band"),
+        )
+    else:
+        query_points = volume_query_points(volume, grid_size)
+        sdf_out = fn(
+            query=Query(position=query_points[None].repeat(batch_size, 1, 1)),
+            query_batch_size=query_batch_size,
+            options=options,
+        )
+    raw_signed_distance = sdf_out.signed_distance
+    raw_density = None
+    if "density" in sdf_out:
+        raw_density = sdf_out.density
+    with torch.autocast(device_type, enabled=False):
+        fields = sdf_out.signed_distance.float()
+        assert (
+            len(fields.shape) == 3 and fields.shape[-1] == 1
+        ), f"expected [meta_batch x inner_batch] SDF results, but got {fields.shape}"
+        fields = fields.reshape(batch_size, *([grid_size] * 3))
+
+        # Force a negative border around the SDFs to close off all the models.
+        full_grid = torch.zeros(
+            batch_size,
+            grid_size + 2,
+            grid_size + 2,
+            grid_size + 2,
+            device=fields.device,
+            dtype=fields.dtype,
+        )
+        full_grid.fill_(-1.0)
+        full_grid[:, 1:-1, 1:-1, 1:-1] = fields
+        fields = full_grid
+
+        raw_meshes = []
+        mesh_mask = []
+        for field in fields:
+            raw_mesh = sparse_marching_cubes(
+                field, volume.bbox_min, volume.bbox_max - volume.bbox_min
+            )
+            if len(raw_mesh.faces) == 0:
+                # DDP deadlocks when there are unused parameters on some ranks
+                # and not others, so we make sure the field is a dependency in
+                # the graph regardless of empty meshes.
+                vertex_dependency = field.mean()
+                raw_mesh = TorchMesh(
+                    verts=torch.zeros(3, 3, device=device) + vertex_dependency,
+                    faces=torch.tensor([[0, 1, 2]], dtype=torch.long, device=device),
+                )
+                # Make sure we only feed back zero gradients to the field
+                # by masking out the final renderings of this mesh.
+                mesh_mask.append(False)
+            else:
+                mesh_mask.append(True)
+            raw_meshes.append(raw_mesh)
+        mesh_mask = torch.tensor(mesh_mask, device=device)
+
+    max_vertices = max(len(m.verts) for m in raw_meshes)
+
+    fn = nerstf_fn if tf_fn is None else tf_fn
+    tf_out = fn(
+        query=Query(
+            position=torch.stack(
+                [m.verts[torch.arange(0, max_vertices) % len(m.verts)] for m in raw_meshes],
+                dim=0,
+            )
+        ),
+        query_batch_size=query_batch_size,
+        options=options,
+    )
+
+    if output_srgb:
+        tf_out.channels = _convert_srgb_to_linear(tf_out.channels)
+
+    # Make sure the raw meshes have colors.
+    with torch.autocast(device_type, enabled=False):
+        textures = tf_out.channels.float()
+        assert len(textures.shape) == 3 and textures.shape[-1] == len(
+            texture_channels
+        ), f"expected [meta_batch x inner_batch x texture_channels] field results, but got {textures.shape}"
+        for m, texture in zip(raw_meshes, textures):
+            texture = texture[: len(m.verts)]
+            m.vertex_channels = {name: ch for name, ch in zip(texture_channels, texture.unbind(-1))}
+
+    return AttrDict(
+        raw_meshes=raw_meshes,
+        fields=fields,
+        mesh_mask=mesh_mask,
+        raw_signed_distance=raw_signed_distance,
+        raw_density=raw_density,
+        tf_out=tf_out,
+    )
+
+
 def _render_with_pytorch3d(
     options: AttrDict,
     texture_channels: Sequence[str],
@@ -505,3 +619,96 @@ def volume_query_points(
     return (combined.float() / (grid_size - 1)) * (
         volume.bbox_max - volume.bbox_min
     ) + volume.bbox_min
+
+
+def adaptive_volume_query(
+    fn: Callable,
+    volume: Volume,
+    grid_size: int,
+    coarse_grid_size: int,
+    *,
+    batch_size: int,
+    query_batch_size: int = 4096,
+    options: Optional[AttrDict[str, Any]] = None,
+    band: Optional[float] = None,
+) -> AttrDict:
+    """
+    Evaluate an SDF on the `volume_query_points` grid coarse-to-fine.
+
+    The field is first queried on a coarse lattice whose points are a subset
+    of the fine grid. Coarse cells with a sign change or with |SDF| below
+    `band` at any corner (dilated by one cell) are refined by querying every
+    fine point inside them. All other fine points are filled with the mean of
+    their coarse cell's corners, which has the correct sign but is not an
+    exact SDF value. Since every fine cube lies inside a single coarse cell,
+    marching cubes sees exact values wherever the surface is.
+
+    For a true distance field the result matches the dense grid. Learned
+    fields are not exact distances, so a feature thinner than one coarse cell
+    can be lost when it lies between coarse points that all have the same sign
+    and |SDF| above `band`.
+
+    :param fn: a forward_batched style function returning signed_distance.
+    :param band: |SDF| threshold for refinement. Defaults to two coarse cells.
+    :return: an AttrDict with signed_distance of shape
+        [batch_size, grid_size**3, 1], ordered like `volume_query_points`.
+    """
+    assert isinstance(volume, BoundingBoxVolume)
+    device = volume.bbox_min.device
+    step = max(1, (grid_size - 1) // (coarse_grid_size - 1))
+    coarse_idx = torch.arange(0, grid_size, step, device=device)
+    if coarse_idx[-1] != grid_size - 1:
+        coarse_idx = torch.cat([coarse_idx, coarse_idx.new_tensor([grid_size - 1])])
+    n_coarse = len(coarse_idx)
+    if band is None:
+        band = 2.0 * step / (grid_size - 1) * float((volume.bbox_max - volume.bbox_min).max())
+
+    def query(indices: torch.Tensor) -> torch.Tensor:
+        # Same arithmetic as volume_query_points, so values match the dense grid.
+        position = (indices.float() / (grid_size - 1)) * (
+            volume.bbox_max - volume.bbox_min
+        ) + volume.bbox_min
+        out = fn(
+            query=Query(position=position[None].repeat(batch_size, 1, 1)),
+            query_batch_size=query_batch_size,
+            options=options,
+        )
+        return out.signed_distance.float().reshape(batch_size, -1)
+
+    coarse_xyz = torch.stack(torch.meshgrid(coarse_idx, coarse_idx, coarse_idx, indexing="ij"), -1)
+    coarse = query(coarse_xyz.reshape(-1, 3)).reshape(batch_size, *([n_coarse] * 3))
+
+    # Find coarse cells that may contain the surface, shared across the batch
+    # so that the fine queries stay one meta-batch.
+    def cell_max(x: torch.Tensor) -> torch.Tensor:
+        return F.max_pool3d(x[:, None], kernel_size=2, stride=1)[:, 0]
+
+    any_pos = cell_max((coarse > 0).float())
+    any_neg = cell_max((coarse <= 0).float())
+    near = cell_max(-coarse.abs()) > -band
+    active = ((any_pos * any_neg) > 0) | near
+    active = active.any(0).float()
+    active = F.max_pool3d(active[None, None], kernel_size=3, stride=1, padding=1)[0, 0]
+
+    # Map active cells to the fine points they contain (boundaries inclusive).
+    fine_idx = torch.arange(grid_size, device=device)
+    members = (
+        (coarse_idx[:-1, None] <= fine_idx[None]) & (fine_idx[None] <= coarse_idx[1:, None])
+    ).float()
+    fine_mask = torch.einsum("abc,ai->ibc", active, members)
+    fine_mask = torch.einsum("ibc,bj->ijc", fine_mask, members)
+    fine_mask = torch.einsum("ijc,ck->ijk", fine_mask, members) > 0
+
+    # Fill every point with its coarse cell's mean, then overwrite refined points.
+    cell_mean = F.avg_pool3d(coarse[:, None], kernel_size=2, stride=1)[:, 0]
+    cell_of = (torch.searchsorted(coarse_idx, fine_idx, right=True) - 1).clamp(0, n_coarse - 2)
+    field = cell_mean[:, cell_of][:, :, cell_of][:, :, :, cell_of].reshape(batch_size, -1)
+
+    flat_active = fine_mask.reshape(-1).nonzero()[:, 0]
+    if len(flat_active):
+        zs = flat_active % grid_size
+        ys = torch.div(flat_active, grid_size, rounding_mode="trunc") % grid_size
+        xs = torch.div(flat_active, grid_size**2, rounding_mode="trunc") % grid_size
+        field[:, flat_active] = query(torch.stack([xs, ys, zs], dim=1))
+
+    return AttrDict(signed_distance=field[..., None])
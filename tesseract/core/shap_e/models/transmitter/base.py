@@ -177,10 +177,17 @@ class ChannelsDecoder(VectorDecoder):
     def __init__(
         self,
         *,
-        latent_ctx: int,
+        latent_ctx: Optional[int] = None,
         **kwargs,
     ):
+        """
+        :param latent_ctx: number of latent channels. If None, it is derived
+                           from the renderer's parameter shapes, exactly as
+                           ChannelsEncoder does.
+        """
         super().__init__(**kwargs)
+        if latent_ctx is None:
+            latent_ctx = sum(flat[0] for flat in flatten_param_shapes(self.param_shapes).values())
         self.latent_ctx = latent_ctx
 
     def bottleneck_to_channels(
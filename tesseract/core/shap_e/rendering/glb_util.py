@@ -0,0 +1,112 @@
+import json
+import struct
+from typing import BinaryIO, Optional
+
+import numpy as np
+
+from shap_e.util.io import buffered_writer
+
+GLB_MAGIC = 0x46546C67  # "glTF"
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A  # "JSON"
+CHUNK_BIN = 0x004E4942  # "BIN\0"
+
+FLOAT = 5126
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+
+def write_glb(
+    raw_f: BinaryIO,
+    coords: np.ndarray,
+    rgb: Optional[np.ndarray] = None,
+    faces: Optional[np.ndarray] = None,
+):
+    """
+    Write a binary glTF (GLB) file for a mesh or a point cloud.
+
+    Position, COLOR_0 and index buffers are written directly from the given
+    arrays, without merging vertices or any other mesh processing. Indices
+    use unsigned shorts when every vertex fits, and unsigned ints otherwise.
+
+    :param coords: an [N x 3] array of floating point coordinates.
+    :param rgb: an [N x 3] array of linear vertex colors, in the range [0.0, 1.0].
+    :param faces: an [N x 3] array of triangles encoded as integer indices.
+    """
+    blocks = [np.ascontiguousarray(coords, dtype="<f4")]
+    if rgb is not None:
+        blocks.append(np.ascontiguousarray(rgb, dtype="<f4"))
+    if faces is not None:
+        index_dtype = "<u2" if len(coords) <= 0xFFFF else "<u4"
+        blocks.append(np.ascontiguousarray(faces, dtype=index_dtype))
+
+    buffer_views = []
+    offset = 0
+    for i, block in enumerate(blocks):
+        is_index = faces is not None and i == len(blocks) - 1
+        buffer_views.append(
+            dict(
+                buffer=0,
+                byteOffset=offset,
+                byteLength=block.nbytes,
+                target=ELEMENT_ARRAY_BUFFER if is_index else ARRAY_BUFFER,
+            )
+        )
+        offset += _pad4(block.nbytes)
+    bin_length = offset
+
+    accessors = [
+        dict(
+            bufferView=0,
+            componentType=FLOAT,
+            count=len(blocks[0]),
+            type="VEC3",
+            min=blocks[0].min(axis=0).tolist() if len(blocks[0]) else [0.0] * 3,
+            max=blocks[0].max(axis=0).tolist() if len(blocks[0]) else [0.0] * 3,
+        )
+    ]
+    attributes = dict(POSITION=0)
+    if rgb is not None:
+        attributes["COLOR_0"] = len(accessors)
+        accessors.append(dict(bufferView=1, componentType=FLOAT, count=len(blocks[1]), type="VEC3"))
+    primitive = dict(attributes=attributes, mode=TRIANGLES if faces is not None else 0)
+    if faces is not None:
+        primitive["indices"] = len(accessors)
+        accessors.append(
+            dict(
+                bufferView=len(blocks) - 1,
+                componentType=UNSIGNED_SHORT if blocks[-1].dtype == np.uint16 else UNSIGNED_INT,
+                count=blocks[-1].size,
+                type="SCALAR",
+            )
+        )
+
+    gltf = dict(
+        asset=dict(version="2.0", generator="shap_e"),
+        scene=0,
+        scenes=[dict(nodes=[0])],
+        nodes=[dict(mesh=0)],
+        meshes=[dict(primitives=[primitive])],
+        buffers=[dict(byteLength=bin_length)],
+        bufferViews=buffer_views,
+        accessors=accessors,
+    )
+    json_bytes = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_bytes += b" " * (_pad4(len(json_bytes)) - len(json_bytes))
+
+    with buffered_writer(raw_f) as f:
+        total_length = 12 + 8 + len(json_bytes) + 8 + bin_length
+        f.write(struct.pack("<III", GLB_MAGIC, GLB_VERSION, total_length))
+        f.write(struct.pack("<II", len(json_bytes), CHUNK_JSON))
+        f.write(json_bytes)
+        f.write(struct.pack("<II", bin_length, CHUNK_BIN))
+        for block in blocks:
+            f.write(block.reshape(-1).view(np.uint8))
+            f.write(b"\x00" * (_pad4(block.nbytes) - block.nbytes))
+
+
+def _pad4(n: int) -> int:
+    return (n + 3) & ~3
@@ -121,6 +121,108 @@ def marching_cubes(
     return TorchMesh(verts=verts, faces=selected_tris)
 
 
+def sparse_marching_cubes(
+    field: torch.Tensor,
+    min_point: torch.Tensor,
+    size: torch.Tensor,
+) -> TorchMesh:
+    """
+    A memory-lean variant of marching_cubes() which only builds per-cube data
+    for cubes that intersect the surface. Peak memory scales with the surface
+    area rather than the grid volume, and the resulting mesh is identical to
+    the one produced by marching_cubes().
+
+    :param field: a 3D tensor of field values, where negative values correspond
+                  to the outside of the shape. The dimensions correspond to the
+                  x, y, and z directions, respectively.
+    :param min_point: a tensor of shape [3] containing the point corresponding
+                      to (0, 0, 0) in the field.
+    :param size: a tensor of shape [3] containing the per-axis distance from the
+                 (0, 0, 0) field corner and the (-1, -1, -1) field corner.
+    """
+    assert len(field.shape) == 3, "input must be a 3D scalar field"
+    dev = field.device
+
+    grid_size = field.shape
+    grid_size_tensor = torch.tensor(grid_size).to(size)
+    lut = _lookup_table(dev)
+
+    bitmasks = (field > 0).to(torch.uint8)
+    bitmasks = bitmasks[:-1, :, :] | (bitmasks[1:, :, :] << 1)
+    bitmasks = bitmasks[:, :-1, :] | (bitmasks[:, 1:, :] << 2)
+    bitmasks = bitmasks[:, :, :-1] | (bitmasks[:, :, 1:] << 4)
+
+    # Compact to the cubes that are neither fully inside nor fully outside.
+    flat_bitmasks = bitmasks.reshape(-1)
+    active = ((flat_bitmasks != 0) & (flat_bitmasks != 255)).nonzero()[:, 0]
+    cases = flat_bitmasks[active].long()
+    ny, nz = grid_size[1] - 1, grid_size[2] - 1
+    flat_cube_indices = torch.stack(
+        [
+            torch.div(active, ny * nz, rounding_mode="trunc"),
+            torch.div(active, nz, rounding_mode="trunc") % ny,
+            active % nz,
+        ],
+        dim=-1,
+    )
+
+    edge_indices = _create_flat_edge_indices(flat_cube_indices, grid_size)
+    local_tris = lut.cases[cases]
+    local_masks = lut.masks[cases]
+    global_tris = torch.gather(
+        edge_indices, 1, local_tris.reshape(local_tris.shape[0], -1)
+    ).reshape(local_tris.shape)
+    selected_tris = global_tris.reshape(-1, 3)[local_masks.reshape(-1)]
+
+    # Deduplicate the global edge ids with torch.unique, so edges shared by
+    # neighbouring cubes collapse to a single vertex.
+    used_edge_indices, new_indices = torch.unique(selected_tris.view(-1), return_inverse=True)
+    selected_tris = new_indices.reshape(selected_tris.shape)
+
+    v1, v2 = _edge_endpoints(used_edge_indices, grid_size)
+    s1 = field[v1[:, 0], v1[:, 1], v1[:, 2]]
+    s2 = field[v2[:, 0], v2[:, 1], v2[:, 2]]
+    p1 = (v1.float() / (grid_size_tensor - 1)) * size + min_point
+    p2 = (v2.float() / (grid_size_tensor - 1)) * size + min_point
+    # The signs of s1 and s2 should be different. We want to find
+    # t such that t*s2 + (1-t)*s1 = 0.
+    t = (s1 / (s1 - s2))[:, None]
+    verts = t * p2 + (1 - t) * p1
+
+    return TorchMesh(verts=verts, faces=selected_tris)
+
+
+def _edge_endpoints(
+    edge_indices: torch.Tensor, grid_size: Tuple[int, int, int]
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Invert _create_flat_edge_indices(), returning the lower and upper corner
+    coordinates of each global edge index.
+    """
+    x, y, z = grid_size
+    num_xs = (x - 1) * y * z
+    num_ys = x * (y - 1) * z
+    is_x = edge_indices < num_xs
+    is_y = (~is_x) & (edge_indices < num_xs + num_ys)
+    is_z = ~(is_x | is_y)
+
+    # Each axis block is a flattened [X', Y', Z'] grid of edge start corners.
+    local = torch.where(is_x, edge_indices, edge_indices - num_xs)
+    local = torch.where(is_z, local - num_ys, local)
+    dim_y = y - is_y.long()
+    dim_z = z - is_z.long()
+    corner = torch.stack(
+        [
+            torch.div(local, dim_y * dim_z, rounding_mode="trunc"),
+            torch.div(local, dim_z, rounding_mode="trunc") % dim_y,
+            local % dim_z,
+        ],
+        dim=-1,
+    )
+    offset = torch.stack([is_x, is_y, is_z], dim=-1).long()
+    return corner, corner + offset
+
+
 def _create_flat_edge_indices(
     flat_cube_indices: torch.Tensor, grid_size: Tuple[int, int, int]
 ) -> torch.Tensor:
@@ -1,9 +1,11 @@
 from dataclasses import dataclass, field
-from typing import BinaryIO, Dict, Optional, Union
+from typing import BinaryIO, Dict, Optional, TextIO, Union
 
 import blobfile as bf
 import numpy as np
 
+from .glb_util import write_glb
+from .obj_util import write_obj
 from .ply_util import write_ply
 
 
@@ -87,21 +89,26 @@ class TriMesh:
             faces=self.faces,
         )
 
-    def write_obj(self, raw_f: BinaryIO):
-        if self.has_vertex_colors():
-            vertex_colors = np.stack([self.vertex_channels[x] for x in "RGB"], axis=1)
-            vertices = [
-                "{} {} {} {} {} {}".format(*coord, *color)
-                for coord, color in zip(self.verts.tolist(), vertex_colors.tolist())
-            ]
-        else:
-            vertices = ["{} {} {}".format(*coord) for coord in self.verts.tolist()]
-
-        faces = [
-            "f {} {} {}".format(str(tri[0] + 1), str(tri[1] + 1), str(tri[2] + 1))
-            for tri in self.faces.tolist()
-        ]
-
-        combined_data = ["v " + vertex for vertex in vertices] + faces
+    def write_glb(self, raw_f: BinaryIO):
+        write_glb(
+            raw_f,
+            coords=self.verts,
+            rgb=(
+                np.stack([self.vertex_channels[x] for x in "RGB"], axis=1)
+                if self.has_vertex_colors()
+                else None
+            ),
+            faces=self.faces,
+        )
 
-        raw_f.writelines("\n".join(combined_data))
+    def write_obj(self, raw_f: Union[BinaryIO, TextIO], vertex_colors: bool = True):
+        write_obj(
+            raw_f,
+            coords=self.verts,
+            rgb=(
+                np.stack([self.vertex_channels[x] for x in "RGB"], axis=1)
+                if vertex_colors and self.has_vertex_colors()
+                else None
+            ),
+            faces=self.faces,
+        )
@@ -0,0 +1,53 @@
+import io
+from typing import BinaryIO, Optional, TextIO, Union
+
+import numpy as np
+
+from shap_e.util.io import buffered_writer
+
+
+def write_obj(
+    raw_f: Union[BinaryIO, TextIO],
+    coords: np.ndarray,
+    rgb: Optional[np.ndarray] = None,
+    faces: Optional[np.ndarray] = None,
+    chunk_size: int = 65536,
+):
+    """
+    Write a Wavefront OBJ file for a mesh, streaming fixed-size chunks of
+    vertices and faces so the whole file is never held in memory.
+
+    Each chunk is formatted with a single string operation, rather than the
+    per-row formatting np.savetxt does. Coordinates use %.9g, which
+    round-trips float32 values exactly.
+
+    :param raw_f: a binary or text file to write to.
+    :param coords: an [N x 3] array of floating point coordinates.
+    :param rgb: an optional [N x 3] array of vertex colors, written as
+                `v x y z r g b` lines.
+    :param faces: an [N x 3] array of triangles encoded as zero-based indices.
+    """
+    if isinstance(raw_f, io.TextIOBase):
+        _write_obj_chunks(raw_f.write, coords, rgb, faces, chunk_size)
+    else:
+        with buffered_writer(raw_f) as f:
+            _write_obj_chunks(lambda s: f.write(s.encode("ascii")), coords, rgb, faces, chunk_size)
+
+
+def _write_obj_chunks(write, coords, rgb, faces, chunk_size):
+    if rgb is not None:
+        vertices = np.concatenate([coords, rgb], axis=1)
+        row = "v %.9g %.9g %.9g %.9g %.9g %.9g\n"
+    else:
+        vertices = coords
+        row = "v %.9g %.9g %.9g\n"
+    # np.savetxt applies its format once per row from a Python loop; repeating the
+    # row format over the chunk formats all of its values in one % call instead.
+    for i in range(0, len(vertices), chunk_size):
+        chunk = vertices[i : i + chunk_size]
+        write((row * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+    if faces is not None:
+        for i in range(0, len(faces), chunk_size):
+            chunk = faces[i : i + chunk_size] + 1
+            write(("f %d %d %d\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
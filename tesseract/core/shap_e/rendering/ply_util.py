@@ -1,10 +1,20 @@
-import struct
-from typing import BinaryIO, Optional
+from typing import BinaryIO, Optional, Tuple
 
 import numpy as np
 
 from shap_e.util.io import buffered_writer
 
+PLY_TYPES = {
+    "char": "i1",
+    "uchar": "u1",
+    "short": "<i2",
+    "ushort": "<u2",
+    "int": "<i4",
+    "uint": "<u4",
+    "float": "<f4",
+    "double": "<f8",
+}
+
 
 def write_ply(
     raw_f: BinaryIO,
@@ -15,6 +25,9 @@ def write_ply(
     """
     Write a PLY file for a mesh or a point cloud.
 
+    Each element block is packed into a NumPy structured array and written
+    with a single call, rather than packing one vertex or face at a time.
+
     :param coords: an [N x 3] array of floating point coordinates.
     :param rgb: an [N x 3] array of vertex colors, in the range [0.0, 1.0].
     :param faces: an [N x 3] array of triangles encoded as integer indices.
@@ -36,23 +49,69 @@ def write_ply(
         f.write(b"end_header\n")
 
         if rgb is not None:
-            rgb = (rgb * 255.499).round().astype(int)
-            vertices = [
-                (*coord, *rgb)
-                for coord, rgb in zip(
-                    coords.tolist(),
-                    rgb.tolist(),
-                )
-            ]
-            format = struct.Struct("<3f3B")
-            for item in vertices:
-                f.write(format.pack(*item))
+            vertices = np.empty(len(coords), dtype=[("xyz", "<f4", 3), ("rgb", "u1", 3)])
+            vertices["rgb"] = np.clip((rgb * 255.499).round(), 0, 255)
         else:
-            format = struct.Struct("<3f")
-            for vertex in coords.tolist():
-                f.write(format.pack(*vertex))
+            vertices = np.empty(len(coords), dtype=[("xyz", "<f4", 3)])
+        vertices["xyz"] = coords
+        f.write(vertices.tobytes())
 
         if faces is not None:
-            format = struct.Struct("<B3I")
-            for tri in faces.tolist():
-                f.write(format.pack(len(tri), *tri))
+            tris = np.empty(len(faces), dtype=[("count", "u1"), ("indices", "<i4", 3)])
+            tris["count"] = 3
+            tris["indices"] = faces
+            f.write(tris.tobytes())
+
+
+def read_ply(f: BinaryIO) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Read a binary little-endian PLY file, such as one produced by write_ply().
+
+    Faces must be triangles.
+
+    :return: a tuple (coords, rgb, faces) where rgb is an [N x 3] float array
+             in the range [0.0, 1.0] and rgb/faces are None if not present.
+    """
+    if f.readline().strip() != b"ply":
+        raise ValueError("not a PLY file")
+
+    elements = []
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("unexpected end of PLY header")
+        parts = line.decode("ascii").split()
+        if not parts or parts[0] in ("comment", "obj_info"):
+            continue
+        if parts[0] == "end_header":
+            break
+        if parts[0] == "format":
+            if parts[1] != "binary_little_endian":
+                raise ValueError(f"unsupported PLY format: {parts[1]}")
+        elif parts[0] == "element":
+            elements.append((parts[1], int(parts[2]), []))
+        elif parts[0] == "property":
+            if parts[1] == "list":
+                # Triangle lists have a fixed length, so they can be read as a
+                # count followed by three indices.
+                elements[-1][2].append(("count", PLY_TYPES[parts[2]]))
+                elements[-1][2].append((parts[4], PLY_TYPES[parts[3]], 3))
+            else:
+                elements[-1][2].append((parts[2], PLY_TYPES[parts[1]]))
+
+    data = {}
+    for name, count, fields in elements:
+        dtype = np.dtype(fields)
+        data[name] = np.frombuffer(f.read(dtype.itemsize * count), dtype=dtype, count=count)
+
+    vertices = data["vertex"]
+    coords = np.stack([vertices[x] for x in "xyz"], axis=1).astype(np.float32)
+    rgb = None
+    if all(x in vertices.dtype.names for x in ("red", "green", "blue")):
+        rgb = np.stack([vertices[x] for x in ("red", "green", "blue")], axis=1) / 255.0
+    faces = None
+    if "face" in data:
+        if not (data["face"]["count"] == 3).all():
+            raise ValueError("only triangle faces are supported")
+        faces = data["face"]["vertex_index"].astype(np.int64)
+    return coords, rgb, faces
@@ -1,6 +1,6 @@
 import base64
 import io
-from typing import Union
+from typing import List, Optional, Sequence, Union
 
 import ipywidgets as widgets
 import numpy as np
@@ -65,15 +65,50 @@ def decode_latent_images(
 def decode_latent_mesh(
     xm: Union[Transmitter, VectorDecoder],
     latent: torch.Tensor,
+    coarse_grid_size: Optional[int] = None,
+    grid_size: Optional[int] = None,
 ) -> TorchMesh:
-    decoded = xm.renderer.render_views(
-        AttrDict(cameras=create_pan_cameras(2, latent.device)),  # lowest resolution possible
+    # Only the SDF/texture fields are needed for a mesh, so skip the cameras
+    # and view rendering entirely.
+    return xm.renderer.decode_to_mesh(
         params=(xm.encoder if isinstance(xm, Transmitter) else xm).bottleneck_to_params(
             latent[None]
         ),
-        options=AttrDict(rendering_mode="stf", render_with_direction=False),
+        options=AttrDict(
+            rendering_mode="stf",
+            render_with_direction=False,
+            sdf_coarse_grid_size=coarse_grid_size,
+            sdf_grid_size=grid_size,
+        ),
+    )[0]
+
+
+@torch.no_grad()
+def decode_latent_meshes(
+    xm: Union[Transmitter, VectorDecoder],
+    latents: Union[torch.Tensor, Sequence[torch.Tensor]],
+    coarse_grid_size: Optional[int] = None,
+    grid_size: Optional[int] = None,
+) -> List[TorchMesh]:
+    """
+    Decode a batch of latents into meshes with a single params projection and
+    shared SDF/texture query chunks across the whole meta-batch.
+
+    If `coarse_grid_size` is given, the SDF is evaluated coarse-to-fine and
+    only refined near the surface. `grid_size` overrides the renderer's SDF
+    resolution.
+    """
+    if not isinstance(latents, torch.Tensor):
+        latents = torch.stack(list(latents), dim=0)
+    return xm.renderer.decode_to_mesh(
+        params=(xm.encoder if isinstance(xm, Transmitter) else xm).bottleneck_to_params(latents),
+        options=AttrDict(
+            rendering_mode="stf",
+            render_with_direction=False,
+            sdf_coarse_grid_size=coarse_grid_size,
+            sdf_grid_size=grid_size,
+        ),
     )
-    return decoded.raw_meshes[0]
 
 
 def gif_widget(images):
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The vendored shap_e package imports itself as `shap_e`, see main.py.
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), "tesseract/core"))
@@ -0,0 +1,64 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("blobfile")
+
+from shap_e.models.stf.renderer import adaptive_volume_query, volume_query_points
+from shap_e.models.volume import BoundingBoxVolume
+from shap_e.rendering.mc import marching_cubes
+from shap_e.util.collections import AttrDict
+
+
+def sphere_sdf(position, radius=0.6):
+    return radius - position.norm(dim=-1)
+
+
+def torus_sdf(position, major=0.55, minor=0.2):
+    ring = (position[..., :2].norm(dim=-1) - major) ** 2 + position[..., 2] ** 2
+    return minor - ring.sqrt()
+
+
+def scaled_torus(position):
+    # Not a distance field: values grow faster than the distance to the surface.
+    return 5.0 * torus_sdf(position)
+
+
+def field_fn(sdf):
+    def fn(query, query_batch_size, options):
+        return AttrDict(signed_distance=sdf(query.position)[..., None])
+
+    return fn
+
+
+def extract(signed_distance, volume, grid_size):
+    field = signed_distance.reshape(grid_size, grid_size, grid_size)
+    return marching_cubes(field, volume.bbox_min, volume.bbox_max - volume.bbox_min)
+
+
+def adaptive_and_dense_meshes(sdf, grid_size, coarse_grid_size):
+    volume = BoundingBoxVolume(bbox_min=[-1.0, -1.0, -1.0], bbox_max=[1.0, 1.0, 1.0],
+                               device=torch.device("cpu"))
+    fn = field_fn(sdf)
+    dense = fn(query=AttrDict(position=volume_query_points(volume, grid_size)[None]),
+               query_batch_size=4096, options=None).signed_distance
+    adaptive = adaptive_volume_query(fn, volume, grid_size, coarse_grid_size, batch_size=1)
+    return (extract(adaptive.signed_distance[0], volume, grid_size),
+            extract(dense[0], volume, grid_size))
+
+
+@pytest.mark.parametrize("sdf", [sphere_sdf, torus_sdf])
+@pytest.mark.parametrize("grid_size,coarse_grid_size", [(64, 16), (65, 17), (48, 8)])
+def test_exact_sdf_matches_dense_grid(sdf, grid_size, coarse_grid_size):
+    adaptive, dense = adaptive_and_dense_meshes(sdf, grid_size, coarse_grid_size)
+    assert len(dense.faces) > 0
+    assert torch.equal(adaptive.faces, dense.faces)
+    assert torch.allclose(adaptive.verts, dense.verts, atol=1e-6)
+
+
+def test_non_metric_field_within_one_fine_cell():
+    grid_size = 64
+    adaptive, dense = adaptive_and_dense_meshes(scaled_torus, grid_size, 16)
+    tolerance = 2.0 / (grid_size - 1)
+    assert len(adaptive.faces) > 0
+    assert torch.cdist(adaptive.verts, dense.verts).min(dim=1).values.max() <= tolerance
+    assert torch.cdist(dense.verts, adaptive.verts).min(dim=1).values.max() <= tolerance
@@ -0,0 +1,43 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from shap_e.models.generation.transformer import _einsum_attention, multihead_attention
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(torch.nn.functional, "scaled_dot_product_attention"),
+    reason="scaled_dot_product_attention is unavailable",
+)
+
+
+def random_qkv(dtype, n_data=7, seed=0):
+    '''Random queries, keys and values as strided views of fused projections, like the models use.'''
+    generator = torch.Generator().manual_seed(seed)
+    bs, n_ctx, heads, attn_ch = 2, 11, 4, 16
+    qkv = torch.randn(bs, n_ctx, heads, 3 * attn_ch, generator=generator)
+    kv = torch.randn(bs, n_data, heads, 2 * attn_ch, generator=generator)
+    q = torch.split(qkv, attn_ch, dim=-1)[0]
+    k, v = torch.split(kv, attn_ch, dim=-1)
+    return q.to(dtype), k.to(dtype), v.to(dtype)
+
+
+@pytest.mark.parametrize("n_data", [7, 11, 64])
+def test_sdpa_matches_einsum_fp32(n_data):
+    q, k, v = random_qkv(torch.float32, n_data=n_data)
+    expected = _einsum_attention(q, k, v)
+    actual = multihead_attention(q, k, v)
+    assert actual.shape == expected.shape == (2, 11, 4 * 16)
+    torch.testing.assert_close(actual, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_sdpa_matches_einsum_bf16():
+    q, k, v = random_qkv(torch.bfloat16)
+    reference = _einsum_attention(q.double(), k.double(), v.double())
+    actual = multihead_attention(q, k, v)
+    baseline = _einsum_attention(q, k, v)
+    assert actual.dtype == torch.bfloat16
+    # The fused path must be no further from the exact result than the einsum path,
+    # up to a couple of bf16 rounding steps.
+    actual_error = (actual.double() - reference).abs().max()
+    baseline_error = (baseline.double() - reference).abs().max()
+    assert actual_error <= max(2 * baseline_error, 2e-2)
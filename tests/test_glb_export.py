@@ -0,0 +1,102 @@
+import io
+import json
+import struct
+
+import numpy as np
+import pytest
+
+pytest.importorskip("blobfile")
+
+from shap_e.rendering.glb_util import (
+    CHUNK_BIN,
+    CHUNK_JSON,
+    FLOAT,
+    GLB_MAGIC,
+    UNSIGNED_INT,
+    UNSIGNED_SHORT,
+    write_glb,
+)
+
+COMPONENT_DTYPES = {FLOAT: "<f4", UNSIGNED_SHORT: "<u2", UNSIGNED_INT: "<u4"}
+TYPE_SIZES = {"SCALAR": 1, "VEC3": 3}
+
+
+def parse_glb(data):
+    '''Split a GLB file into its glTF JSON and BIN chunk, checking the container layout.'''
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    assert magic == GLB_MAGIC
+    assert version == 2
+    assert length == len(data)
+
+    json_length, json_type = struct.unpack_from("<II", data, 12)
+    assert json_type == CHUNK_JSON
+    assert json_length % 4 == 0
+    gltf = json.loads(data[20 : 20 + json_length])
+
+    bin_start = 20 + json_length
+    bin_length, bin_type = struct.unpack_from("<II", data, bin_start)
+    assert bin_type == CHUNK_BIN
+    assert bin_length % 4 == 0
+    assert bin_start + 8 + bin_length == len(data)
+    assert gltf["buffers"] == [dict(byteLength=bin_length)]
+    return gltf, data[bin_start + 8 :]
+
+
+def read_accessor(gltf, binary, index):
+    accessor = gltf["accessors"][index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    assert view["byteOffset"] % 4 == 0
+    assert view["byteOffset"] + view["byteLength"] <= len(binary)
+    values = np.frombuffer(
+        binary,
+        dtype=COMPONENT_DTYPES[accessor["componentType"]],
+        count=accessor["count"] * TYPE_SIZES[accessor["type"]],
+        offset=view["byteOffset"],
+    )
+    assert values.nbytes == view["byteLength"]
+    return accessor, values.reshape(-1, 3)
+
+
+def random_mesh(num_verts, num_faces=500, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.normal(size=(num_verts, 3)).astype(np.float32)
+    rgb = rng.uniform(size=(num_verts, 3)).astype(np.float32)
+    faces = rng.integers(0, num_verts, size=(num_faces, 3))
+    return coords, rgb, faces
+
+
+@pytest.mark.parametrize("with_rgb", [False, True])
+@pytest.mark.parametrize("num_verts,index_type", [(101, UNSIGNED_SHORT), (70000, UNSIGNED_INT)])
+def test_glb_round_trip(with_rgb, num_verts, index_type):
+    coords, rgb, faces = random_mesh(num_verts)
+    buffer = io.BytesIO()
+    write_glb(buffer, coords, rgb=rgb if with_rgb else None, faces=faces)
+    gltf, binary = parse_glb(buffer.getvalue())
+
+    primitive = gltf["meshes"][0]["primitives"][0]
+    assert primitive["mode"] == 4
+
+    position, read_coords = read_accessor(gltf, binary, primitive["attributes"]["POSITION"])
+    np.testing.assert_array_equal(read_coords, coords)
+    assert position["min"] == coords.min(axis=0).tolist()
+    assert position["max"] == coords.max(axis=0).tolist()
+
+    if with_rgb:
+        _, read_rgb = read_accessor(gltf, binary, primitive["attributes"]["COLOR_0"])
+        np.testing.assert_array_equal(read_rgb, rgb)
+    else:
+        assert "COLOR_0" not in primitive["attributes"]
+
+    indices, read_faces = read_accessor(gltf, binary, primitive["indices"])
+    assert indices["componentType"] == index_type
+    np.testing.assert_array_equal(read_faces, faces)
+
+
+def test_glb_pads_unaligned_buffers():
+    # 5 vertices and 1 u16 triangle are not multiples of 4 bytes.
+    coords, rgb, faces = random_mesh(5, num_faces=1)
+    buffer = io.BytesIO()
+    write_glb(buffer, coords, rgb=rgb, faces=faces)
+    gltf, binary = parse_glb(buffer.getvalue())
+    _, read_faces = read_accessor(gltf, binary, gltf["meshes"][0]["primitives"][0]["indices"])
+    np.testing.assert_array_equal(read_faces, faces)
@@ -0,0 +1,45 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from shap_e.diffusion.k_diffusion import KarrasDenoiser, karras_sample
+
+
+STEPS = 8
+
+
+def sample(calls, sampler="heun", **kwargs):
+    '''Run a tiny guided Karras sampling loop and record the batch size of every model call.'''
+    def model(x, t, cond):
+        calls.append(len(x))
+        return torch.tanh(0.5 * x + cond + 1e-3 * t[:, None])
+
+    torch.manual_seed(0)
+    cond = torch.cat([torch.ones(2, 4), -torch.ones(2, 4)])
+    return karras_sample(diffusion=KarrasDenoiser(), model=model, shape=(2, 4), steps=STEPS,
+                         model_kwargs=dict(cond=cond), sigma_min=0.002, sigma_max=80,
+                         sampler=sampler, guidance_scale=3.0, **kwargs)
+
+
+@pytest.mark.parametrize("sampler", ["heun", "dpm", "ancestral", "dpmpp_2m"])
+def test_full_interval_matches_unscheduled_guidance(sampler):
+    reference = sample([], sampler=sampler)
+    calls = []
+    scheduled = sample(calls, sampler=sampler, guidance_interval=(0.0, 1e9), uncond_reuse_steps=1)
+    assert torch.equal(reference, scheduled)
+    assert set(calls) == {4}
+
+
+def test_steps_outside_interval_run_conditional_batch_only():
+    calls = []
+    sample(calls, guidance_interval=(1e8, 1e9))
+    assert set(calls) == {2}
+
+
+def test_uncond_reuse_counts_sampler_steps():
+    calls = []
+    sample(calls, uncond_reuse_steps=2)
+    # Heun evaluates every step twice except the last one. Steps 0, 2, 4 and 6
+    # recompute the unconditional prediction, steps 1, 3, 5 and 7 reuse it.
+    assert calls.count(4) == 8
+    assert calls.count(2) == 7
@@ -0,0 +1,44 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("blobfile")
+
+from shap_e.rendering.mc import marching_cubes, sparse_marching_cubes
+
+
+def grid_points(grid_size):
+    axis = torch.linspace(-1, 1, grid_size)
+    return torch.stack(torch.meshgrid(axis, axis, axis, indexing="ij"), dim=-1)
+
+
+def sphere_field(grid_size, radius=0.6):
+    # Positive inside, as marching_cubes expects.
+    return radius - grid_points(grid_size).norm(dim=-1)
+
+
+def torus_field(grid_size, major=0.55, minor=0.2):
+    p = grid_points(grid_size)
+    ring = (p[..., :2].norm(dim=-1) - major) ** 2 + p[..., 2] ** 2
+    return minor - ring.sqrt()
+
+
+@pytest.mark.parametrize("field_fn", [sphere_field, torus_field])
+@pytest.mark.parametrize("grid_size", [17, 32, 45])
+def test_sparse_matches_dense(field_fn, grid_size):
+    field = field_fn(grid_size)
+    min_point = torch.full([3], -1.0)
+    size = torch.full([3], 2.0)
+
+    dense = marching_cubes(field, min_point, size)
+    sparse = sparse_marching_cubes(field, min_point, size)
+
+    assert len(dense.faces) > 0
+    assert torch.equal(sparse.faces, dense.faces)
+    assert torch.allclose(sparse.verts, dense.verts, atol=1e-6)
+
+
+def test_sparse_handles_empty_field():
+    field = -torch.ones(8, 8, 8)
+    mesh = sparse_marching_cubes(field, torch.full([3], -1.0), torch.full([3], 2.0))
+    assert mesh.faces.shape == (0, 3)
+    assert mesh.verts.shape == (0, 3)
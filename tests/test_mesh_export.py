@@ -0,0 +1,115 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+
+pytest.importorskip("blobfile")
+
+from shap_e.rendering.obj_util import write_obj
+from shap_e.rendering.ply_util import read_ply, write_ply
+
+
+def random_mesh(num_verts=1000, num_faces=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.normal(size=(num_verts, 3)).astype(np.float32)
+    rgb = rng.uniform(size=(num_verts, 3)).astype(np.float32)
+    faces = rng.integers(0, num_verts, size=(num_faces, 3))
+    return coords, rgb, faces
+
+
+def struct_write_ply(f, coords, rgb=None, faces=None):
+    '''The original per-vertex struct.pack PLY writer, as the byte-level reference.'''
+    f.write(b"ply\n")
+    f.write(b"format binary_little_endian 1.0\n")
+    f.write(bytes(f"element vertex {len(coords)}\n", "ascii"))
+    f.write(b"property float x\n")
+    f.write(b"property float y\n")
+    f.write(b"property float z\n")
+    if rgb is not None:
+        f.write(b"property uchar red\n")
+        f.write(b"property uchar green\n")
+        f.write(b"property uchar blue\n")
+    if faces is not None:
+        f.write(bytes(f"element face {len(faces)}\n", "ascii"))
+        f.write(b"property list uchar int vertex_index\n")
+    f.write(b"end_header\n")
+
+    if rgb is not None:
+        rgb = (rgb * 255.499).round().astype(int)
+        vertex_format = struct.Struct("<3f3B")
+        for coord, color in zip(coords.tolist(), rgb.tolist()):
+            f.write(vertex_format.pack(*coord, *color))
+    else:
+        vertex_format = struct.Struct("<3f")
+        for coord in coords.tolist():
+            f.write(vertex_format.pack(*coord))
+
+    if faces is not None:
+        face_format = struct.Struct("<B3I")
+        for tri in faces.tolist():
+            f.write(face_format.pack(len(tri), *tri))
+
+
+def read_obj(data):
+    '''Parse the `v` and `f` lines of an OBJ file.'''
+    verts, faces = [], []
+    for line in data.decode("ascii").splitlines():
+        parts = line.split()
+        if parts[0] == "v":
+            verts.append([float(x) for x in parts[1:]])
+        elif parts[0] == "f":
+            faces.append([int(x) - 1 for x in parts[1:]])
+    return np.array(verts), np.array(faces)
+
+
+@pytest.mark.parametrize("with_rgb", [False, True])
+@pytest.mark.parametrize("with_faces", [False, True])
+def test_ply_matches_struct_writer(with_rgb, with_faces):
+    coords, rgb, faces = random_mesh()
+    rgb = rgb if with_rgb else None
+    faces = faces if with_faces else None
+
+    expected = io.BytesIO()
+    struct_write_ply(expected, coords, rgb=rgb, faces=faces)
+    actual = io.BytesIO()
+    write_ply(actual, coords, rgb=rgb, faces=faces)
+    assert actual.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize("with_rgb", [False, True])
+def test_ply_round_trip(with_rgb):
+    coords, rgb, faces = random_mesh()
+    buffer = io.BytesIO()
+    write_ply(buffer, coords, rgb=rgb if with_rgb else None, faces=faces)
+    buffer.seek(0)
+    read_coords, read_rgb, read_faces = read_ply(buffer)
+
+    np.testing.assert_array_equal(read_coords, coords)
+    np.testing.assert_array_equal(read_faces, faces)
+    if with_rgb:
+        # Colors are scaled by 255.499 and rounded, so they are within one step.
+        np.testing.assert_allclose(read_rgb, rgb, atol=1 / 255)
+    else:
+        assert read_rgb is None
+
+
+@pytest.mark.parametrize("with_rgb", [False, True])
+@pytest.mark.parametrize("text_mode", [False, True])
+def test_obj_round_trip(with_rgb, text_mode):
+    coords, rgb, faces = random_mesh()
+    # A small chunk size exercises the chunk boundaries.
+    kwargs = dict(rgb=rgb if with_rgb else None, faces=faces, chunk_size=300)
+    if text_mode:
+        buffer = io.StringIO()
+        write_obj(buffer, coords, **kwargs)
+        data = buffer.getvalue().encode("ascii")
+    else:
+        buffer = io.BytesIO()
+        write_obj(buffer, coords, **kwargs)
+        data = buffer.getvalue()
+    verts, read_faces = read_obj(data)
+
+    expected = np.concatenate([coords, rgb], axis=1) if with_rgb else coords
+    np.testing.assert_array_equal(verts.astype(np.float32), expected)
+    np.testing.assert_array_equal(read_faces, faces)
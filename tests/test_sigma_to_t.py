@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+interpolate = pytest.importorskip("scipy.interpolate")
+pytest.importorskip("blobfile")
+
+from shap_e.diffusion.gaussian_diffusion import diffusion_from_config
+from shap_e.diffusion.k_diffusion import GaussianToKarrasDenoiser, get_sigmas_karras
+
+
+def baseline_sigma_to_t(diffusion, sigmas):
+    '''The original per-sigma scipy implementation, as the reference.'''
+    alpha_cumprod_to_t = interpolate.interp1d(
+        diffusion.alphas_cumprod, np.arange(0, diffusion.num_timesteps)
+    )
+    ts = []
+    for sigma in sigmas.cpu().numpy():
+        alpha_cumprod = 1.0 / (sigma**2 + 1)
+        if alpha_cumprod > diffusion.alphas_cumprod[0]:
+            ts.append(0)
+        elif alpha_cumprod <= diffusion.alphas_cumprod[-1]:
+            ts.append(diffusion.num_timesteps - 1)
+        else:
+            ts.append(float(alpha_cumprod_to_t(alpha_cumprod)))
+    return np.array(ts, dtype=np.float64)
+
+
+@pytest.fixture(scope="module")
+def diffusion():
+    return diffusion_from_config(dict(schedule="exp", timesteps=1024, mean_type="x_start"))
+
+
+@pytest.mark.parametrize("steps", [15, 64])
+def test_matches_baseline_on_karras_schedule(diffusion, steps):
+    # The sampler's schedule, without the trailing zero, plus out-of-range levels.
+    sigmas = get_sigmas_karras(steps, 1e-3, 140)[:-1]
+    sigmas = torch.cat([sigmas, torch.tensor([1e-6, 1e4])])
+    denoiser = GaussianToKarrasDenoiser(model=None, diffusion=diffusion)
+
+    expected = baseline_sigma_to_t(diffusion, sigmas)
+    actual = denoiser.sigma_to_t(sigmas)
+
+    assert actual.dtype == torch.float64
+    np.testing.assert_allclose(actual.numpy(), expected, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(actual.long().numpy(), expected.astype(np.int64))
+
+
+def test_endpoints(diffusion):
+    denoiser = GaussianToKarrasDenoiser(model=None, diffusion=diffusion)
+    alphas_cumprod = torch.from_numpy(diffusion.alphas_cumprod)
+    # Exactly on the first and last table entries.
+    sigmas = ((1 / alphas_cumprod[[0, -1]] - 1) ** 0.5).float()
+    np.testing.assert_allclose(
+        denoiser.sigma_to_t(sigmas).numpy(), baseline_sigma_to_t(diffusion, sigmas), atol=1e-6
+    )